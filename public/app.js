@@ -535,7 +535,7 @@ async function loadHistory() {
         </div>
       `;
 
-      const isStoppable = job.status === "running" || job.status === "queued";
+      const isStoppable = job.status === "running" || job.status === "paused" || job.status === "queued";
       const stopButton = isStoppable ? `<button class="stop-btn" onclick="stopJob('${job.id}')">&#x25A0; Stop</button>` : "";
 
       const emailListId = `emails-${job.id}`;
@@ -10,38 +10,32 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-# ── Country phone config ───────────────────────────────────────────────────────
-COUNTRY_PHONE_CONFIG = {
-    "United Kingdom":  {"prefixes": ["07", "+44"], "regex": r'(?:\+44\s?|0)(?:7\d{9}|\d{2,4}[\s.\-]?\d{3,4}[\s.\-]?\d{3,4})'},
-    "United States":   {"prefixes": ["+1", "tel:"],  "regex": r'(?:\+1[\s.\-]?)?\(?\d{3}\)?[\s.\-]?\d{3}[\s.\-]?\d{4}'},
-    "Canada":          {"prefixes": ["+1", "tel:"],  "regex": r'(?:\+1[\s.\-]?)?\(?\d{3}\)?[\s.\-]?\d{3}[\s.\-]?\d{4}'},
-    "Australia":       {"prefixes": ["04", "+61"],   "regex": r'(?:\+61\s?|0)(?:4\d{8}|\d{1,4}[\s.\-]?\d{3,4}[\s.\-]?\d{3,4})'},
-    "Germany":         {"prefixes": ["+49", "015", "016", "017"], "regex": r'(?:\+49\s?|0)1[567]\d{7,10}'},
-    "France":          {"prefixes": ["+33", "06", "07"], "regex": r'(?:\+33\s?|0)[67]\d{8}'},
-    "India":           {"prefixes": ["+91", "9", "8", "7"], "regex": r'(?:\+91[\s.\-]?)?[6-9]\d{9}'},
-    "Pakistan":        {"prefixes": ["+92", "03"], "regex": r'(?:\+92[\s.\-]?|0)3\d{9}'},
-    "UAE":             {"prefixes": ["+971", "05"], "regex": r'(?:\+971[\s.\-]?|0)5\d{8}'},
-    "Saudi Arabia":    {"prefixes": ["+966", "05"], "regex": r'(?:\+966[\s.\-]?|0)5\d{8}'},
-}
-GENERIC_PHONE_REGEX = r'(?:\+\d{1,3}[\s.\-]?)?\(?\d{2,4}\)?[\s.\-]?\d{3,5}[\s.\-]?\d{3,5}'
-
-def build_phone_query_term(country):
-    cfg = COUNTRY_PHONE_CONFIG.get(country)
-    if not cfg:
-        return '(WhatsApp OR phone OR mobile OR call)'
-    terms = ' OR '.join(f'"{p}"' for p in cfg['prefixes'])
-    return f'({terms})'
+# Shared helpers live next to the email scraper in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from browser_cache import BrowserCache, start_chrome
+from extractors import PhoneExtractor
+from job_config import parse_job_args
+from metrics import metrics_from_config
+from output_segments import open_writer
+from phone_engine import COUNTRY_PHONE_CONFIG, PhoneKeySet, phone_key, to_e164
+from rate_governor import RateGovernor
+from serp_feed import FeedCapture
+from serp_harvest import harvest_results, page_blocked, resolve_prefilter
+from sharding import parse_shard, shard_output_dir, unit_in_shard
+from shutdown import StopSignal, quit_driver
+from yield_policy import YieldStopPolicy
 
-def extract_phones(text, country):
-    cfg = COUNTRY_PHONE_CONFIG.get(country)
-    pattern = cfg['regex'] if cfg else GENERIC_PHONE_REGEX
-    raw = re.findall(pattern, text)
-    cleaned = set()
-    for r in raw:
-        d = re.sub(r'[^\d+]', '', r)
-        if 10 <= len(d) <= 15:
-            cleaned.add(d)
-    return list(cleaned)
+def build_phone_query_term(countries):
+    if isinstance(countries, str):
+        countries = [countries]
+    prefixes = []
+    for country in countries:
+        cfg = COUNTRY_PHONE_CONFIG.get(country)
+        if not cfg:
+            return '(WhatsApp OR phone OR mobile OR call)'
+        prefixes += [p for p in cfg['prefixes'] if p not in prefixes]
+    terms = ' OR '.join(f'"{p}"' for p in prefixes)
+    return f'({terms})'
 
 def emit(event):
     """Print a JSON event to stdout for the Node.js parent process."""
@@ -52,37 +46,93 @@ class DDGMultiNicheScraper:
         self.driver = None
         self.payload = payload or {}
         self.country = self.payload.get('country', 'United Kingdom')
-        output_dir = self.payload.get('outputDir', '.')
+        # Extra countries whose numbers are tagged in the same scan (regional jobs)
+        self.countries = list(dict.fromkeys([self.country] + list(self.payload.get('countries') or [])))
+        self.shard = parse_shard(self.payload.get('shard'))
+        output_dir = str(shard_output_dir(self.payload.get('outputDir', '.'), self.shard))
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
         country_safe = re.sub(r'[^a-zA-Z0-9]', '_', self.country)
         self.leads_file   = os.path.join(output_dir, f"{country_safe}_leads.txt")
-        self.numbers_file = os.path.join(output_dir, f"{country_safe}_phones.txt")
         self.all_phones_file = os.path.join(output_dir, "all_phones.txt")
         self.progress_file = os.path.join(output_dir, "search_progress.json")
+        self.leads_writer = open_writer(
+            self.leads_file, self.payload.get('compressOutput'), self.payload.get('segmentMaxBytes')
+        )
         self.sites = self.payload.get('sites', ["linkedin.com/in", "facebook.com", "instagram.com"])
 
-        # Dedup sets
-        self.saved_phones = set()
-        for fpath in [self.numbers_file, self.all_phones_file]:
+        # Numbers are normalized to E.164 and deduped as int64 keys
+        self.phone_extractor = PhoneExtractor(self.countries)
+        self.saved_phones = PhoneKeySet()
+        sources = [(self.numbers_file_for(c), c) for c in self.countries] + [(self.all_phones_file, self.country)]
+        for fpath, country in sources:
             if os.path.exists(fpath):
                 with open(fpath, "r", encoding="utf-8") as f:
                     for line in f:
-                        self.saved_phones.add(line.strip())
+                        phone = to_e164(line, country)
+                        if phone:
+                            self.saved_phones.add(phone_key(phone))
 
         # Use niches/cities from payload or fallback defaults
         self.niche_keywords = self.payload.get('niches', ["Fitness Trainer"])
         self.cities         = self.payload.get('cities', ["London"])
 
         # Phone query term e.g. ("07" OR "+44")
-        self.phone_query_term = build_phone_query_term(self.country)
+        self.phone_query_term = build_phone_query_term(self.countries)
+        self.stop = StopSignal()
+        # Counters/histograms, optionally exported on metricsPort or to outputDir/metrics.prom
+        worker = os.path.basename(os.path.abspath(self.payload.get('outputDir', '.')))
+        if self.shard:
+            worker += f"/shard_{self.shard[0]}_of_{self.shard[1]}"
+        self.metrics = metrics_from_config(self.payload, output_dir, {"worker": worker, "scraper": "ddg_phone"})
+        # (Re)starts reuse a pre-patched chromedriver and a clone of a warm profile
+        self.browser_cache = None
+        if self.payload.get('browserCache', True):
+            self.browser_cache = BrowserCache(cache_dir=self.payload.get('browserCacheDir'))
+        # Host-wide query pacing shared with every other scraper process
+        self.governor = None
+        if self.payload.get('rateGovernor', True):
+            self.governor = RateGovernor.from_config(self.payload, os.path.basename(os.path.abspath(output_dir)))
+
+        # In-page prefilter: "phone" uses the job's country regexes inside the browser
+        self.prefilter_pattern = resolve_prefilter(
+            self.payload.get('prefilter'), self.phone_extractor.engine.prefilter_source
+        )
+        # Read results from DuckDuckGo's JSON feed via CDP, with the DOM as fallback
+        self.serp_feed = self.payload.get('serpFeed')
+        self.feed = None
         emit({"type": "log", "message": f"[Python] Phone search term: {self.phone_query_term}"})
 
-    def setup_driver(self):
-        print("   [System] Launching Browser in New Headless Mode...")
+    def numbers_file_for(self, country):
+        return os.path.join(self.output_dir, f"{re.sub(r'[^a-zA-Z0-9]', '_', country)}_phones.txt")
+
+    def chrome_options(self):
         options = uc.ChromeOptions()
         options.add_argument("--headless=new") 
         options.add_argument("--window-size=1920,1080")
         options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
-        self.driver = uc.Chrome(options=options)
+        if self.serp_feed:
+            FeedCapture.enable(options)
+        return options
+
+    def setup_driver(self):
+        print("   [System] Launching Browser in New Headless Mode...")
+        self.driver, seconds, how = start_chrome(self.chrome_options, cache=self.browser_cache)
+        self.metrics.set("scraper_driver_start_seconds", round(seconds, 3))
+        emit({"type": "log", "message": f"[Python] Browser started in {seconds:.1f}s ({how} start)."})
+        if self.serp_feed:
+            self.feed = FeedCapture(self.driver)
+
+    def harvest(self):
+        """Results from the captured results feed when there is one, else from the DOM."""
+        if self.feed:
+            try:
+                batch = self.feed.harvest(self.prefilter_pattern)
+            except Exception:
+                batch = None
+            if batch is not None:
+                return batch
+        return harvest_results(self.driver, self.prefilter_pattern)
 
     # --- PROGRESS SAVING FUNCTIONS ---
     def load_progress(self):
@@ -101,68 +151,78 @@ class DDGMultiNicheScraper:
             "site_idx": site_idx,
             "timestamp": time.strftime('%Y-%m-%d %H:%M:%S')
         }
-        with open(self.progress_file, "w") as f:
+        tmp_file = self.progress_file + ".tmp"
+        with open(tmp_file, "w") as f:
             json.dump(data, f)
+        os.replace(tmp_file, self.progress_file)
         print(f"   [System] Progress Saved: City {city_idx}, Niche {niche_idx}, Site {site_idx}")
 
     # --- SAVING FUNCTIONS ---
     def process_result(self, city, niche, title, details, link, found_phones):
         """Saves full lead details to the leads file."""
         try:
-            with open(self.leads_file, "a", encoding="utf-8") as f:
-                f.write(f"[RESULT] [{niche.upper()}] - {city}\n")
-                f.write(f"Title:      {title}\n")
-                f.write(f"Details:    {details}\n")
-                f.write(f"Link:       {link}\n")
-                if found_phones:
-                    f.write(f"Phones:     {', '.join(found_phones)}\n")
-                f.write("-" * 50 + "\n")
+            entry = (
+                f"[RESULT] [{niche.upper()}] - {city}\n"
+                f"Title:      {title}\n"
+                f"Details:    {details}\n"
+                f"Link:       {link}\n"
+            )
+            if found_phones:
+                entry += f"Phones:     {', '.join(found_phones)}\n"
+            self.leads_writer.write(entry + "-" * 50 + "\n")
         except Exception as e:
             emit({"type": "log", "message": f"Error saving lead file: {e}"})
 
-    def save_phone(self, phone, city, niche, site, title):
-        """Saves a clean phone number to both file and emits a phone-saved event."""
-        if phone and phone not in self.saved_phones:
-            self.saved_phones.add(phone)
+    def save_phone(self, phone, city, niche, site, title, country=None):
+        """Saves a clean phone number to both file and emits a phone-saved event.
+
+        Returns True when the number was new.
+        """
+        if phone and self.saved_phones.add(phone_key(phone)):
+            self.metrics.inc("scraper_contacts_new_total", kind="phone")
+            numbers_file = self.numbers_file_for(country or self.country)
             try:
-                with open(self.numbers_file, "a", encoding="utf-8") as f:
+                with open(numbers_file, "a", encoding="utf-8") as f:
                     f.write(f"{phone}\n")
                 with open(self.all_phones_file, "a", encoding="utf-8") as f:
                     f.write(f"{phone}\n")
                 emit({
                     "type": "phone-saved",
                     "phone": phone,
+                    "country": country or self.country,
                     "city": city,
                     "niche": niche,
                     "site": site,
                     "title": title,
-                    "phoneFileName": os.path.basename(self.numbers_file),
+                    "phoneFileName": os.path.basename(numbers_file),
                     "allPhonesFileName": "all_phones.txt",
                     "message": f"[Phone] Saved: {phone}"
                 })
+                return True
             except Exception as e:
                 emit({"type": "log", "message": f"Error saving phone: {e}"})
+        return False
 
     def load_more_results(self):
         try:
             last_height = self.driver.execute_script("return document.body.scrollHeight")
             
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3) 
+            if self.stop.wait(3): return False
             
             try:
                 more_btn = self.driver.find_element(By.ID, "more-results")
                 if more_btn.is_displayed():
                     self.driver.execute_script("arguments[0].click();", more_btn)
-                    time.sleep(3) 
+                    if self.stop.wait(3): return False
             except:
                 pass 
             
             new_height = self.driver.execute_script("return document.body.scrollHeight")
             if new_height == last_height:
-                time.sleep(2)
+                if self.stop.wait(2): return False
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+                if self.stop.wait(2): return False
                 final_height = self.driver.execute_script("return document.body.scrollHeight")
                 if final_height == last_height:
                     return False 
@@ -172,8 +232,16 @@ class DDGMultiNicheScraper:
             return False
 
     def scrape_single_query(self, query, city, niche, site):
+        if self.governor:
+            waited = self.governor.acquire(self.stop)
+            if waited is None: return
+            if waited >= 1:
+                emit({"type": "log", "message": f"[Python] Waited {waited:.0f}s for a host-wide query slot."})
         emit({"type": "search-query", "query": query, "message": f"[Python] Searching: {query}"})
+        self.metrics.inc("scraper_queries_total")
         try:
+            if self.feed:
+                self.feed.reset()
             self.driver.get("https://duckduckgo.com/")
             search_box = WebDriverWait(self.driver, 20).until(
                 EC.presence_of_element_located((By.NAME, "q"))
@@ -188,42 +256,55 @@ class DDGMultiNicheScraper:
                 )
                 time.sleep(2)
             except:
-                emit({"type": "log", "message": "[Python] Timeout: No results."})
+                if page_blocked(self.driver):
+                    self.metrics.inc("scraper_block_events_total")
+                    emit({"type": "log", "message": "[Python] Search looks blocked (bot challenge)."})
+                else:
+                    emit({"type": "log", "message": "[Python] Timeout: No results."})
                 return 0
 
             scraped_links = set()
             total_saved = 0
             page_exhausted = False
             consecutive_no_new = 0
+            yield_policy = YieldStopPolicy.from_config(self.payload)
+
+            total_skipped = 0
 
             while not page_exhausted:
-                results = self.driver.find_elements(By.CSS_SELECTOR, "li[data-layout='organic']")
-                if not results:
-                    results = self.driver.find_elements(By.CSS_SELECTOR, "article")
+                results, skipped = self.harvest()
+                total_skipped += skipped
+                self.metrics.inc("scraper_results_harvested_total", len(results))
+                self.metrics.inc("scraper_results_skipped_total", skipped)
 
-                new_items = False
+                new_items = skipped > 0
+                new_contacts = 0
                 for result in results:
+                    if self.stop.requested: break
+                    if yield_policy.reached_result_cap(total_saved): break
                     try:
-                        link_el = result.find_element(By.CSS_SELECTOR, "a[data-testid='result-title-a']")
-                        title_text = link_el.text
-                        link = link_el.get_attribute("href")
+                        title_text = result["title"]
+                        link = result["href"]
                         if link in scraped_links: continue
                         scraped_links.add(link)
 
-                        full_text = result.text
+                        write_started = time.perf_counter()
+                        full_text = result["text"]
                         details = full_text.replace(title_text, "").replace("\n", " ").strip()
 
                         # --- Extract phones using country-aware regex ---
-                        found_phones = extract_phones(full_text, self.country)
+                        found_phones = self.phone_extractor.extract(full_text, city=city)
                         valid_phones = []
                         for phone in found_phones:
-                            self.save_phone(phone, city, niche, site, title_text)
+                            country = self.phone_extractor.country_of(phone)
+                            if self.save_phone(phone, city, niche, site, title_text, country):
+                                new_contacts += 1
                             valid_phones.append(phone)
 
                         # --- Save full lead ---
                         self.process_result(city, niche, title_text, details, link, valid_phones)
 
-                        leads_file_name = os.path.basename(self.leads_file)
+                        leads_file_name = self.leads_writer.name
                         emit({
                             "type": "lead-saved",
                             "title": title_text,
@@ -233,18 +314,30 @@ class DDGMultiNicheScraper:
                             "fileName": leads_file_name,
                             "emailFileName": None,
                             "allEmailsFileName": "all_emails.txt",
-                            "phoneFileName": os.path.basename(self.numbers_file),
+                            "phoneFileName": os.path.basename(self.numbers_file_for(
+                                self.phone_extractor.country_of(valid_phones[0]) if valid_phones else self.country
+                            )),
                             "allPhonesFileName": "all_phones.txt",
                             "totalSavedForFile": total_saved + 1,
                             "message": f"Saved: {title_text[:40]}..."
                         })
                         total_saved += 1
                         new_items = True
+                        self.metrics.observe("scraper_write_latency_seconds", time.perf_counter() - write_started)
+                        self.metrics.set("scraper_last_progress_timestamp_seconds", round(time.time()))
                     except:
                         continue
 
                 consecutive_no_new = 0 if new_items else consecutive_no_new + 1
-                emit({"type": "log", "message": f"Total found: {total_saved}. Loading more..."})
+                self.leads_writer.flush()
+                if self.stop.requested: break
+                self.metrics.inc("scraper_scroll_passes_total")
+                stop_reason = yield_policy.record_pass(new_contacts, total_saved)
+                if stop_reason:
+                    emit({"type": "log", "message": f"[Python] {stop_reason} Moving next."})
+                    break
+                skipped_note = f" Skipped {total_skipped} without phones." if self.prefilter_pattern else ""
+                emit({"type": "log", "message": f"Total found: {total_saved}.{skipped_note} Loading more..."})
                 more = self.load_more_results()
                 if not more:
                     page_exhausted = True
@@ -257,28 +350,59 @@ class DDGMultiNicheScraper:
             return 0
 
     def run_batch(self):
-        emit({"type": "job-start", "message": "Starting Python (DuckDuckGo) Scraper phase"})
+        self.stop.install()
+        state = self.load_progress()
+        start_city_idx = state['city_idx']
+        start_niche_idx = state['niche_idx']
+        start_site_idx = state['site_idx']
+
+        emit({"type": "job-start", "message": f"Starting Python (DuckDuckGo) Scraper phase from City #{start_city_idx}, Niche #{start_niche_idx}"})
         self.setup_driver()
 
-        for city in self.cities:
+        for c_idx, city in enumerate(self.cities):
+            if c_idx < start_city_idx: continue
             emit({"type": "log", "message": f"[Python] Processing city: {city}"})
-            for niche in self.niche_keywords:
-                for site in self.sites:
+            for n_idx, niche in enumerate(self.niche_keywords):
+                if c_idx == start_city_idx and n_idx < start_niche_idx: continue
+                for s_idx, site in enumerate(self.sites):
+                    if c_idx == start_city_idx and n_idx == start_niche_idx and s_idx < start_site_idx: continue
+                    if not unit_in_shard(self.shard, city, niche, site):
+                        continue
                     # Build country-aware phone query
                     query = f'site:{site} "{niche}" "{city}" {self.phone_query_term}'
                     self.scrape_single_query(query, city, niche, site)
+                    if self.stop.requested:
+                        self.save_progress(c_idx, n_idx, s_idx)
+                        break
+                    self.save_progress(c_idx, n_idx, s_idx + 1)
                     sleep_time = random.uniform(3, 6)
-                    time.sleep(sleep_time)
+                    if self.stop.wait(sleep_time): break
+                if self.stop.requested: break
+                self.save_progress(c_idx, n_idx + 1, 0)
+            if self.stop.requested: break
+            self.save_progress(c_idx + 1, 0, 0)
 
+        self.leads_writer.close()
+        quit_driver(self.driver)
+        self.driver = None
+        if self.browser_cache:
+            self.browser_cache.cleanup()
+        if self.governor:
+            self.governor.release()
+        self.metrics.close()
+        if self.stop.requested:
+            emit({"type": "log", "message": f"[Python] Stopped by {self.stop.signal_name or 'request'}. Progress checkpointed."})
+            return
         emit({"type": "job-complete", "message": "Python scraper completed."})
-        self.driver.quit()
 
 if __name__ == "__main__":
     payload = {}
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 or not sys.stdin.isatty():
         try:
-            payload = json.loads(sys.argv[1])
-        except:
-            pass
+            payload, _ = parse_job_args(sys.argv[1:], "DuckDuckGo phone scraper")
+        except (ValueError, OSError) as e:
+            # A broken job config must fail the job, not crawl the built-in defaults
+            emit({"type": "job-failed", "message": f"Invalid job config: {e}"})
+            sys.exit(1)
     scraper = DDGMultiNicheScraper(payload=payload)
     scraper.run_batch()
@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import undetected_chromedriver as uc
+
+# --- CONFIGURATION ---
+DEFAULT_CACHE_DIR = Path(os.environ.get("SCRAPER_BROWSER_CACHE") or Path.home() / ".cache" / "lead_scraper")
+# Pages loaded once into the template profile so clones start with a warm HTTP cache
+WARM_URLS = ["https://duckduckgo.com/", "https://duckduckgo.com/?q=personal+trainer+london"]
+# Profile files that must not be carried into clones (they pin the profile to one live Chrome)
+SKIP_FILES = {"SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile"}
+
+
+def binary_major(path):
+    """Major version printed by `<binary> --version` (Chrome or chromedriver), or None."""
+    if not path:
+        return None
+    try:
+        output = subprocess.run(
+            [str(path), "--version"], capture_output=True, text=True, timeout=15,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r"\b(\d+)\.\d+\.\d+", output)
+    return int(match.group(1)) if match else None
+
+
+def _copy_entry(src, dst):
+    """Copies a profile file; Chrome rewrites cache entries in place, so nothing may be shared with the template."""
+    if Path(src).name in SKIP_FILES:
+        return dst
+    return shutil.copy2(src, dst)
+
+
+def clone_tree(template, dest):
+    """Clones a profile: copy-on-write when the filesystem supports reflinks, else a full copy."""
+    template, dest = Path(template), Path(dest)
+    if sys.platform.startswith("linux") and shutil.which("cp"):
+        result = subprocess.run(
+            ["cp", "-a", "--reflink=always", f"{template}/.", str(dest)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        if result.returncode == 0:
+            for name in SKIP_FILES:
+                (dest / name).unlink(missing_ok=True)
+            return "reflink"
+        shutil.rmtree(dest, ignore_errors=True)
+    shutil.copytree(template, dest, copy_function=_copy_entry, dirs_exist_ok=True, symlinks=True)
+    return "copy"
+
+
+class BrowserCache:
+    """Starts Chrome from a pre-patched chromedriver and a cloned, pre-warmed profile.
+
+    undetected-chromedriver patches a fresh chromedriver and Chrome builds a
+    cold profile on every start. Here the patched binary is kept per Chrome
+    major version, and a template user-data-dir warmed on DuckDuckGo is cloned
+    for each launch, so a (re)start skips both.
+
+    The cache is keyed on the major version of the installed Chrome, so a
+    Chrome upgrade starts a new driver and profile instead of reusing stale
+    ones; `version_main` is only used when Chrome's version cannot be read.
+    """
+
+    def __init__(self, version_main=None, cache_dir=None):
+        self.version_main = binary_major(uc.find_chrome_executable()) or version_main
+        self.root = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.key = str(self.version_main or "auto")
+        self.clones = []
+
+    @property
+    def driver_path(self):
+        name = "chromedriver.exe" if sys.platform.startswith("win") else "chromedriver"
+        return self.root / "drivers" / self.key / name
+
+    @property
+    def template_dir(self):
+        return self.root / "profiles" / self.key
+
+    def ensure_driver(self):
+        """Returns the cached patched chromedriver, downloading and patching it on first use.
+
+        A cached driver whose major version no longer matches is replaced.
+        """
+        path = self.driver_path
+        if path.exists() and (not self.version_main or binary_major(path) == self.version_main):
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        patcher = uc.Patcher(version_main=self.version_main or 0, user_multi_procs=True)
+        patcher.auto()
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        shutil.copy2(patcher.executable_path, tmp)
+        os.replace(tmp, path)
+        return path
+
+    def ensure_template(self, make_options):
+        """Builds the warm template profile once; concurrent builders race and the first rename wins."""
+        template = self.template_dir
+        if template.exists():
+            return template
+        template.parent.mkdir(parents=True, exist_ok=True)
+        building = Path(tempfile.mkdtemp(prefix=f".{template.name}.", dir=template.parent))
+        driver = uc.Chrome(
+            options=make_options(),
+            version_main=self.version_main,
+            driver_executable_path=str(self.ensure_driver()),
+            user_data_dir=str(building),
+        )
+        try:
+            for url in WARM_URLS:
+                driver.get(url)
+                time.sleep(2)
+        finally:
+            driver.quit()
+        try:
+            os.rename(building, template)
+        except OSError:
+            shutil.rmtree(building, ignore_errors=True)
+        return template
+
+    def launch(self, make_options):
+        """Starts Chrome with the cached driver and a fresh clone of the warm profile."""
+        self.cleanup()
+        template = self.ensure_template(make_options)
+        clone = Path(tempfile.mkdtemp(prefix="lead_scraper_profile_"))
+        clone_tree(template, clone)
+        self.clones.append(clone)
+        return uc.Chrome(
+            options=make_options(),
+            version_main=self.version_main,
+            driver_executable_path=str(self.ensure_driver()),
+            user_data_dir=str(clone),
+        )
+
+    def cleanup(self):
+        """Removes profile clones of earlier launches; call once their Chrome has quit."""
+        while self.clones:
+            shutil.rmtree(self.clones.pop(), ignore_errors=True)
+
+
+def start_chrome(make_options, version_main=None, cache=None):
+    """Launches Chrome through `cache` when given, falling back to a plain uc start.
+
+    Returns (driver, seconds taken, how it started).
+    """
+    started = time.perf_counter()
+    if cache is not None:
+        try:
+            driver = cache.launch(make_options)
+            return driver, time.perf_counter() - started, "cached"
+        except Exception:
+            cache.cleanup()
+    kwargs = {"version_main": version_main} if version_main else {}
+    driver = uc.Chrome(options=make_options(), **kwargs)
+    return driver, time.perf_counter() - started, "cold"
+
+
+def _bench_options():
+    options = uc.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the browser startup cache or benchmark cold vs cached starts")
+    parser.add_argument("command", choices=["warm", "bench"])
+    parser.add_argument("--version-main", type=int, help="Chrome major version, used when the installed one cannot be read")
+    parser.add_argument("--cache-dir", help=f"Cache location (default {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--runs", type=int, default=3, help="Starts per mode for bench")
+    parser.add_argument("--url", default="https://duckduckgo.com/", help="Page loaded after each start for bench")
+    args = parser.parse_args()
+
+    cache = BrowserCache(args.version_main, args.cache_dir)
+    if args.command == "warm":
+        cache.ensure_template(_bench_options)
+        print(json.dumps({"driver": str(cache.driver_path), "profile": str(cache.template_dir)}))
+        return
+
+    timings = {"cold": [], "cached": []}
+    for mode in ("cold", "cached"):
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            driver, _, how = start_chrome(_bench_options, args.version_main, cache if mode == "cached" else None)
+            ready = time.perf_counter() - started
+            driver.get(args.url)
+            loaded = time.perf_counter() - started
+            driver.quit()
+            timings[mode].append({"start": round(ready, 2), "firstPage": round(loaded, 2), "mode": how})
+        cache.cleanup()
+    print(json.dumps(timings, indent=2))
+
+
+if __name__ == "__main__":
+    main()
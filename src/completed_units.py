@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+from sharding import unit_key
+
+COMPLETED_UNITS_FILE = "completed_units.jsonl"
+
+
+def load_completed_units(path, scrape_mode=None):
+    """Reads a completed-units manifest into a set of unit keys.
+
+    google_scraper.js and src/scraper.py append one JSON line per finished
+    unit to `completed_units.jsonl` in the job output dir, as {"city", "niche", "site",
+    "scrapeMode"}. Units finished in a different scrape mode are ignored, and
+    so is a torn last line left by a crash.
+    """
+    units = set()
+    if not path:
+        return units
+    path = Path(path)
+    if not path.exists():
+        return units
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                unit = json.loads(line)
+                city, niche, site = unit["city"], unit["niche"], unit["site"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if scrape_mode and unit.get("scrapeMode") not in (None, scrape_mode):
+                continue
+            units.add(unit_key(city, niche, site))
+    return units
+
+
+def record_completed_unit(path, city, niche, site, scrape_mode):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"city": city, "niche": niche, "site": site, "scrapeMode": scrape_mode}) + "\n")
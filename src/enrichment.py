@@ -0,0 +1,432 @@
+import argparse
+import asyncio
+import codecs
+import concurrent.futures
+import json
+import ssl
+import sys
+import threading
+import zlib
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from extractors import build_extractors
+
+# --- CONFIGURATION ---
+ENRICHMENT_FILE = "lead_enrichment.jsonl"
+USER_AGENT = "Mozilla/5.0 (compatible; LeadEnricher/1.0)"
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST = 2
+DEFAULT_TIMEOUT_SEC = 10
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_QUEUE_SIZE = 256
+MAX_REDIRECTS = 3
+MAX_HEADER_BYTES = 64 * 1024
+IDLE_PER_HOST = 4
+TEXT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+# Extraction runs on windows of this many characters; the tail is carried over so contacts split across chunks are still found
+SCAN_CHARS = 16 * 1024
+OVERLAP_CHARS = 256
+
+
+class _ContactText(HTMLParser):
+    """Incremental HTML-to-text that keeps mailto:/tel: link targets and drops script/style."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.size = 0
+        self._skip = 0
+
+    def _add(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style", "noscript"):
+            self._skip += 1
+            return
+        self._add(" ")
+        for name, value in attrs:
+            if name == "href" and value and value.lower().startswith(("mailto:", "tel:")):
+                self._add(" " + value.split(":", 1)[1].split("?", 1)[0] + " ")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript") and self._skip:
+            self._skip -= 1
+        else:
+            self._add(" ")
+
+    def handle_data(self, data):
+        # Text may arrive in pieces; words are only separated at tags
+        if not self._skip:
+            self._add(data)
+
+    def take(self, keep=0):
+        """Returns the text so far, keeping its last `keep` characters for the next call."""
+        text = "".join(self.parts)
+        self.parts = [text[-keep:]] if keep and text else []
+        self.size = len(self.parts[0]) if self.parts else 0
+        return text
+
+
+class _Response:
+    def __init__(self, status, headers, reader):
+        self.status = status
+        self.headers = headers
+        self.reader = reader
+        self.complete = False
+
+    @property
+    def content_type(self):
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    @property
+    def charset(self):
+        for part in self.headers.get("content-type", "").split(";")[1:]:
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "charset" and value:
+                try:
+                    return codecs.lookup(value.strip('"')).name
+                except LookupError:
+                    break
+        return "utf-8"
+
+    async def chunks(self, max_bytes):
+        """Yields decoded-transfer body bytes, stopping after `max_bytes`."""
+        reader = self.reader
+        remaining = max_bytes
+        gzipped = self.headers.get("content-encoding", "").lower() == "gzip"
+        inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            async def raw():
+                while True:
+                    size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                    if size == 0:
+                        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                            pass  # trailers
+                        self.complete = True
+                        return
+                    yield await reader.readexactly(size)
+                    await reader.readexactly(2)
+        elif "content-length" in self.headers:
+            async def raw():
+                left = int(self.headers["content-length"])
+                while left > 0:
+                    data = await reader.read(min(left, 65536))
+                    if not data:
+                        return
+                    left -= len(data)
+                    yield data
+                self.complete = True
+        else:
+            async def raw():
+                while True:
+                    data = await reader.read(65536)
+                    if not data:
+                        return
+                    yield data
+        async for data in raw():
+            if inflate:
+                data = inflate.decompress(data, remaining)
+            data = data[:remaining]
+            remaining -= len(data)
+            yield data
+            if remaining <= 0:
+                self.complete = False
+                return
+
+
+class Enricher:
+    """Fetches result pages in the background and finds contacts in them.
+
+    A pooled asyncio HTTP/1.1 client (keep-alive connections per host) runs
+    on its own thread. Concurrency is capped globally and per host, robots.txt
+    is honoured, only HTML/plain-text bodies are read, and each fetch is
+    bounded in time and bytes. Bodies are parsed as they stream in and
+    `extract(text)` (returning ({kind: values}, {phone: country})) runs on
+    the text as it grows. `submit` blocks while `queue_size` fetches are
+    pending; finds are collected with `drain`.
+    """
+
+    def __init__(self, extract, concurrency=None, per_host=None, timeout=None, max_bytes=None,
+                 respect_robots=True, queue_size=None, user_agent=USER_AGENT):
+        self.extract = extract
+        self.concurrency = int(concurrency or DEFAULT_CONCURRENCY)
+        self.per_host = int(per_host or DEFAULT_PER_HOST)
+        self.timeout = float(timeout or DEFAULT_TIMEOUT_SEC)
+        self.max_bytes = int(max_bytes or DEFAULT_MAX_BYTES)
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.stats = {"fetched": 0, "failed": 0, "skipped": 0, "enriched": 0}
+        self._slots = threading.BoundedSemaphore(int(queue_size or DEFAULT_QUEUE_SIZE))
+        self._results = []
+        self._results_lock = threading.Lock()
+        self._futures = set()
+        self._submitted = set()
+        self._loop = asyncio.new_event_loop()
+        self._thread = None
+        self._ssl = ssl.create_default_context()
+        self._idle = {}
+        self._host_limits = {}
+        self._robots = {}
+        self._limit = None
+
+    @classmethod
+    def from_config(cls, config, extract):
+        return cls(
+            extract,
+            concurrency=config.get("enrichConcurrency"),
+            per_host=config.get("enrichPerHost"),
+            timeout=config.get("enrichTimeoutSec"),
+            max_bytes=config.get("enrichMaxBytes"),
+            respect_robots=config.get("enrichRobots", True),
+        )
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop.run_forever, name="enrichment", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, url, context=None):
+        """Queues one page; every URL is fetched at most once per run."""
+        if not url or url in self._submitted or urlsplit(url).scheme not in ("http", "https"):
+            return False
+        self._submitted.add(url)
+        self._slots.acquire()
+        future = asyncio.run_coroutine_threadsafe(self._enrich(url, context), self._loop)
+        with self._results_lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        return True
+
+    def _forget(self, future):
+        with self._results_lock:
+            self._futures.discard(future)
+
+    def drain(self):
+        """Returns and forgets the finds so far, as (context, url, found, countries) tuples."""
+        with self._results_lock:
+            results, self._results = self._results, []
+        return results
+
+    def close(self, wait=True, timeout=None):
+        """Finishes (or with wait=False cancels) pending fetches and stops the client thread."""
+        if self._thread is None:
+            return
+        with self._results_lock:
+            pending = list(self._futures)
+        if wait:
+            concurrent.futures.wait(pending, timeout)
+        for future in pending:
+            future.cancel()
+        asyncio.run_coroutine_threadsafe(self._close_idle(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._thread = None
+
+    async def _close_idle(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle = {}
+
+    async def _enrich(self, url, context):
+        try:
+            found, countries = await self._fetch_contacts(url)
+            if found:
+                self.stats["enriched"] += 1
+                with self._results_lock:
+                    self._results.append((context, url, found, countries))
+        except Exception:
+            self.stats["failed"] += 1
+        finally:
+            self._slots.release()
+
+    async def _fetch_contacts(self, url):
+        """Follows redirects; the time limit only runs while a request holds its slots."""
+        found, countries = {}, {}
+        loop = asyncio.get_running_loop()
+        time_left = self.timeout
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        for _ in range(MAX_REDIRECTS + 1):
+            if self.respect_robots and not await self._allowed(url):
+                self.stats["skipped"] += 1
+                return found, countries
+            origin = self._origin(url)
+            host_limit = self._host_limits.setdefault(origin, asyncio.Semaphore(self.per_host))
+            # Host slot first: a page queued behind its host must not hold one of the global slots
+            async with host_limit, self._limit:
+                started = loop.time()
+                url = await asyncio.wait_for(self._fetch_page(url, origin, found, countries), time_left)
+                time_left -= loop.time() - started
+            if url is None:
+                return found, countries
+            if time_left <= 0:
+                raise asyncio.TimeoutError()
+        return found, countries
+
+    async def _fetch_page(self, url, origin, found, countries):
+        """Fetches and scans one page; returns the redirect target, or None when done."""
+        response, writer = await self._request(url)
+        try:
+            if response.status in (301, 302, 303, 307, 308) and response.headers.get("location"):
+                return urljoin(url, response.headers["location"])
+            if response.status != 200 or response.content_type not in TEXT_TYPES:
+                self.stats["skipped"] += 1
+                return None
+            self.stats["fetched"] += 1
+            await self._scan(response, found, countries)
+            return None
+        finally:
+            self._release(origin, response, writer)
+
+    async def _scan(self, response, found, countries):
+        decoder = codecs.getincrementaldecoder(response.charset)(errors="replace")
+        parser = _ContactText() if response.content_type != "text/plain" else None
+        plain = []
+
+        def scan(text):
+            batch, batch_countries = self.extract(text)
+            for kind, values in batch.items():
+                known = found.setdefault(kind, [])
+                known.extend(value for value in values if value not in known)
+            countries.update(batch_countries)
+
+        async for data in response.chunks(self.max_bytes):
+            text = decoder.decode(data)
+            if parser is None:
+                plain.append(text)
+                if sum(map(len, plain)) >= SCAN_CHARS:
+                    joined = "".join(plain)
+                    scan(joined)
+                    plain = [joined[-OVERLAP_CHARS:]]
+                continue
+            parser.feed(text)
+            if parser.size >= SCAN_CHARS:
+                scan(parser.take(keep=OVERLAP_CHARS))
+        tail = decoder.decode(b"", final=True)
+        if parser is None:
+            scan("".join(plain) + tail)
+        else:
+            parser.feed(tail)
+            parser.close()
+            scan(parser.take())
+
+    @staticmethod
+    def _origin(url):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return parts.scheme, parts.hostname, port
+
+    async def _request(self, url):
+        origin = self._origin(url)
+        parts = urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host = parts.hostname if origin[2] in (80, 443) else f"{parts.hostname}:{origin[2]}"
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {self.user_agent}\r\n"
+            f"Accept: text/html,application/xhtml+xml,text/plain;q=0.9\r\nAccept-Encoding: gzip\r\n"
+            f"Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+        idle = self._idle.get(origin)
+        while idle:
+            reader, writer = idle.pop()
+            if reader.at_eof() or writer.is_closing():
+                writer.close()
+                continue
+            try:
+                writer.write(request)
+                await writer.drain()
+                return await self._read_head(reader), writer
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                writer.close()  # the server dropped the kept-alive connection; open a new one
+        scheme, hostname, port = origin
+        reader, writer = await asyncio.open_connection(
+            hostname, port, ssl=self._ssl if scheme == "https" else None, limit=MAX_HEADER_BYTES
+        )
+        writer.write(request)
+        await writer.drain()
+        return await self._read_head(reader), writer
+
+    @staticmethod
+    async def _read_head(reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            key, sep, value = line.partition(":")
+            if sep:
+                headers[key.strip().lower()] = value.strip()
+        return _Response(status, headers, reader)
+
+    def _release(self, origin, response, writer):
+        """Keeps a fully read connection for reuse; closes anything else."""
+        keep = response.complete and response.headers.get("connection", "").lower() != "close"
+        idle = self._idle.setdefault(origin, [])
+        if keep and len(idle) < IDLE_PER_HOST:
+            idle.append((response.reader, writer))
+        else:
+            writer.close()
+
+    async def _allowed(self, url):
+        origin = self._origin(url)
+        robots = self._robots.get(origin)
+        if robots is None:
+            robots = self._robots[origin] = asyncio.ensure_future(self._load_robots(url))
+        parser = await robots
+        return parser.can_fetch(self.user_agent, url)
+
+    async def _load_robots(self, url):
+        parser = RobotFileParser()
+        robots_url = urljoin(url, "/robots.txt")
+        try:
+            response, writer = await asyncio.wait_for(self._request(robots_url), self.timeout)
+            try:
+                if response.status in (401, 403):
+                    parser.disallow_all = True
+                elif response.status == 200:
+                    body = b"".join([data async for data in response.chunks(512 * 1024)])
+                    parser.parse(body.decode("utf-8", "replace").splitlines())
+                else:
+                    parser.allow_all = True
+            finally:
+                self._release(self._origin(robots_url), response, writer)
+        except Exception:
+            parser.allow_all = True
+        return parser
+
+
+def main():
+    """Fetches the given pages the way the enrichment stage does and prints the contacts found."""
+    parser = argparse.ArgumentParser(description="Fetch pages and print the contacts the enrichment stage would find")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--country", default="United Kingdom")
+    parser.add_argument("--mode", default="both", help="emails, phones or both (scrapeMode)")
+    parser.add_argument("--no-robots", action="store_true", help="Ignore robots.txt (local stand-ins)")
+    args = parser.parse_args()
+
+    extractors = build_extractors(args.mode, args.country)
+
+    def extract(text):
+        found = {}
+        for extractor in extractors:
+            values = extractor.extract(text)
+            if values:
+                found[extractor.kind] = values
+        return found, {}
+
+    enricher = Enricher(extract, respect_robots=not args.no_robots).start()
+    for url in args.urls:
+        enricher.submit(url)
+    enricher.close()
+    for _, url, found, _ in enricher.drain():
+        print(json.dumps({"url": url, **found}))
+    print(json.dumps(enricher.stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
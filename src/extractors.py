@@ -0,0 +1,149 @@
+import re
+
+from phone_engine import COUNTRY_PHONE_CONFIG, MultiCountryPhoneEngine, PhoneEngine, PhoneKeySet, phone_key
+
+EMAIL_TERMS = ["@gmail.com", "@hotmail", "@outlook.com", "email me"]
+PHONE_FALLBACK_TERMS = ["WhatsApp", "phone", "mobile", "call"]
+
+EMAIL_REGEX = re.compile(r'([a-zA-Z0-9._-]+@[a-zA-Z0-9._-]+\.[a-zA-Z0-9_-]+)')
+SOCIAL_REGEX = re.compile(
+    r'(?:https?://)?(?:www\.)?(instagram\.com|facebook\.com|tiktok\.com|x\.com|twitter\.com|linkedin\.com/in|youtube\.com)/'
+    r'(@?[A-Za-z0-9_.\-]{2,60})'
+    r'|(?<![\w@.])@([A-Za-z0-9_.]{3,30})(?![\w@])'
+)
+SOCIAL_SKIP = {"p", "reel", "reels", "explore", "watch", "pages", "groups", "events", "share", "sharer", "hashtag", "search"}
+
+
+class EmailExtractor:
+    """Finds email addresses; dedups case-insensitively."""
+
+    kind = "email"
+    query_terms = EMAIL_TERMS
+
+    def __init__(self):
+        self.seen = set()
+
+    def extract(self, text):
+        found = []
+        for email in EMAIL_REGEX.findall(text or ""):
+            email = email.strip(".")
+            if email not in found:
+                found.append(email)
+        return found
+
+    def remember(self, value):
+        """Marks a value as seen; returns True when it is new."""
+        key = value.lower()
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+
+class PhoneExtractor:
+    """Finds phone numbers for one or more countries, normalized to E.164.
+
+    With several countries every result is scanned once by a combined
+    pattern and `country_of` tells which country's file a number belongs to.
+    """
+
+    kind = "phone"
+
+    def __init__(self, countries):
+        if isinstance(countries, str):
+            countries = [countries]
+        self.countries = list(dict.fromkeys(countries))
+        self.country = self.countries[0]
+        self.seen = PhoneKeySet()
+        self._countries_of = {}
+        if len(self.countries) > 1:
+            self.engine = MultiCountryPhoneEngine(self.countries)
+        else:
+            self.engine = PhoneEngine(self.country)
+
+        self.query_terms = []
+        for country in self.countries:
+            cfg = COUNTRY_PHONE_CONFIG.get(country)
+            for term in (cfg["prefixes"] if cfg else PHONE_FALLBACK_TERMS):
+                if term not in self.query_terms:
+                    self.query_terms.append(term)
+
+    def extract_tagged(self, text, city=None):
+        """Returns [(phone, country)]; unlike `extract` it keeps no state, so threads may share it.
+
+        `city` (the query's) places numbers whose format several countries share.
+        """
+        if len(self.countries) == 1:
+            return [(phone, self.country) for phone in self.engine.extract(text)]
+        return [(phone, country) for country, phone in self.engine.extract(text, city)]
+
+    def extract(self, text, city=None):
+        tagged = self.extract_tagged(text, city)
+        self._countries_of = dict(tagged)
+        return [phone for phone, _ in tagged]
+
+    def country_of(self, value):
+        """Country tagged for a number from the latest `extract` call."""
+        return self._countries_of.get(value, self.country)
+
+    def remember(self, value):
+        return self.seen.add(phone_key(value))
+
+
+class SocialExtractor:
+    """Finds social profile handles, as "site/handle" or "@handle"."""
+
+    kind = "social"
+    query_terms = []
+
+    def __init__(self):
+        self.seen = set()
+
+    def extract(self, text):
+        found = []
+        for site, path_handle, at_handle in SOCIAL_REGEX.findall(text or ""):
+            if site:
+                handle = path_handle.lstrip("@").rstrip(".")
+                if not handle or handle.lower() in SOCIAL_SKIP:
+                    continue
+                value = f"{site}/{handle}"
+            else:
+                value = f"@{at_handle.rstrip('.')}"
+            if value not in found:
+                found.append(value)
+        return found
+
+    def remember(self, value):
+        key = value.lower()
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+
+def build_extractors(scrape_mode, country, include_social=False, countries=None):
+    """Returns the extractors a job needs: 'emails', 'phones' or 'both' (+ optional social).
+
+    `countries` lists every country whose phone numbers should be tagged in one scan.
+    """
+    scrape_mode = scrape_mode or "emails"
+    extractors = []
+    if scrape_mode in ("emails", "both"):
+        extractors.append(EmailExtractor())
+    if scrape_mode in ("phones", "both"):
+        extractors.append(PhoneExtractor(countries or [country]))
+    if include_social:
+        extractors.append(SocialExtractor())
+    return extractors
+
+
+def build_contact_clause(extractors):
+    """One OR clause with the query terms of every extractor, e.g. ("@gmail.com" OR "+44")."""
+    terms = []
+    for extractor in extractors:
+        for term in extractor.query_terms:
+            if term not in terms:
+                terms.append(term)
+    if not terms:
+        return ""
+    return "(" + " OR ".join(f'"{term}"' for term in terms) + ")"
@@ -0,0 +1 @@
+if (DDG.deep && DDG.deep.setUpstream) DDG.deep.setUpstream("bingv7aa");DDG.deep.bn={'ivc':1};if (DDG.pageLayout) DDG.pageLayout.load('a',[], {"page_load_url":"https://duckduckgo.com/y.js?ifu=fixture"});DDG.deep.signalSummary = "";if (DDG.pageLayout) DDG.pageLayout.load('d',[{"a":"Certified <b>personal trainer</b> in London. Book a session: <b>jane.fit@gmail.com</b> or call 07700 900123.","ae":null,"c":"https://www.facebook.com/janefitlondon","d":"www.facebook.com/janefitlondon","da":"","h":0,"i":"www.facebook.com","k":null,"m":0,"o":0,"p":0,"s":"bingv7aa","t":"Jane Fit &amp; Co - <b>Personal Trainer</b> | Facebook","u":"https://www.facebook.com/janefitlondon"},{"a":"Strength coaching for busy professionals. Email coach&#64;example.co.uk for a free consult.","ae":null,"c":"https://www.facebook.com/strongcoachldn","d":"www.facebook.com/strongcoachldn","da":"","h":0,"i":"www.facebook.com","k":null,"m":0,"o":0,"p":0,"s":"bingv7aa","t":"Strong Coach London","u":"https://www.facebook.com/strongcoachldn"},{"a":"Photos and videos from our gym. No contact details here.","ae":null,"c":"https://www.facebook.com/gymphotos","d":"www.facebook.com/gymphotos","da":"","h":0,"i":"www.facebook.com","k":null,"m":0,"o":0,"p":0,"s":"bingv7aa","t":"Gym Photos","u":"https://www.facebook.com/gymphotos"},{"a":"Yoga and pilates classes. WhatsApp +44 7700 900456 — studio@yogaspace.co.uk","ae":null,"c":"https://www.facebook.com/yogaspaceldn","d":"www.facebook.com/yogaspaceldn","da":"","h":0,"i":"www.facebook.com","k":null,"m":0,"o":0,"p":0,"s":"bingv7aa","t":"Yoga Space <b>London</b>","u":"https://www.facebook.com/yogaspaceldn"},{"n":"/d.js?q=site%3Afacebook.com+personal+trainer+London&kl=wt-wt&l=wt-wt&p=&s=4&ex=-1&ct=GB&sp=0&vqd=4-fixture"}]);DDG.duckbar.load('images');DDG.duckbar.load('news');DDG.duckbar.load('videos');
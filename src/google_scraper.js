@@ -135,12 +135,22 @@ async function main() {
         existing.forEach(l => { if (l.trim()) seenPhones.add(l.trim()); });
     }
 
+    // Job budget left by the Node job: absolute deadline (Unix seconds) and queries still allowed
+    const deadlineMs = config.deadline ? config.deadline * 1000 : null;
+    const maxQueries = config.maxQueries ?? null;
+    let queriesIssued = 0;
+    const budgetLeft = () => (deadlineMs === null || Date.now() < deadlineMs) && (maxQueries === null || queriesIssued < maxQueries);
+
+    // One line per (city, niche, site) finished without errors; a Python fallback skips these
+    const completedUnitsFile = path.join(outputDir, "completed_units.jsonl");
+
     const files = [];
 
     emit({ type: "job-start", message: `Starting Google Search Scraper phase (mode: ${scrapeMode})` });
 
     let consecutiveErrors = 0;
 
+    cityLoop:
     for (let cIdx = 0; cIdx < cities.length; cIdx++) {
         const city = cities[cIdx];
         const sanitizedCity = sanitizeFileName(city);
@@ -166,10 +176,17 @@ async function main() {
 
             for (let sIdx = 0; sIdx < sites.length; sIdx++) {
                 const site = sites[sIdx];
+                let unitFailed = false;
+
+                if (!budgetLeft()) {
+                    emit({ type: "log", message: "[Google] Job budget used up. Stopping search." });
+                    break cityLoop;
+                }
 
                 // ── PASS 1: Email scrape pass ──────────────────────────────────
                 if (doEmails) {
                     const emailQuery = buildEmailQuery(niche, city, "", site);
+                    queriesIssued++;
                     emit({ type: "search-query", query: emailQuery, message: `[Google/Email] ${emailQuery}` });
 
                     const fingerprintFile = stateFile.replace(".json", "-fingerprint.json");
@@ -221,6 +238,7 @@ async function main() {
                         await new Promise(r => setTimeout(r, 1500 + Math.random() * 2000));
                     } catch (err) {
                         emit({ type: "log", message: `[Google/Email] Error: ${err.message}` });
+                        unitFailed = true;
                         consecutiveErrors++;
                         if (consecutiveErrors >= 2 || err.message.toLowerCase().includes("captcha")) {
                             emit({ type: "log", message: "[Google] Critically failed. Aborting. Fallback to DuckDuckGo expected." });
@@ -230,8 +248,12 @@ async function main() {
                 }
 
                 // ── PASS 2: Phone scrape pass ──────────────────────────────────
-                if (doPhones) {
+                if (doPhones && doEmails && !budgetLeft()) {
+                    // The unit stays unrecorded, so a later run repeats it in full
+                    unitFailed = true;
+                } else if (doPhones) {
                     const phoneQuery = buildPhoneQuery(niche, city, "", site, country);
+                    queriesIssued++;
                     emit({ type: "search-query", query: phoneQuery, message: `[Google/Phone] ${phoneQuery}` });
 
                     const fingerprintFile = stateFile.replace(".json", "-fingerprint.json");
@@ -284,6 +306,7 @@ async function main() {
                         await new Promise(r => setTimeout(r, 1500 + Math.random() * 2000));
                     } catch (err) {
                         emit({ type: "log", message: `[Google/Phone] Error: ${err.message}` });
+                        unitFailed = true;
                         consecutiveErrors++;
                         if (consecutiveErrors >= 2 || err.message.toLowerCase().includes("captcha")) {
                             emit({ type: "log", message: "[Google] Critically failed. Aborting. Fallback to DuckDuckGo expected." });
@@ -291,6 +314,10 @@ async function main() {
                         }
                     }
                 }
+
+                if (!unitFailed) {
+                    fs.appendFileSync(completedUnitsFile, JSON.stringify({ city, niche, site, scrapeMode }) + "\n", "utf-8");
+                }
             }
         }
     }
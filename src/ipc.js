@@ -0,0 +1,57 @@
+/**
+ * Length-prefixed JSON frames exchanged with the Python scraper on a dedicated fd.
+ * Each frame is a 4-byte big-endian payload length followed by UTF-8 JSON
+ * (mirrors src/ipc.py). Output on stdout never reaches this channel.
+ */
+
+// The extra stdio slot handed to the child; it sees the fd number in SCRAPER_IPC_FD
+export const IPC_FD = 3;
+const HEADER_BYTES = 4;
+const MAX_FRAME_BYTES = 16 * 1024 * 1024;
+
+export function encodeFrame(message) {
+  const payload = Buffer.from(JSON.stringify(message), "utf8");
+  const header = Buffer.allocUnsafe(HEADER_BYTES);
+  header.writeUInt32BE(payload.length, 0);
+  return Buffer.concat([header, payload], HEADER_BYTES + payload.length);
+}
+
+/**
+ * Returns a chunk handler that calls onMessage(message) for every complete frame.
+ * Partial frames are kept until the rest arrives; only whole frames are parsed.
+ * onError(error) gets oversized frames (fatal: the stream is out of sync) and bad JSON.
+ */
+export function createFrameReader(onMessage, onError = () => { }) {
+  let pending = Buffer.alloc(0);
+  let broken = false;
+
+  return (chunk) => {
+    if (broken) return;
+    pending = pending.length ? Buffer.concat([pending, chunk]) : chunk;
+    let offset = 0;
+
+    while (pending.length - offset >= HEADER_BYTES) {
+      const size = pending.readUInt32BE(offset);
+      if (size > MAX_FRAME_BYTES) {
+        broken = true;
+        onError(new Error(`Frame of ${size} bytes exceeds the ${MAX_FRAME_BYTES} byte limit`));
+        return;
+      }
+      const end = offset + HEADER_BYTES + size;
+      if (pending.length < end) break;
+
+      const body = pending.toString("utf8", offset + HEADER_BYTES, end);
+      offset = end;
+      let message;
+      try {
+        message = JSON.parse(body);
+      } catch (error) {
+        onError(error);
+        continue;
+      }
+      onMessage(message);
+    }
+
+    pending = offset ? pending.subarray(offset) : pending;
+  };
+}
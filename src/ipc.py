@@ -0,0 +1,107 @@
+import json
+import os
+import struct
+import threading
+
+# --- CONFIGURATION ---
+# Node passes the descriptor of a dedicated socket here; without it events go to stdout as JSON lines
+FD_ENV = "SCRAPER_IPC_FD"
+# Every frame is a 4-byte big-endian payload length followed by that many bytes of UTF-8 JSON
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+READ_BYTES = 64 * 1024
+
+
+def encode_frame(message):
+    payload = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(payload)) + payload
+
+
+class FrameDecoder:
+    """Splits a byte stream back into messages; partial frames wait for the next chunk."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """Adds received bytes; returns the messages completed by them."""
+        self._buffer += data
+        messages = []
+        offset = 0
+        while len(self._buffer) - offset >= HEADER.size:
+            (size,) = HEADER.unpack_from(self._buffer, offset)
+            if size > MAX_FRAME_BYTES:
+                raise ValueError(f"Frame of {size} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+            end = offset + HEADER.size + size
+            if len(self._buffer) < end:
+                break
+            messages.append(json.loads(self._buffer[offset + HEADER.size:end].decode("utf-8")))
+            offset = end
+        del self._buffer[:offset]
+        return messages
+
+
+class Channel:
+    """Length-prefixed JSON frames in both directions over one descriptor.
+
+    Events go to Node with `send`; control messages from Node (pause,
+    resume, cancel, rate) are read on a daemon thread and passed to the
+    handler given to `listen`. Nothing printed to stdout can end up inside
+    a frame, so stray output never corrupts an event.
+    """
+
+    def __init__(self, fd):
+        self.fd = fd
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+
+    @classmethod
+    def from_env(cls):
+        """The channel Node opened for this process, or None in text mode."""
+        fd = os.environ.get(FD_ENV)
+        if not fd:
+            return None
+        try:
+            fd = int(fd)
+            os.fstat(fd)
+        except (ValueError, OSError):
+            return None
+        return cls(fd)
+
+    def send(self, message):
+        """Writes one frame; returns False once the channel is gone."""
+        if self._closed:
+            return False
+        view = memoryview(encode_frame(message))
+        with self._lock:
+            try:
+                while view:
+                    view = view[os.write(self.fd, view):]
+            except OSError:
+                self._closed = True
+                return False
+        return True
+
+    def listen(self, handler):
+        """Starts passing every control message to `handler(message)`."""
+        self._thread = threading.Thread(target=self._read, args=(handler,), name="ipc", daemon=True)
+        self._thread.start()
+        return self
+
+    def _read(self, handler):
+        decoder = FrameDecoder()
+        while True:
+            try:
+                data = os.read(self.fd, READ_BYTES)
+            except OSError:
+                return
+            if not data:
+                return  # Node closed its end
+            try:
+                messages = decoder.feed(data)
+            except ValueError:
+                return
+            for message in messages:
+                if isinstance(message, dict):
+                    handler(message)
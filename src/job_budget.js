@@ -0,0 +1,42 @@
+/**
+ * Time and query budget of a whole job, fixed when the Node job starts.
+ * Every phase (Maps, Google, the DuckDuckGo fallback) draws from it: child
+ * processes get the absolute deadline and the queries still left, so time
+ * and queries spent by earlier phases count. src/job_budget.py enforces the
+ * DuckDuckGo part.
+ */
+export class JobBudget {
+  constructor({ maxDurationSec = null, maxQueries = null, startedAt = Date.now() } = {}) {
+    this.deadline = Number(maxDurationSec) > 0 ? startedAt + Number(maxDurationSec) * 1000 : null;
+    this.maxQueries = Number(maxQueries) > 0 ? Math.floor(Number(maxQueries)) : null;
+    this.queriesUsed = 0;
+  }
+
+  get active() {
+    return this.deadline !== null || this.maxQueries !== null;
+  }
+
+  queriesLeft() {
+    return this.maxQueries === null ? Infinity : Math.max(0, this.maxQueries - this.queriesUsed);
+  }
+
+  timeLeftMs() {
+    return this.deadline === null ? Infinity : this.deadline - Date.now();
+  }
+
+  exhausted() {
+    return this.queriesLeft() <= 0 || this.timeLeftMs() <= 0;
+  }
+
+  recordQuery() {
+    this.queriesUsed++;
+  }
+
+  // Config keys for a child phase: the shared deadline (Unix seconds) and the queries left
+  toPayload() {
+    return {
+      deadline: this.deadline === null ? null : this.deadline / 1000,
+      maxQueries: this.maxQueries === null ? null : this.queriesLeft()
+    };
+  }
+}
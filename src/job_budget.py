@@ -0,0 +1,207 @@
+import json
+import math
+import os
+import time
+from pathlib import Path
+
+# --- CONFIGURATION ---
+BUDGET_FILE = "job_budget.json"
+# Per-query costs assumed until the job has measured its own (prior weight in queries)
+DEFAULT_OVERHEAD_SEC = 12.0  # page load, settle and result wait
+DEFAULT_PASS_SEC = 6.0  # one harvest plus the scroll wait
+PRIOR_QUERIES = 2
+HUMAN_DELAY_SEC = 5.0  # mean of the random 3-7s pause between queries
+# Scroll passes every planned query is guaranteed before cities get sampled
+MIN_PASSES = 2
+
+
+def sample_cities(units, count):
+    """Keeps `count` units from evenly spaced cities, in their original order."""
+    cities = list(dict.fromkeys(unit[0] for unit in units))
+    if count <= 0 or not cities:
+        return []
+    per_city = len(units) / len(cities)
+    keep = max(1, min(len(cities), math.ceil(count / per_city)))
+    chosen = {cities[i * len(cities) // keep] for i in range(keep)}
+    return [unit for unit in units if unit[0] in chosen][:count]
+
+
+class JobBudget:
+    """Fits a crawl into `max_duration` seconds (or up to a `deadline`) and/or `max_queries` queries.
+
+    Before the crawl, `plan` keeps the units that fit at `MIN_PASSES` scroll
+    passes each (sampling cities when not all do). Before every query,
+    `passes_for_query` spreads the time left over the units left as a
+    scroll-depth cap. Per-query overhead and seconds per pass are measured as
+    the job runs. Time spent and queries issued are kept in `job_budget.json`,
+    so a resumed job continues the same budget. A `deadline` (Unix time) set
+    by the Node job, which also spends the budget in its other phases, takes
+    the place of `max_duration` and the time spent before.
+    """
+
+    def __init__(self, max_duration=None, max_queries=None, concurrency=1, queries_per_minute=None, state_path=None,
+                 deadline=None):
+        self.max_duration = float(max_duration) if max_duration else None
+        self.max_queries = int(max_queries) if max_queries else None
+        self.concurrency = max(1, int(concurrency or 1))
+        # Host-wide pacing puts a floor under the time each query takes, however many run at once
+        self.min_query_sec = 60.0 / float(queries_per_minute) if queries_per_minute else 0.0
+        self.state_path = Path(state_path) if state_path else None
+        self.spent_before = 0.0
+        self.queries_before = 0
+        if self.state_path and self.state_path.exists():
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                self.spent_before = float(state.get("spentSec") or 0)
+                self.queries_before = int(state.get("queries") or 0)
+            except (OSError, ValueError, TypeError):
+                pass
+        self.started = time.time()
+        self.deadline = None
+        if deadline:
+            self.deadline = float(deadline)
+            self.max_duration = max(0.0, self.deadline - self.started)
+        elif self.max_duration is not None:
+            self.deadline = self.started + self.max_duration - self.spent_before
+        self.planned = 0
+        self.issued = 0
+        self.done = 0
+        self.measured = [0, 0.0, 0, 0.0]  # queries, overhead seconds, passes, pass seconds
+
+    @classmethod
+    def from_config(cls, config, output_dir, concurrency=1, governor=None):
+        """Returns None unless `deadline`, `maxDurationSec` or `maxQueries` is set."""
+        if not config.get("deadline") and not config.get("maxDurationSec") and not config.get("maxQueries"):
+            return None
+        return cls(
+            max_duration=config.get("maxDurationSec"),
+            max_queries=config.get("maxQueries"),
+            concurrency=concurrency,
+            queries_per_minute=governor.rate * 60 if governor else None,
+            state_path=Path(output_dir) / BUDGET_FILE,
+            deadline=config.get("deadline"),
+        )
+
+    @property
+    def overhead_sec(self):
+        queries, seconds = self.measured[0], self.measured[1]
+        return (seconds + PRIOR_QUERIES * DEFAULT_OVERHEAD_SEC) / (queries + PRIOR_QUERIES)
+
+    @property
+    def pass_sec(self):
+        passes, seconds = self.measured[2], self.measured[3]
+        return (seconds + PRIOR_QUERIES * DEFAULT_PASS_SEC) / (passes + PRIOR_QUERIES)
+
+    def unit_seconds(self, passes):
+        """Wall-clock seconds one more unit adds to the job at `passes` scroll passes."""
+        per_query = self.overhead_sec + passes * self.pass_sec + HUMAN_DELAY_SEC
+        return max(per_query / self.concurrency, self.min_query_sec)
+
+    def time_left(self):
+        if self.deadline is None:
+            return math.inf
+        return self.deadline - time.time()
+
+    def queries_left(self):
+        if self.max_queries is None:
+            return math.inf
+        return self.max_queries - self.queries_before - self.issued
+
+    def exhausted(self):
+        """True when another query would not fit in the budget."""
+        return self.queries_left() <= 0 or self.out_of_time()
+
+    def out_of_time(self):
+        """True when a query would no longer fit in the time left.
+
+        Checked again once a unit's rate-governor wait is over: the unit was
+        handed out before the wait, so its query is already counted.
+        """
+        return self.time_left() < self.unit_seconds(1)
+
+    def unit_dropped(self):
+        """Gives back a handed-out unit whose query never ran."""
+        self.issued -= 1
+
+    def plan(self, units, sample=True):
+        """Returns (units to crawl, projection) for the units still to crawl.
+
+        When not every unit fits, evenly spaced cities are kept (`sample`),
+        or else the head of the list, for units already ranked best first.
+        """
+        total = len(units)
+        total_cities = len({unit[0] for unit in units})
+        fits = min(total, self.queries_left())
+        if self.max_duration is not None:
+            fits = min(fits, math.floor(self.time_left() / self.unit_seconds(MIN_PASSES)))
+        fits = max(0, int(fits))
+        if fits < total:
+            units = sample_cities(units, fits) if sample else units[:fits]
+        self.planned = len(units)
+        passes = self._passes(self.planned)
+        projection = {
+            "plannedUnits": self.planned,
+            "totalUnits": total,
+            "plannedCities": len({unit[0] for unit in units}),
+            "totalCities": total_cities,
+            "coverage": round(self.planned / total, 4) if total else 1.0,
+            "passesPerQuery": passes,
+            "projectedSec": round(self.planned * self.unit_seconds(passes or MIN_PASSES)),
+        }
+        return units, projection
+
+    def _passes(self, remaining):
+        """Scroll passes per query that spread the time left over `remaining` units; None = no cap."""
+        if self.max_duration is None or remaining <= 0:
+            return None
+        per_unit = self.time_left() / remaining
+        if per_unit <= self.min_query_sec:
+            return 1
+        per_query = per_unit * self.concurrency - self.overhead_sec - HUMAN_DELAY_SEC
+        return max(1, math.floor(per_query / self.pass_sec))
+
+    def passes_for_query(self):
+        """Depth cap for the query about to start (it is already counted as issued)."""
+        return self._passes(self.planned - self.issued + 1)
+
+    def iter_units(self, units):
+        """Yields planned units while the budget lasts."""
+        for unit in units:
+            if self.exhausted():
+                return
+            self.issued += 1
+            yield unit
+
+    def record_query(self, seconds, passes, pass_seconds):
+        """Feeds one finished query's timings into the cost model."""
+        self.measured[0] += 1
+        self.measured[1] += max(0.0, seconds - pass_seconds)
+        self.measured[2] += passes
+        self.measured[3] += pass_seconds
+
+    def unit_done(self):
+        """Counts a finished unit, saves the budget state and returns the live ETA."""
+        self.done += 1
+        self.save()
+        remaining = max(0, self.planned - self.done)
+        eta = remaining * self.unit_seconds(self._passes(remaining) or MIN_PASSES)
+        return {
+            "etaSec": round(min(eta, max(0.0, self.time_left()))),
+            "completedUnits": self.done,
+            "plannedUnits": self.planned,
+            "remainingSec": None if self.max_duration is None else round(max(0.0, self.time_left())),
+        }
+
+    def save(self):
+        if not self.state_path:
+            return
+        data = {
+            "spentSec": round(self.spent_before + time.time() - self.started, 1),
+            "queries": self.queries_before + self.done,
+            "timestamp": time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.state_path)
@@ -0,0 +1,143 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+STREAM_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def _parse_item(line, key):
+    """Turns one list line into a string: plain text, a JSON string, or {"<key>": ...}."""
+    line = line.strip()
+    if not line:
+        return None
+    if line[0] in "{\"":
+        try:
+            value = json.loads(line)
+        except ValueError:
+            return line
+        if isinstance(value, dict):
+            value = value.get(key) or value.get("name")
+        return str(value).strip() if value else None
+    return line
+
+
+class FileList:
+    """Re-iterable list backed by a text/NDJSON file, read lazily on every pass."""
+
+    def __init__(self, path, key, skip_lines=0):
+        self.path = Path(path)
+        self.key = key
+        self.skip_lines = skip_lines
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                if line_no < self.skip_lines:
+                    continue
+                item = _parse_item(line, self.key)
+                if item:
+                    yield item
+
+
+class StreamList:
+    """One-shot list read from a stream (stdin); can only be iterated once."""
+
+    def __init__(self, stream, key):
+        self.stream = stream
+        self.key = key
+        self._consumed = False
+
+    def __iter__(self):
+        if self._consumed:
+            raise RuntimeError(f"Streamed {self.key} list can only be iterated once")
+        self._consumed = True
+        for line in self.stream:
+            item = _parse_item(line, self.key)
+            if item:
+                yield item
+
+
+class Reiterable:
+    """Wraps a generator function so every `for` loop gets a fresh generator."""
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __iter__(self):
+        return iter(self.factory())
+
+
+def _read_stream_config(stream):
+    """Reads either a whole JSON document or an NDJSON header + one city per line."""
+    first = stream.readline()
+    try:
+        header = json.loads(first)
+    except ValueError:
+        return json.loads(first + stream.read()), False
+    if isinstance(header, dict) and "cities" not in header:
+        return header, True
+    return header, False
+
+
+def _resolve_list_files(config, base_dir):
+    for key, file_key, item_key in (("cities", "citiesFile", "city"), ("niches", "nichesFile", "niche")):
+        list_path = config.get(file_key)
+        if list_path:
+            list_path = Path(list_path)
+            if not list_path.is_absolute():
+                list_path = base_dir / list_path
+            config[key] = FileList(list_path, item_key)
+    return config
+
+
+def load_config(config_arg=None, config_file=None, stdin=None):
+    """Loads a job config from a JSON string, a file, or stdin.
+
+    Config files and stdin may be NDJSON: the first line is the job config
+    (without `cities`) and every following line is one city. Files can also
+    point at `citiesFile`/`nichesFile` lists. Either way, those lists are read
+    lazily instead of being materialized up front.
+    """
+    stdin = stdin or sys.stdin
+    if config_arg:
+        return _resolve_list_files(json.loads(config_arg), Path.cwd())
+
+    if config_file and config_file != "-":
+        path = Path(config_file)
+        with open(path, "r", encoding="utf-8") as f:
+            if path.suffix in STREAM_SUFFIXES:
+                config, streamed = _read_stream_config(f)
+            else:
+                config, streamed = json.load(f), False
+        if streamed:
+            config["cities"] = FileList(path, "city", skip_lines=1)
+        return _resolve_list_files(config, path.parent)
+
+    config, streamed = _read_stream_config(stdin)
+    if streamed:
+        config["cities"] = StreamList(stdin, "city")
+    return _resolve_list_files(config, Path.cwd())
+
+
+def build_arg_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("config", nargs="?", help="Job config as a JSON string (legacy)")
+    parser.add_argument("--config", dest="config_file", help="Read the job config from a JSON/NDJSON file, or '-' for stdin")
+    parser.add_argument("--shard", help="Only crawl shard i of n (e.g. 0/4); outputs go to outputDir/shard_i_of_n")
+    return parser
+
+
+def parse_job_args(argv, description=None, parser=None):
+    """Parses scraper CLI args and returns (config, args).
+
+    Pass `parser` (from `build_arg_parser`) to add scraper-specific options.
+    """
+    parser = parser or build_arg_parser(description)
+    args = parser.parse_args(argv)
+    if not args.config and not args.config_file and sys.stdin.isatty():
+        parser.error("pass the job config as JSON, --config <path>, or pipe it on stdin")
+    config = load_config(args.config, args.config_file)
+    if args.shard:
+        config["shard"] = args.shard
+    return config, args
@@ -0,0 +1,293 @@
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from output_segments import iter_lines, text_bytes
+from phone_engine import COUNTRY_PHONE_CONFIG, to_e164
+
+# --- CONFIGURATION ---
+DEFAULT_MEMORY_MB = 256
+MIN_PARTITIONS = 16
+MAX_PARTITIONS = 4096
+# Rough in-memory cost of one deduped value (str + dict slot), used to size partitions
+BYTES_PER_VALUE = 160
+# Each value's provenance mask is an int with one bit per source; CPython adds 4 bytes per 30 bits
+MASK_BYTES_PER_30_SOURCES = 4
+# Descriptors left free for inputs, the output and the interpreter while spill files are open
+RESERVED_FDS = 64
+
+EMAIL_RE = re.compile(r'^[a-z0-9._%+-]+@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}$')
+
+
+def normalize_email(value):
+    """Lowercases and trims an email; returns None when it is not a plausible address."""
+    value = value.strip().strip(".,;:<>()[]\"'").lower()
+    if value.startswith("mailto:"):
+        value = value[7:]
+    return value if EMAIL_RE.match(value) else None
+
+
+# "{Country}_phones.txt" file prefix -> country name, for E.164 normalization
+PHONE_FILE_COUNTRIES = {re.sub(r'[^a-zA-Z0-9]', '_', name): name for name in COUNTRY_PHONE_CONFIG}
+
+
+def phone_file_country(name):
+    prefix = name.split(".")[0]
+    if prefix.endswith("_phones"):
+        return PHONE_FILE_COUNTRIES.get(prefix[:-len("_phones")])
+    return None
+
+
+def normalize_phone(value, country=None):
+    """Normalizes to E.164 when the country is known, else keeps digits and a leading '+'."""
+    value = value.strip()
+    if country or value.startswith("+"):
+        e164 = to_e164(value, country)
+        if e164 and e164.startswith("+"):
+            return e164
+    digits = re.sub(r'\D', '', value)
+    if not 7 <= len(digits) <= 15:
+        return None
+    return ("+" if value.startswith("+") else "") + digits
+
+
+def normalize_unfiled_phone(value, countries):
+    """Normalizes a number from a list without a country, like a legacy all_phones.txt.
+
+    A national number gets the calling code of the only one of `countries`
+    (the job's) it fits; numbers that fit none or several keep bare digits.
+    """
+    if not value.strip().startswith("+"):
+        fits = {to_e164(value, country) for country in countries} - {None}
+        if len(fits) == 1:
+            return fits.pop()
+    return normalize_phone(value)
+
+
+KINDS = {
+    "emails": {"normalize": normalize_email, "output": "all_emails.txt"},
+    "phones": {"normalize": normalize_phone, "output": "all_phones.txt"},
+}
+
+
+def classify(name):
+    """Maps an output file name to the contact kind it holds, or None."""
+    if name.endswith(".manifest.json"):
+        name = name[:-len(".manifest.json")]
+    if name.endswith("emails.txt"):
+        return "emails"
+    if name.endswith("phones.txt"):
+        return "phones"
+    return None
+
+
+def iter_job_files(job_dir):
+    """Yields (kind, path) for every email/phone list in a job output directory."""
+    seen = set()
+    for path in sorted(Path(job_dir).rglob("*")):
+        if not path.is_file():
+            continue
+        kind = classify(path.name)
+        if not kind:
+            continue
+        if path.name.endswith(".manifest.json"):
+            path = path.with_name(path.name[:-len(".manifest.json")])
+        if path in seen:
+            continue
+        seen.add(path)
+        yield kind, path
+
+
+def job_phone_countries(job_dir):
+    """Countries of the "{Country}_phones.txt" lists in a job directory."""
+    countries = []
+    for kind, path in iter_job_files(job_dir):
+        country = phone_file_country(path.name) if kind == "phones" else None
+        if country and country not in countries:
+            countries.append(country)
+    return countries
+
+
+def bytes_per_value(sources):
+    return BYTES_PER_VALUE + MASK_BYTES_PER_30_SOURCES * -(-max(1, sources) // 30)
+
+
+def choose_partitions(total_bytes, memory_mb, sources=1):
+    budget_values = max(1, memory_mb * 1024 * 1024 // bytes_per_value(sources))
+    # Assume ~24 bytes per input line; each partition must fit the budget
+    estimated_values = total_bytes // 24 + 1
+    needed = -(-estimated_values // budget_values)
+    return max(MIN_PARTITIONS, min(MAX_PARTITIONS, needed * 2))
+
+
+def max_open_partitions():
+    """How many spill files may be open at once under the soft RLIMIT_NOFILE."""
+    if resource is None:
+        return MAX_PARTITIONS
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return MAX_PARTITIONS
+    return max(1, min(MAX_PARTITIONS, soft - RESERVED_FDS))
+
+
+def _partition_of(value, count):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "big") % count
+
+
+class ContactMerger:
+    """Streams job directories into spill files, then dedups one partition at a time.
+
+    Memory use is bounded by the largest partition rather than the input size:
+    pass one hashes every normalized value into one of N spill files on disk,
+    pass two loads each spill file alone, dedups it, and appends to the output.
+    """
+
+    def __init__(self, job_dirs, out_dir, memory_mb=DEFAULT_MEMORY_MB, partitions=None, tmp_dir=None,
+                 default_country=None):
+        self.job_dirs = [Path(d) for d in job_dirs]
+        self.out_dir = Path(out_dir)
+        self.memory_mb = memory_mb
+        self.partitions = partitions
+        self.tmp_dir = tmp_dir
+        self.default_country = default_country
+        self.sources = [{"dir": str(d), "emails": {"read": 0, "invalid": 0, "distinct": 0, "unique": 0},
+                         "phones": {"read": 0, "invalid": 0, "distinct": 0, "unique": 0}}
+                        for d in self.job_dirs]
+
+    def _spill(self, work_dir, count):
+        # One kind at a time, so at most `count` spill files are open
+        for kind in KINDS:
+            self._spill_kind(work_dir, count, kind)
+
+    def _spill_kind(self, work_dir, count, kind):
+        handles = []
+        try:
+            for i in range(count):
+                handles.append(open(work_dir / f"{kind}.{i:04d}", "w", encoding="utf-8"))
+
+            for src_idx, job_dir in enumerate(self.job_dirs):
+                job_countries = None
+                for file_kind, path in iter_job_files(job_dir):
+                    if file_kind != kind:
+                        continue
+                    normalize = KINDS[kind]["normalize"]
+                    if kind == "phones":
+                        country = phone_file_country(path.name)
+                        if country:
+                            normalize = lambda line, country=country: normalize_phone(line, country)
+                        else:
+                            if job_countries is None:
+                                job_countries = job_phone_countries(job_dir) or (
+                                    [self.default_country] if self.default_country else []
+                                )
+                            normalize = lambda line, countries=job_countries: normalize_unfiled_phone(line, countries)
+                    stats = self.sources[src_idx][kind]
+                    for line in iter_lines(path):
+                        if not line.strip():
+                            continue
+                        stats["read"] += 1
+                        value = normalize(line)
+                        if not value:
+                            stats["invalid"] += 1
+                            continue
+                        handles[_partition_of(value, count)].write(f"{value}\t{src_idx}\n")
+        finally:
+            for handle in handles:
+                handle.close()
+
+    def _reduce(self, work_dir, count):
+        totals = {}
+        for kind, spec in KINDS.items():
+            written = 0
+            with open(self.out_dir / spec["output"], "w", encoding="utf-8") as out:
+                for i in range(count):
+                    part_file = work_dir / f"{kind}.{i:04d}"
+                    owners = {}
+                    with open(part_file, "r", encoding="utf-8") as f:
+                        for line in f:
+                            value, _, src = line.rstrip("\n").rpartition("\t")
+                            owners[value] = owners.get(value, 0) | (1 << int(src))
+                    part_file.unlink()
+
+                    for value in sorted(owners):
+                        mask = owners[value]
+                        out.write(value + "\n")
+                        written += 1
+                        single = mask & (mask - 1) == 0
+                        src_idx = 0
+                        while mask:
+                            if mask & 1:
+                                stats = self.sources[src_idx][kind]
+                                stats["distinct"] += 1
+                                if single:
+                                    stats["unique"] += 1
+                            mask >>= 1
+                            src_idx += 1
+            totals[kind] = written
+        return totals
+
+    def run(self):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        total_bytes = 0
+        for job_dir in self.job_dirs:
+            for _, path in iter_job_files(job_dir):
+                total_bytes += text_bytes(path)
+        count = min(
+            self.partitions or choose_partitions(total_bytes, self.memory_mb, len(self.job_dirs)),
+            max_open_partitions(),
+        )
+
+        started = time.time()
+        work_dir = Path(tempfile.mkdtemp(prefix="merge_contacts_", dir=self.tmp_dir))
+        try:
+            self._spill(work_dir, count)
+            totals = self._reduce(work_dir, count)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        report = {
+            "createdAt": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "seconds": round(time.time() - started, 2),
+            "partitions": count,
+            "inputBytes": total_bytes,
+            "totals": totals,
+            "sources": self.sources,
+        }
+        with open(self.out_dir / "merge_provenance.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge and dedup emails/phones across job output directories")
+    parser.add_argument("job_dirs", nargs="+", help="Job output directories to merge")
+    parser.add_argument("--out", required=True, help="Directory for all_emails.txt, all_phones.txt and merge_provenance.json")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_MB, help="Approximate memory budget for the dedup pass")
+    parser.add_argument("--partitions", type=int, help="Override the number of spill partitions")
+    parser.add_argument("--tmp-dir", help="Where to put spill files (defaults to the system temp dir)")
+    parser.add_argument("--country", help="Country of national numbers in all_phones.txt of jobs without per-country phone lists")
+    args = parser.parse_args()
+
+    report = ContactMerger(
+        args.job_dirs, args.out, args.memory_mb, args.partitions, args.tmp_dir, args.country
+    ).run()
+    print(json.dumps({
+        "type": "merge-complete",
+        "totals": report["totals"],
+        "partitions": report["partitions"],
+        "message": f"Merged {len(args.job_dirs)} job dirs: {report['totals']['emails']} emails, {report['totals']['phones']} phones"
+    }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# --- CONFIGURATION ---
+METRICS_FILE = "metrics.prom"
+DEFAULT_FILE_INTERVAL_SEC = 15
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# name -> (type, help)
+METRICS = {
+    "scraper_queries_total": ("counter", "Search queries issued."),
+    "scraper_results_harvested_total": ("counter", "Search results harvested from result pages."),
+    "scraper_results_skipped_total": ("counter", "Results dropped by the in-page prefilter."),
+    "scraper_contacts_new_total": ("counter", "New (deduped) contacts saved, by kind."),
+    "scraper_driver_restarts_total": ("counter", "Browser restarts after a lost or broken session."),
+    "scraper_block_events_total": ("counter", "Result pages that looked like a block or captcha."),
+    "scraper_scroll_passes_total": ("counter", "Scroll passes over result pages."),
+    "scraper_write_latency_seconds": ("histogram", "Time to dedup, write and report one result."),
+    "scraper_last_progress_timestamp_seconds": ("gauge", "Unix time of the last saved result; alert when it stalls."),
+    "scraper_driver_start_seconds": ("gauge", "Duration of the latest browser start."),
+    "scraper_near_duplicates_total": ("counter", "Leads filed under an earlier lead's near-duplicate cluster."),
+    "scraper_leads_enriched_total": ("counter", "Leads whose result page yielded contacts missing from the snippet."),
+    "scraper_job_eta_seconds": ("gauge", "Estimated seconds left in a budgeted job."),
+}
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Metrics:
+    """Counters, gauges and histograms for one scraper process, rendered as Prometheus text.
+
+    `labels` (e.g. worker and scraper) are added to every sample. Exposed on a
+    local HTTP port and/or rewritten periodically to a file, both optional.
+    """
+
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self._values = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._file = None
+        self._file_stop = threading.Event()
+        self._file_thread = None
+
+    def _key(self, name, labels):
+        return name, tuple(sorted({**self.labels, **labels}.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(LATENCY_BUCKETS), 0, 0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[0][i] += 1
+            hist[1] += 1
+            hist[2] += value
+
+    def render(self):
+        lines = []
+        with self._lock:
+            values = dict(self._values)
+            histograms = {k: (list(v[0]), v[1], v[2]) for k, v in self._histograms.items()}
+        for name, (kind, help_text) in METRICS.items():
+            samples = [(dict(k[1]), v) for k, v in values.items() if k[0] == name]
+            hists = [(dict(k[1]), v) for k, v in histograms.items() if k[0] == name]
+            if not samples and not hists:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for labels, (buckets, count, total) in hists:
+                for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f"{name}_bucket{_label_text({**labels, 'le': bound})} {bucket_count}")
+                lines.append(f"{name}_bucket{_label_text({**labels, 'le': '+Inf'})} {count}")
+                lines.append(f"{name}_count{_label_text(labels)} {count}")
+                lines.append(f"{name}_sum{_label_text(labels)} {total:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serves /metrics on a local port from a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # stdout belongs to the JSON event stream
+
+        self._server = ThreadingHTTPServer((host, int(port)), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server.server_address[1]
+
+    def write_file(self):
+        if not self._file:
+            return
+        tmp = self._file.with_name(self._file.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, self._file)
+
+    def write_periodically(self, path, interval=DEFAULT_FILE_INTERVAL_SEC):
+        """Rewrites `path` atomically every `interval` seconds (node_exporter textfile style)."""
+        self._file = Path(path)
+
+        def loop():
+            while not self._file_stop.wait(interval):
+                try:
+                    self.write_file()
+                except OSError:
+                    pass
+
+        self._file_thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+        self._file_thread.start()
+
+    def close(self):
+        self._file_stop.set()
+        if self._file:
+            try:
+                self.write_file()
+            except OSError:
+                pass
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def metrics_from_config(config, output_dir, labels):
+    """Builds a Metrics object and starts the exporters `metricsPort` / `metricsFile` ask for."""
+    metrics = Metrics(labels)
+    port = config.get("metricsPort")
+    if port:
+        metrics.serve(port)
+    metrics_file = config.get("metricsFile")
+    if metrics_file:
+        path = Path(output_dir) / METRICS_FILE if metrics_file is True else Path(metrics_file)
+        metrics.write_periodically(path, config.get("metricsInterval") or DEFAULT_FILE_INTERVAL_SEC)
+    return metrics
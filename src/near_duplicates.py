@@ -0,0 +1,171 @@
+import json
+import random
+import re
+import zlib
+from array import array
+from pathlib import Path
+
+# --- CONFIGURATION ---
+INDEX_FILE = "near_duplicates.idx"
+NUM_PERM = 64
+# 8 bands of 8 rows: leads whose shingle sets are ~75%+ alike share a band with high probability
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.7
+SHINGLE_WORDS = 2
+SEED = 1
+_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"\w+")
+
+
+class _BandTable:
+    """Open-addressing map from 32-bit band keys to cluster ids, held in two flat arrays.
+
+    Key 0 marks an empty slot. The table doubles at 3/4 load, so inserts
+    and lookups stay O(1) amortized at ~11 bytes per entry.
+    """
+
+    def __init__(self, capacity=1024):
+        self.keys = array('I', bytes(4 * capacity))
+        self.values = array('I', bytes(4 * capacity))
+        self.count = 0
+
+    def _slot(self, key):
+        keys = self.keys
+        mask = len(keys) - 1
+        i = (key * 2654435761) & mask
+        while keys[i] and keys[i] != key:
+            i = (i + 1) & mask
+        return i
+
+    def get(self, key):
+        i = self._slot(key)
+        return self.values[i] if self.keys[i] else None
+
+    def put(self, key, value):
+        """Maps `key` to `value` unless the key is already taken."""
+        i = self._slot(key)
+        if self.keys[i]:
+            return
+        self.keys[i] = key
+        self.values[i] = value
+        self.count += 1
+        if self.count * 4 > len(self.keys) * 3:
+            self._grow()
+
+    def _grow(self):
+        old_keys, old_values = self.keys, self.values
+        self.keys = array('I', bytes(8 * len(old_keys)))
+        self.values = array('I', bytes(8 * len(old_keys)))
+        for key, value in zip(old_keys, old_values):
+            if key:
+                i = self._slot(key)
+                self.keys[i] = key
+                self.values[i] = value
+
+
+class NearDuplicateIndex:
+    """Streaming near-duplicate detector over lead text (title + details).
+
+    Each lead gets a 64-value MinHash signature of its word shingles. The
+    signature's bands are looked up in per-band hash tables of cluster
+    representatives; a candidate joins that cluster when the estimated
+    Jaccard similarity reaches `threshold`, otherwise it starts a new
+    cluster. Only representatives are stored (their band keys plus one byte
+    per MinHash value), so memory grows with distinct leads, and the work
+    per lead does not depend on how many were seen before.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = float(threshold)
+        rng = random.Random(SEED)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+        self.tables = [_BandTable() for _ in range(BANDS)]
+        self.signatures = bytearray()  # NUM_PERM low bytes per cluster representative
+        self.leads = 0
+
+    @property
+    def clusters(self):
+        return len(self.signatures) // NUM_PERM
+
+    def signature(self, text):
+        """MinHash signature of `text`'s word shingles, or None for text without words."""
+        words = _WORD.findall(text.lower())
+        if not words:
+            return None
+        size = min(SHINGLE_WORDS, len(words))
+        shingles = {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+        return [min((a * x + b) % _PRIME for x in shingles) for a, b in self._perms]
+
+    def _band_keys(self, signature):
+        keys = []
+        for band in range(BANDS):
+            rows = signature[band * ROWS:(band + 1) * ROWS]
+            keys.append(zlib.crc32(repr(rows).encode("ascii"), band) or 1)
+        return keys
+
+    def _similarity(self, cluster, low_bytes):
+        start = cluster * NUM_PERM
+        stored = self.signatures[start:start + NUM_PERM]
+        matches = sum(1 for x, y in zip(stored, low_bytes) if x == y)
+        # One-byte MinHash values also match by chance 1 time in 256
+        return (matches / NUM_PERM - 1 / 256) / (1 - 1 / 256)
+
+    def add(self, signature):
+        """Files one lead's signature; returns (cluster id, True if it joined an existing cluster)."""
+        if signature is None:
+            return None, False
+        self.leads += 1
+        keys = self._band_keys(signature)
+        low_bytes = bytes(value & 0xFF for value in signature)
+        for table, key in zip(self.tables, keys):
+            cluster = table.get(key)
+            if cluster is not None and self._similarity(cluster, low_bytes) >= self.threshold:
+                return cluster, True
+        cluster = self.clusters
+        self.signatures += low_bytes
+        for table, key in zip(self.tables, keys):
+            table.put(key, cluster)
+        return cluster, False
+
+    def save(self, path):
+        """Writes the index so a resumed job keeps its cluster ids."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        header = {"perm": NUM_PERM, "bands": BANDS, "seed": SEED, "leads": self.leads,
+                  "tables": [[len(t.keys), t.count] for t in self.tables], "signatures": len(self.signatures)}
+        with open(tmp, "wb") as f:
+            f.write((json.dumps(header) + "\n").encode("ascii"))
+            f.write(self.signatures)
+            for table in self.tables:
+                table.keys.tofile(f)
+                table.values.tofile(f)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path, threshold=DEFAULT_THRESHOLD):
+        """Reads a saved index; starts empty when the file is missing or was built with other parameters."""
+        index = cls(threshold)
+        path = Path(path)
+        if not path.exists():
+            return index
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                if (header["perm"], header["bands"], header["seed"]) != (NUM_PERM, BANDS, SEED):
+                    return index
+                signatures = f.read(header["signatures"])
+                tables = []
+                for capacity, count in header["tables"]:
+                    table = _BandTable(1)
+                    table.keys, table.values = array('I'), array('I')
+                    table.keys.fromfile(f, capacity)
+                    table.values.fromfile(f, capacity)
+                    table.count = count
+                    tables.append(table)
+        except (OSError, ValueError, KeyError, EOFError):
+            return cls(threshold)
+        index.signatures = bytearray(signatures)
+        index.tables = tables
+        index.leads = header["leads"]
+        return index
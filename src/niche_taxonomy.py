@@ -0,0 +1,148 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+
+
+def _is_word(ch):
+    # Same character class as the regex \w
+    return ch.isalnum() or ch == "_"
+
+
+class NicheMatcher:
+    """Aho-Corasick automaton over lowercase taxonomy tokens.
+
+    One pass over a niche string reports every token it contains, so the cost
+    per niche depends on the niche length rather than the taxonomy size.
+    Tokens only match as whole words, like a `\b` regex: "art" is found in
+    "Art Teacher" but not in "Martial Arts".
+    """
+
+    def __init__(self, expansions):
+        self.tokens = []
+        self.expansions = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for token, matches in expansions.items():
+            token = token.strip().lower()
+            if not token:
+                continue
+            self._add(token, list(matches))
+        self._build_links()
+
+    def _add(self, token, matches):
+        state = 0
+        for ch in token:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if self._out[state] and self.tokens[self._out[state][0]] == token:
+            self.expansions[self._out[state][0]].extend(matches)
+            return
+        self._out[state].append(len(self.tokens))
+        self.tokens.append(token)
+        self.expansions.append(matches)
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = candidate if candidate != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """Returns the ids of every token occurring in `text` as a whole word, in first-seen order."""
+        found = []
+        seen = set()
+        state = 0
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for token_id in out[state]:
+                if token_id not in seen and self._on_boundaries(text, token_id, end):
+                    seen.add(token_id)
+                    found.append(token_id)
+        return found
+
+    def _on_boundaries(self, text, token_id, end):
+        token = self.tokens[token_id]
+        start = end - len(token)
+        if _is_word(token[0]) and start > 0 and _is_word(text[start - 1]):
+            return False
+        if _is_word(token[-1]) and end < len(text) and _is_word(text[end]):
+            return False
+        return True
+
+    def expand(self, text):
+        """Yields the expansions of every token found in `text`."""
+        for token_id in self.find(text):
+            yield from self.expansions[token_id]
+
+
+def load_taxonomy(path):
+    """Reads a taxonomy file into a {token: [expansions]} dict.
+
+    Accepts either a JSON object mapping tokens to expansion lists, or a JSON
+    list of entries. data/categories.json is such a list: the saved categories
+    as {"id", "name", "userId", "createdAt"}; only `name` is used, and each
+    name becomes a token with no expansions of its own. Entries may also carry
+    `synonyms`/`related` lists, which are added as expansions of the name.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    taxonomy = {}
+    if isinstance(data, dict):
+        for token, matches in data.items():
+            if isinstance(matches, str):
+                matches = [matches]
+            taxonomy.setdefault(token, []).extend(matches or [])
+        return taxonomy
+
+    for entry in data:
+        if isinstance(entry, str):
+            taxonomy.setdefault(entry, [])
+            continue
+        name = (entry.get("name") or "").strip()
+        if not name:
+            continue
+        matches = list(entry.get("synonyms") or []) + list(entry.get("related") or [])
+        taxonomy.setdefault(name, []).extend(matches)
+        for synonym in entry.get("synonyms") or []:
+            taxonomy.setdefault(synonym, []).append(name)
+    return taxonomy
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(path, mtime, base_items):
+    expansions = {token: list(matches) for token, matches in base_items}
+    if path:
+        for token, matches in load_taxonomy(path).items():
+            expansions.setdefault(token, []).extend(matches)
+    return NicheMatcher(expansions)
+
+
+def get_matcher(base_dictionary, taxonomy_path=None):
+    """Returns a compiled matcher for the base dictionary plus an optional taxonomy file.
+
+    Matchers are cached per (file, mtime) so a process builds each automaton once.
+    """
+    mtime = os.path.getmtime(taxonomy_path) if taxonomy_path else None
+    base_items = tuple((token, tuple(matches)) for token, matches in base_dictionary.items())
+    return _cached_matcher(taxonomy_path, mtime, base_items)
@@ -0,0 +1,235 @@
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# --- CONFIGURATION ---
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+CODEC_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+# Raised when a segment ends early (its writer was killed or is still writing)
+TRUNCATED_ERRORS = (EOFError, zstandard.ZstdError) if zstandard else (EOFError,)
+
+
+def manifest_path(path):
+    """Returns the manifest location for a (possibly segmented) output file."""
+    path = Path(path)
+    return path.with_name(path.name + ".manifest.json")
+
+
+def resolve_codec(codec):
+    """Maps a config value to a usable codec name, or None for plain text."""
+    if not codec:
+        return None
+    codec = str(codec).lower()
+    if codec in ("zst", "zstd"):
+        return "zstd" if zstandard else "gzip"
+    if codec in ("gz", "gzip", "true", "1"):
+        return "gzip"
+    return None
+
+
+class PlainWriter:
+    """Appends to a single uncompressed text file through one open handle."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fh = None
+
+    @property
+    def name(self):
+        """The file name listed for the job (and reported in lead-saved events)."""
+        return self.path.name
+
+    def exists(self):
+        return self.path.exists()
+
+    def write(self, text):
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(text)
+
+    def flush(self):
+        if self._fh:
+            self._fh.flush()
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+
+class SegmentWriter:
+    """Writes text into size-capped compressed segments listed in a manifest.
+
+    `max_bytes` caps the uncompressed bytes per segment so rotation does not
+    depend on how well the codec compresses. Every open starts a fresh segment;
+    previously closed segments are never rewritten.
+    """
+
+    def __init__(self, path, codec="gzip", max_bytes=DEFAULT_SEGMENT_BYTES):
+        self.path = Path(path)
+        self.codec = resolve_codec(codec) or "gzip"
+        self.max_bytes = int(max_bytes or DEFAULT_SEGMENT_BYTES)
+        self.manifest_file = manifest_path(self.path)
+        self.manifest = self._load_manifest()
+        self._raw = None
+        self._fh = None
+        self._segment = None
+
+    def _load_manifest(self):
+        if self.manifest_file.exists():
+            try:
+                with open(self.manifest_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception:
+                pass
+        return {"source": self.path.name, "codec": self.codec, "maxBytes": self.max_bytes, "segments": []}
+
+    def _save_manifest(self):
+        tmp = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_file)
+
+    @property
+    def name(self):
+        """The manifest: the segments are only parts of one logical file, and the last may still be open."""
+        return self.manifest_file.name
+
+    def exists(self):
+        return bool(self.manifest["segments"]) or self.path.exists()
+
+    def _open_segment(self):
+        index = len(self.manifest["segments"])
+        name = f"{self.path.name}.{index:04d}{CODEC_SUFFIXES[self.codec]}"
+        self._raw = open(self.path.with_name(name), "ab")
+        if self.codec == "zstd":
+            self._fh = zstandard.ZstdCompressor(level=10).stream_writer(self._raw, closefd=False)
+        else:
+            self._fh = gzip.GzipFile(fileobj=self._raw, mode="ab", compresslevel=6)
+        self._segment = {"file": name, "codec": self.codec, "rawBytes": 0, "lines": 0}
+        self.manifest["segments"].append(self._segment)
+        self._save_manifest()
+
+    def _close_segment(self):
+        if self._fh is None:
+            return
+        self._fh.close()
+        self._raw.close()
+        self._segment["bytes"] = self.path.with_name(self._segment["file"]).stat().st_size
+        self._segment["closedAt"] = time.strftime('%Y-%m-%d %H:%M:%S')
+        self._fh = None
+        self._raw = None
+        self._segment = None
+        self._save_manifest()
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        if self._segment and self._segment["rawBytes"] + len(data) > self.max_bytes and self._segment["rawBytes"]:
+            self._close_segment()
+        if self._fh is None:
+            self._open_segment()
+        self._fh.write(data)
+        self._segment["rawBytes"] += len(data)
+        self._segment["lines"] += text.count("\n")
+
+    def flush(self):
+        if self._fh is None:
+            return
+        if self.codec == "zstd":
+            # Make what was written decodable without ending the frame; frames end on rotate/close
+            self._fh.flush(zstandard.FLUSH_BLOCK)
+        else:
+            self._fh.flush()
+        self._raw.flush()
+        self._save_manifest()
+
+    def close(self):
+        self._close_segment()
+
+
+def open_writer(path, codec=None, max_bytes=None):
+    """Returns a segment writer when `codec` is set, otherwise a plain appender."""
+    if resolve_codec(codec):
+        return SegmentWriter(path, codec, max_bytes)
+    return PlainWriter(path)
+
+
+def _open_segment_text(segment_path, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {segment_path.name}")
+        raw = open(segment_path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return gzip.open(segment_path, "rt", encoding="utf-8")
+
+
+def iter_lines(path):
+    """Streams lines from a plain output file followed by all of its segments."""
+    path = Path(path)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            yield from f
+
+    manifest_file = manifest_path(path)
+    if not manifest_file.exists():
+        return
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    for segment in manifest.get("segments", []):
+        segment_path = path.with_name(segment["file"])
+        if not segment_path.exists():
+            continue
+        try:
+            with _open_segment_text(segment_path, segment.get("codec", manifest.get("codec"))) as f:
+                yield from f
+        except TRUNCATED_ERRORS:
+            # Segment cut short by a killed process or still open; everything before the cut was yielded.
+            continue
+
+
+def text_bytes(path):
+    """Uncompressed size of a plain output file plus all of its segments."""
+    path = Path(path)
+    total = path.stat().st_size if path.exists() else 0
+    manifest_file = manifest_path(path)
+    if not manifest_file.exists():
+        return total
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return total
+    for segment in manifest.get("segments", []):
+        if segment.get("rawBytes"):
+            total += segment["rawBytes"]
+        else:
+            # Segment still open when its writer died: only the compressed size is known
+            segment_path = path.with_name(segment["file"])
+            total += segment_path.stat().st_size if segment_path.exists() else 0
+    return total
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python output_segments.py <output-file-or-manifest>", file=sys.stderr)
+        sys.exit(1)
+
+    target = sys.argv[1]
+    if target.endswith(".manifest.json"):
+        target = target[:-len(".manifest.json")]
+    for line in iter_lines(target):
+        sys.stdout.write(line)
+
+
+if __name__ == "__main__":
+    main()
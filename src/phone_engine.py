@@ -0,0 +1,415 @@
+import argparse
+import random
+import re
+import time
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+
+# Allows one optional separator between digits of a national number
+SEP_DIGIT = r'[\s.\-]?\d'
+
+
+def _mobile_regex(cc, trunk, lead, digits):
+    """Builds a pattern for `lead` + `digits` more digits, dialled with +cc, 00cc or the trunk prefix."""
+    intl = rf'\+{cc}[\s.\-]?|00{cc}[\s.\-]?'
+    prefix = rf'(?:{intl}|{trunk})' if trunk else rf'(?:{intl})?'
+    return rf'(?<![\d+]){prefix}{lead}(?:{SEP_DIGIT}){{{digits}}}(?!\d)'
+
+
+def _entry(cc, trunk, nsn, prefixes, lead, digits, regex=None, narrow=None):
+    regex = regex or _mobile_regex(cc, trunk, lead, digits)
+    return {
+        "cc": cc,
+        "trunk": trunk,
+        "nsn": nsn,
+        "prefixes": prefixes,
+        "regex": regex,
+        # Numbers of `regex` only this country uses; catch-all patterns narrow it ("" = none)
+        "narrow": regex if narrow is None else narrow,
+    }
+
+
+# ── Country phone config ───────────────────────────────────────────────────────
+# cc: calling code, trunk: national dialling prefix, nsn: (min, max) digits after cc.
+# narrow: for catch-all landline patterns, the specific part (mobiles) that wins same-span ties.
+COUNTRY_PHONE_CONFIG = {
+    "United Kingdom":  _entry("44", "0", (9, 10), ["07", "+44"], None, None, r'(?:\+44\s?|0)(?:7\d{9}|\d{2,4}[\s.\-]?\d{3,4}[\s.\-]?\d{3,4})', r'(?:\+44\s?|0)7\d{9}'),
+    "United States":   _entry("1", "", (10, 10), ["+1", "tel:"], None, None, r'(?:\+1[\s.\-]?)?\(?\d{3}\)?[\s.\-]?\d{3}[\s.\-]?\d{4}', ""),
+    "Canada":          _entry("1", "", (10, 10), ["+1", "tel:"], None, None, r'(?:\+1[\s.\-]?)?\(?\d{3}\)?[\s.\-]?\d{3}[\s.\-]?\d{4}', ""),
+    "Australia":       _entry("61", "0", (9, 9), ["04", "+61"], None, None, r'(?:\+61\s?|0)(?:4\d{8}|\d{1,4}[\s.\-]?\d{3,4}[\s.\-]?\d{3,4})', r'(?:\+61\s?|0)4\d{8}'),
+    "Germany":         _entry("49", "0", (9, 12), ["+49", "015", "016", "017"], None, None, r'(?:\+49\s?|0)1[567]\d{7,10}'),
+    "France":          _entry("33", "0", (9, 9), ["+33", "06", "07"], None, None, r'(?:\+33\s?|0)[67]\d{8}'),
+    "India":           _entry("91", "0", (10, 10), ["+91", "9", "8", "7"], None, None, r'(?:\+91[\s.\-]?)?[6-9]\d{9}'),
+    "Pakistan":        _entry("92", "0", (10, 10), ["+92", "03"], None, None, r'(?:\+92[\s.\-]?|0)3\d{9}'),
+    "UAE":             _entry("971", "0", (9, 9), ["+971", "05"], None, None, r'(?:\+971[\s.\-]?|0)5\d{8}'),
+    "Saudi Arabia":    _entry("966", "0", (9, 9), ["+966", "05"], None, None, r'(?:\+966[\s.\-]?|0)5\d{8}'),
+    "Ireland":         _entry("353", "0", (9, 9), ["+353", "08"], "8[35-9]", 7),
+    "New Zealand":     _entry("64", "0", (8, 10), ["+64", "02"], "2", "7,9"),
+    "South Africa":    _entry("27", "0", (9, 9), ["+27", "06", "07", "08"], "[678]", 8),
+    "Nigeria":         _entry("234", "0", (10, 10), ["+234", "080", "081", "070", "090"], "[789][01]", 8),
+    "Kenya":           _entry("254", "0", (9, 9), ["+254", "07", "01"], "[17]", 8),
+    "Ghana":           _entry("233", "0", (9, 9), ["+233", "02", "05"], "[25]", 8),
+    "Egypt":           _entry("20", "0", (10, 10), ["+20", "01"], "1[0125]", 8),
+    "Qatar":           _entry("974", "", (8, 8), ["+974"], "[3567]", 7),
+    "Kuwait":          _entry("965", "", (8, 8), ["+965"], "[569]", 7),
+    "Bahrain":         _entry("973", "", (8, 8), ["+973"], "3", 7),
+    "Oman":            _entry("968", "", (8, 8), ["+968"], "[79]", 7),
+    "Jordan":          _entry("962", "0", (9, 9), ["+962", "07"], "7[789]", 7),
+    "Lebanon":         _entry("961", "0", (7, 8), ["+961", "03", "07"], "[37]", "6,7"),
+    "Turkey":          _entry("90", "0", (10, 10), ["+90", "05"], "5", 9),
+    "Israel":          _entry("972", "0", (9, 9), ["+972", "05"], "5", 8),
+    "Spain":           _entry("34", "", (9, 9), ["+34", "6", "7"], "[67]", 8),
+    "Italy":           _entry("39", "", (9, 10), ["+39", "3"], "3", "8,9"),
+    "Portugal":        _entry("351", "", (9, 9), ["+351", "9"], "9[1236]", 7),
+    "Netherlands":     _entry("31", "0", (9, 9), ["+31", "06"], "6", 8),
+    "Belgium":         _entry("32", "0", (9, 9), ["+32", "04"], "4[5-9]", 7),
+    "Switzerland":     _entry("41", "0", (9, 9), ["+41", "07"], "7[5-9]", 7),
+    "Austria":         _entry("43", "0", (10, 13), ["+43", "06"], "6", "9,12"),
+    "Sweden":          _entry("46", "0", (9, 9), ["+46", "07"], "7", 8),
+    "Norway":          _entry("47", "", (8, 8), ["+47", "4", "9"], "[49]", 7),
+    "Denmark":         _entry("45", "", (8, 8), ["+45"], "[2-9]", 7),
+    "Finland":         _entry("358", "0", (8, 10), ["+358", "04", "050"], "[45]", "7,9"),
+    "Poland":          _entry("48", "", (9, 9), ["+48", "5", "6", "7", "8"], "[5-8]", 8),
+    "Czech Republic":  _entry("420", "", (9, 9), ["+420", "6", "7"], "[67]", 8),
+    "Greece":          _entry("30", "", (10, 10), ["+30", "69"], "69", 8),
+    "Romania":         _entry("40", "0", (9, 9), ["+40", "07"], "7", 8),
+    "Brazil":          _entry("55", "0", (10, 11), ["+55"], r"\(?[1-9]\d\)?[\s.\-]?9", 8),
+    "Mexico":          _entry("52", "", (10, 10), ["+52"], "[1-9]", 9),
+    "Argentina":       _entry("54", "0", (10, 11), ["+54", "+54 9"], "9?[1-9]", 9),
+    "Colombia":        _entry("57", "", (10, 10), ["+57", "3"], "3", 9),
+    "Chile":           _entry("56", "", (9, 9), ["+56", "9"], "9", 8),
+    "Philippines":     _entry("63", "0", (10, 10), ["+63", "09"], "9", 9),
+    "Malaysia":        _entry("60", "0", (9, 10), ["+60", "01"], "1", "8,9"),
+    "Singapore":       _entry("65", "", (8, 8), ["+65", "8", "9"], "[89]", 7),
+    "Indonesia":       _entry("62", "0", (9, 12), ["+62", "08"], "8", "8,11"),
+    "Thailand":        _entry("66", "0", (9, 9), ["+66", "06", "08", "09"], "[689]", 8),
+    "Vietnam":         _entry("84", "0", (9, 9), ["+84", "03", "09"], "[35789]", 8),
+    "Bangladesh":      _entry("880", "0", (10, 10), ["+880", "01"], "1[3-9]", 8),
+    "Sri Lanka":       _entry("94", "0", (9, 9), ["+94", "07"], "7", 8),
+    "Japan":           _entry("81", "0", (10, 10), ["+81", "090", "080", "070"], "[789]0", 8),
+    "South Korea":     _entry("82", "0", (9, 10), ["+82", "010"], "1[016-9]", "7,8"),
+    "Hong Kong":       _entry("852", "", (8, 8), ["+852"], "[4-9]", 7),
+    "China":           _entry("86", "", (11, 11), ["+86", "13", "15", "18"], "1[3-9]", 9),
+}
+GENERIC_PHONE_REGEX = r'(?:\+\d{1,3}[\s.\-]?)?\(?\d{2,4}\)?[\s.\-]?\d{3,5}[\s.\-]?\d{3,5}'
+
+# Words besides the country name that place a number in a country whose national format another country shares
+COUNTRY_HINTS = {
+    "UAE": ["United Arab Emirates", "Emirates", "Dubai", "Abu Dhabi", "Sharjah", "Ajman"],
+    "Saudi Arabia": ["KSA", "Saudi", "Riyadh", "Jeddah", "Dammam", "Khobar", "Mecca", "Makkah", "Medina"],
+    "Qatar": ["Doha"],
+    "Kuwait": ["Kuwait City", "Hawalli"],
+    "Bahrain": ["Manama"],
+    "Oman": ["Muscat"],
+    "Israel": ["Tel Aviv", "Jerusalem", "Haifa"],
+    "United States": ["USA", "New York", "Los Angeles", "Chicago", "Houston", "Miami"],
+    "Canada": ["Toronto", "Vancouver", "Montreal", "Calgary", "Ottawa"],
+    "Hong Kong": ["Kowloon"],
+    "Denmark": ["Copenhagen"],
+    "Norway": ["Oslo"],
+}
+
+
+@lru_cache(maxsize=None)
+def _narrow_pattern(country):
+    cfg = COUNTRY_PHONE_CONFIG.get(country)
+    return re.compile(cfg["narrow"]) if cfg and cfg["narrow"] else None
+
+
+def is_narrow_match(country, text, start, end):
+    """True when text[start:end] fits the country's specific numbers, not just its catch-all pattern."""
+    pattern = _narrow_pattern(country)
+    return bool(pattern and pattern.fullmatch(text, start, end))
+
+
+@lru_cache(maxsize=None)
+def compile_country_pattern(country):
+    """One precompiled pattern per country (generic pattern for unknown countries)."""
+    cfg = COUNTRY_PHONE_CONFIG.get(country)
+    return re.compile(cfg["regex"] if cfg else GENERIC_PHONE_REGEX)
+
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+@lru_cache(maxsize=None)
+def _hint_pattern(country):
+    words = [country] + COUNTRY_HINTS.get(country, [])
+    return re.compile(r'\b(?:' + "|".join(re.escape(word) for word in words) + r')\b', re.I)
+
+
+def to_e164(raw, country):
+    """Normalizes a matched number to E.164 ("+447700900123").
+
+    Numbers from unknown countries cannot be given a calling code; they are
+    returned as bare digits when they have 10-15 digits, like the old cleaner.
+    Returns None for anything that does not fit the country's number lengths.
+    """
+    raw = raw.strip()
+    digits = _NON_DIGITS.sub('', raw)
+    cfg = COUNTRY_PHONE_CONFIG.get(country)
+    international = raw.startswith("+")
+    if digits.startswith("00"):
+        digits = digits[2:]
+        international = True
+
+    if not cfg:
+        if international and 8 <= len(digits) <= 15:
+            return "+" + digits
+        return digits if 10 <= len(digits) <= 15 else None
+
+    cc, trunk = cfg["cc"], cfg["trunk"]
+    low, high = cfg["nsn"]
+    if international:
+        if digits.startswith(cc):
+            national = digits[len(cc):]
+            # Some people write the trunk after the calling code: +44 (0)7...
+            if trunk and national.startswith(trunk) and low <= len(national) - len(trunk) <= high:
+                national = national[len(trunk):]
+            return "+" + cc + national if low <= len(national) <= high else None
+        return "+" + digits if 8 <= len(digits) <= 15 else None
+    if trunk and digits.startswith(trunk) and low <= len(digits) - len(trunk) <= high:
+        return "+" + cc + digits[len(trunk):]
+    if digits.startswith(cc) and low <= len(digits) - len(cc) <= high:
+        return "+" + digits
+    if low <= len(digits) <= high:
+        return "+" + cc + digits
+    return None
+
+
+def phone_key(phone):
+    """Packs a normalized number into an int64 key (negative for non-E.164 digit strings).
+
+    Bare digit strings may start with 0, so their length is packed above the
+    value: "0123" and "123" get different keys.
+    """
+    if phone.startswith("+"):
+        return int(phone[1:])
+    if len(phone) > 16:
+        raise ValueError(f"{phone!r} is too long for a phone key")
+    return -(len(phone) << 56 | int(phone))
+
+
+class PhoneKeySet:
+    """Compact set of int64 phone keys: a sorted array plus a small pending hash set.
+
+    The pending set is merged into the array once it grows past a fraction of
+    the array, so merges stay amortized O(1) per key and steady-state memory is
+    ~8 bytes per number instead of a Python str per number.
+    """
+
+    MIN_PENDING = 4096
+
+    def __init__(self, keys=()):
+        self._sorted = array('q')
+        self._pending = set()
+        for key in keys:
+            self.add(key)
+
+    def __len__(self):
+        return len(self._sorted) + len(self._pending)
+
+    def __contains__(self, key):
+        if key in self._pending:
+            return True
+        i = bisect_left(self._sorted, key)
+        return i < len(self._sorted) and self._sorted[i] == key
+
+    def add(self, key):
+        """Adds `key`; returns True if it was not present before."""
+        if key in self:
+            return False
+        self._pending.add(key)
+        if len(self._pending) >= max(self.MIN_PENDING, len(self._sorted) // 8):
+            self._merge()
+        return True
+
+    def _merge(self):
+        # Two sorted runs: timsort merges them in linear time
+        merged = self._sorted.tolist() + sorted(self._pending)
+        merged.sort()
+        self._sorted = array('q', merged)
+        self._pending = set()
+
+
+class PhoneEngine:
+    """Extracts E.164-normalized numbers for one country with a precompiled pattern."""
+
+    def __init__(self, country):
+        self.country = country
+        self.pattern = compile_country_pattern(country)
+        # JS-compatible source for in-page prefiltering
+        self.prefilter_source = self.pattern.pattern
+
+    def extract(self, text):
+        """Returns the distinct normalized numbers in `text`, in order of appearance."""
+        if not text:
+            return []
+        found = []
+        for match in self.pattern.finditer(text):
+            phone = to_e164(match.group(0), self.country)
+            if phone and phone not in found:
+                found.append(phone)
+        return found
+
+
+class MultiCountryPhoneEngine:
+    """Extracts numbers for several countries in one scan over the text.
+
+    All country patterns are compiled into one alternation with a named group
+    per country; the first country is the job's own. An explicit +cc picks
+    the country. A national number that several countries' patterns match
+    goes to the countries whose specific format it fits, rather than to a
+    catch-all landline pattern (087 123 4567 is Irish, not UK). Among those
+    (05XXXXXXXX in the UAE and Saudi Arabia) the country named by the
+    query's city wins, else the one named in the text (`COUNTRY_HINTS`), else
+    the job's country; when none of them decides, every candidate is kept.
+    """
+
+    def __init__(self, countries):
+        self.countries = list(dict.fromkeys(countries))
+        self._group_country = {}
+        parts = []
+        for i, country in enumerate(self.countries):
+            cfg = COUNTRY_PHONE_CONFIG.get(country)
+            group = f"c{i}"
+            self._group_country[group] = country
+            parts.append(f"(?P<{group}>{cfg['regex'] if cfg else GENERIC_PHONE_REGEX})")
+        self.pattern = re.compile("|".join(parts))
+        self.prefilter_source = "|".join(
+            f"(?:{(COUNTRY_PHONE_CONFIG.get(c) or {'regex': GENERIC_PHONE_REGEX})['regex']})" for c in self.countries
+        )
+
+    def extract(self, text, city=None):
+        """Returns distinct (country, number) pairs in order of appearance.
+
+        `city` is the city the query searched, used to place ambiguous numbers.
+        """
+        if not text:
+            return []
+        found = []
+        for match in self.pattern.finditer(text):
+            country = self._group_country[match.lastgroup]
+            raw = match.group(0)
+            if raw.lstrip().startswith(("+", "00")):
+                countries = [country_for_number(_NON_DIGITS.sub('', raw).lstrip("0"), self.countries) or country]
+            else:
+                countries = self._candidates(text, match, country)
+                if len(countries) > 1:
+                    countries = self._resolve(countries, text, match, city)
+            for country in countries:
+                phone = to_e164(raw, country)
+                if phone and all(phone != seen for _, seen in found):
+                    found.append((country, phone))
+        return found
+
+    def _candidates(self, text, match, country):
+        """Every requested country whose own pattern matches exactly the same span."""
+        candidates = []
+        for other in self.countries:
+            if other == country:
+                candidates.append(other)
+                continue
+            hit = compile_country_pattern(other).match(text, match.start())
+            if hit and hit.end() == match.end():
+                candidates.append(other)
+        return candidates
+
+    def _resolve(self, candidates, text, match, city):
+        narrow = [c for c in candidates if is_narrow_match(c, text, match.start(), match.end())]
+        if narrow:
+            candidates = narrow
+            if len(candidates) == 1:
+                return candidates
+        for context in (city, text):
+            if context:
+                named = [c for c in candidates if _hint_pattern(c).search(context)]
+                if len(named) == 1:
+                    return named
+        if self.countries[0] in candidates:
+            return [self.countries[0]]
+        return candidates
+
+
+def country_for_number(digits, countries):
+    """Picks the requested country whose calling code prefixes `digits` (longest code wins)."""
+    best = None
+    for country in countries:
+        cfg = COUNTRY_PHONE_CONFIG.get(country)
+        if cfg and digits.startswith(cfg["cc"]) and (best is None or len(cfg["cc"]) > len(COUNTRY_PHONE_CONFIG[best]["cc"])):
+            best = country
+    return best
+
+
+def extract_phones(text, country):
+    return PhoneEngine(country).extract(text)
+
+
+def _sample_numbers(country, rng, wanted=50):
+    """Random numbers that the country's own pattern accepts (used as a validity oracle)."""
+    cfg = COUNTRY_PHONE_CONFIG.get(country) or {"cc": "44", "nsn": (10, 10)}
+    engine = PhoneEngine(country)
+    low, high = cfg["nsn"]
+    numbers = []
+    for _ in range(wanted * 200):
+        national = "".join(rng.choice("0123456789") for _ in range(rng.randint(low, high)))
+        candidate = f"+{cfg['cc']} {national}"
+        if engine.extract(candidate):
+            numbers.append(candidate)
+            if len(numbers) >= wanted:
+                break
+    return numbers or ["+44 7700 900123"]
+
+
+def _sample_snippets(country, count, seed=7):
+    rng = random.Random(seed)
+    numbers = _sample_numbers(country, rng)
+    fillers = [
+        "Certified personal trainer helping busy professionals get fit.",
+        "Book a free consultation today, DM for details.",
+        "Studio open Mon-Sat 6am-9pm, 2 locations downtown.",
+    ]
+    snippets = []
+    for i in range(count):
+        text = rng.choice(fillers)
+        if i % 3 == 0:
+            text += f" Call {rng.choice(numbers)} or email coach{i}@gmail.com"
+        snippets.append(text)
+    return snippets
+
+
+def benchmark(country, count):
+    """Measures extraction + normalization + dedup throughput over synthetic snippets."""
+    snippets = _sample_snippets(country, min(count, 100000))
+    engine = PhoneEngine(country)
+    seen = PhoneKeySet()
+    started = time.perf_counter()
+    found = 0
+    for i in range(count):
+        for phone in engine.extract(snippets[i % len(snippets)]):
+            found += 1
+            seen.add(phone_key(phone))
+    elapsed = time.perf_counter() - started
+    return {
+        "country": country,
+        "snippets": count,
+        "matches": found,
+        "unique": len(seen),
+        "seconds": round(elapsed, 3),
+        "snippetsPerSecond": int(count / elapsed) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phone extraction engine benchmark")
+    parser.add_argument("--country", default="United Kingdom")
+    parser.add_argument("--snippets", type=int, default=1000000)
+    args = parser.parse_args()
+    result = benchmark(args.country, args.snippets)
+    for key, value in result.items():
+        print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
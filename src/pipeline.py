@@ -0,0 +1,126 @@
+import queue
+import threading
+
+# --- CONFIGURATION ---
+DEFAULT_QUEUE_SIZE = 64
+_STOP = object()
+
+
+class Batch:
+    """Results submitted together (one scroll pass); `wait` blocks until all are written."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.written = 0
+        self.total = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _finish_one(self, value):
+        with self._lock:
+            self.written += 1
+            self.total += value or 0
+            if self._closed and self.written == self.submitted:
+                self._done.set()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self.written == self.submitted:
+                self._done.set()
+
+    def wait(self, timeout=None):
+        """Returns the summed writer results once every submitted item is written."""
+        self._done.wait(timeout)
+        return self.total
+
+
+class ResultPipeline:
+    """Overlaps browsing with extraction and file output.
+
+    The browser stage (the caller) submits raw results; `workers` threads run
+    `prepare` on them (regexes, normalization), and a single writer thread runs
+    `write` (dedup, file appends, events) in submission order, so files and
+    events come out exactly as in the serial loop. Both queues are bounded:
+    a slow writer fills the write queue, blocks the extraction threads, fills
+    the extract queue, and finally blocks `submit` in the browser.
+    """
+
+    def __init__(self, prepare, write, workers=2, queue_size=DEFAULT_QUEUE_SIZE):
+        self.prepare = prepare
+        self.write = write
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size or DEFAULT_QUEUE_SIZE))
+        self.extract_queue = queue.Queue(self.queue_size)
+        self.write_queue = queue.Queue(self.queue_size)
+        self._seq = 0
+        self._peaks = {"extract": 0, "write": 0, "reorder": 0}
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._extract_loop, name=f"extract-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        writer = threading.Thread(target=self._write_loop, name="writer", daemon=True)
+        writer.start()
+        self._threads.append(writer)
+        return self
+
+    def submit(self, batch, item, context=None):
+        """Queues one raw result; blocks while the pipeline is full (backpressure)."""
+        batch.submitted += 1
+        self.extract_queue.put((self._seq, batch, item, context))
+        self._seq += 1
+        self._peaks["extract"] = max(self._peaks["extract"], self.extract_queue.qsize())
+
+    def _extract_loop(self):
+        while True:
+            task = self.extract_queue.get()
+            if task is _STOP:
+                self.write_queue.put(_STOP)
+                return
+            seq, batch, item, context = task
+            try:
+                prepared, error = self.prepare(item), None
+            except Exception as e:
+                prepared, error = None, e
+            self.write_queue.put((seq, batch, prepared, context, error))
+            self._peaks["write"] = max(self._peaks["write"], self.write_queue.qsize())
+
+    def _write_loop(self):
+        pending = {}
+        next_seq = 0
+        stopped = 0
+        while stopped < self.workers:
+            task = self.write_queue.get()
+            if task is _STOP:
+                stopped += 1
+                continue
+            pending[task[0]] = task
+            self._peaks["reorder"] = max(self._peaks["reorder"], len(pending))
+            while next_seq in pending:
+                _, batch, prepared, context, error = pending.pop(next_seq)
+                next_seq += 1
+                value = None
+                if error is None:
+                    try:
+                        value = self.write(prepared, context)
+                    except Exception:
+                        value = None
+                batch._finish_one(value)
+
+    def take_peaks(self):
+        """Returns the peak depth of each stage's queue since the last call."""
+        peaks = dict(self._peaks)
+        for key in self._peaks:
+            self._peaks[key] = 0
+        return peaks
+
+    def close(self):
+        for _ in range(self.workers):
+            self.extract_queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
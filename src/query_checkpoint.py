@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+# --- CONFIGURATION ---
+CHECKPOINT_FILE = "query_checkpoints.json"
+DEFAULT_INTERVAL_SEC = 10
+
+
+def link_hash(href):
+    """64-bit hex digest of a result link; compact enough to keep every link of a deep query."""
+    return hashlib.blake2b(href.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class QueryCheckpoints:
+    """In-query progress of the queries currently running, keyed by unit.
+
+    Each entry holds the query, the hashes of the links already harvested,
+    the scroll passes reached and the session counters. The file is
+    rewritten atomically at most every `interval` seconds per query (and on
+    stop), so a crash loses at most that much work, and a resumed query
+    fast-forwards over the links it already saved instead of re-writing them.
+    """
+
+    def __init__(self, output_dir, interval=None):
+        self.path = Path(output_dir) / CHECKPOINT_FILE
+        self.interval = float(interval or DEFAULT_INTERVAL_SEC)
+        self.entries = {}
+        self._saved_at = {}
+        self._dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, key, query):
+        """The checkpoint of `key`, or None if there is none for this exact query."""
+        entry = self.entries.get(key)
+        if entry and entry.get("query") == query:
+            return entry
+        return None
+
+    def update(self, key, entry, force=False):
+        """Stores `entry` for `key`; writes the file if the interval has passed (or `force`)."""
+        now = time.time()
+        self.entries[key] = dict(entry, updated=time.strftime('%Y-%m-%d %H:%M:%S'))
+        self._dirty = True
+        if force or now - self._saved_at.get(key, 0) >= self.interval:
+            self._saved_at[key] = now
+            self._write()
+
+    def clear(self, key):
+        self._saved_at.pop(key, None)
+        if self.entries.pop(key, None) is not None:
+            self._write()
+
+    def flush(self):
+        """Writes checkpoints still held back by the interval (call on stop)."""
+        if self._dirty:
+            self._write()
+
+    def _write(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._dirty = False
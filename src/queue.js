@@ -100,7 +100,10 @@ export class JobQueue {
         includeGoogleMaps: job.params.includeGoogleMaps !== false,
         scrapeMode: job.params.scrapeMode || 'emails',
         sites: job.params.sites,
-        userPlan: job.params.userPlan
+        userPlan: job.params.userPlan,
+        compressOutput: job.params.compressOutput,
+        maxDurationSec: job.params.maxDurationSec,
+        maxQueries: job.params.maxQueries
       });
 
       if (job.status !== "stopped") {
@@ -149,6 +152,29 @@ export class JobQueue {
     return false;
   }
 
+  // Control messages for a running Python scraper; false when the job is not running or has no control channel
+  pauseJob(jobId) {
+    const active = this.activeJobs.get(jobId);
+    if (!active || active.job.status !== "running" || !active.scraper.pause()) return false;
+    active.job.status = "paused";
+    this.pushEvent(active.job, { type: "job-paused", message: "Job paused by user" });
+    return true;
+  }
+
+  resumeJob(jobId) {
+    const active = this.activeJobs.get(jobId);
+    if (!active || active.job.status !== "paused" || !active.scraper.resume()) return false;
+    active.job.status = "running";
+    this.pushEvent(active.job, { type: "job-resumed", message: "Job resumed by user" });
+    return true;
+  }
+
+  setJobRate(jobId, queriesPerMinute) {
+    const active = this.activeJobs.get(jobId);
+    if (!active || !active.scraper.setRate(queriesPerMinute)) return false;
+    return true;
+  }
+
   pushEvent(job, event) {
     const payload = { ...event, time: new Date().toISOString() };
     job.events.push(payload);
@@ -253,7 +279,7 @@ export class JobQueue {
 
   hasUserActiveJob(userId) {
     return Array.from(this.jobs.values()).some(
-      (job) => job.userId === userId && (job.status === "running" || job.status === "queued")
+      (job) => job.userId === userId && (job.status === "running" || job.status === "paused" || job.status === "queued")
     );
   }
 
@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# --- CONFIGURATION ---
+DEFAULT_QUERIES_PER_MINUTE = 6
+DEFAULT_BURST = 2
+# A process that has not touched the state for this long is treated as gone
+STALE_AFTER_SEC = 600
+POLL_SEC = 0.5
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RateGovernor:
+    """Host-wide token bucket that every scraper process draws its queries from.
+
+    State lives in a small JSON file guarded by an flock, so jobs need no
+    coordinator process. When several jobs are waiting, the next token goes to
+    the job served least recently, so each active job gets an equal share;
+    exited or stale processes are pruned, so their share goes to the rest.
+    The rate and burst live in the shared state too: a process writes them
+    only when it was started with explicit settings or `set_rate` is called,
+    and otherwise refills at whatever the host currently uses.
+    Without fcntl (non-POSIX hosts) the governor never blocks.
+    """
+
+    def __init__(self, job, queries_per_minute=None, burst=None, state_dir=None):
+        self.job = str(job)
+        self.pid = os.getpid()
+        self.member = f"{self.job}:{self.pid}"
+        self.rate = float(queries_per_minute or DEFAULT_QUERIES_PER_MINUTE) / 60.0
+        self.burst = float(burst or DEFAULT_BURST)
+        # Explicit settings are written to the shared state on the next refill; defaults never overwrite it
+        self._new_rate = self.rate if queries_per_minute else None
+        self._new_burst = self.burst if burst else None
+        state_dir = Path(state_dir or os.path.join(tempfile.gettempdir(), "lead_scraper_governor"))
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.state_file = state_dir / "state.json"
+        self.lock_file = state_dir / "state.lock"
+
+    @classmethod
+    def from_config(cls, config, job):
+        """Host-wide settings come from the environment first, so every job agrees on them."""
+        return cls(
+            job,
+            queries_per_minute=os.environ.get("SCRAPER_QUERIES_PER_MINUTE") or config.get("maxQueriesPerMinute"),
+            burst=os.environ.get("SCRAPER_QUERY_BURST") or config.get("queryBurst"),
+            state_dir=os.environ.get("SCRAPER_GOVERNOR_DIR") or config.get("governorDir"),
+        )
+
+    @contextmanager
+    def _state(self):
+        with open(self.lock_file, "a+") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_file, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {}
+                state.setdefault("tokens", self.burst)
+                state.setdefault("updated", time.time())
+                state.setdefault("members", {})
+                yield state
+                tmp = self.state_file.with_name(self.state_file.name + ".tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.state_file)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refill(self, state, now):
+        # Tokens accrue at the shared rate up to now; an explicit setting then replaces it host-wide
+        rate = float(state.get("rate") or self.rate)
+        burst = float(state.get("burst") or self.burst)
+        state["tokens"] = min(burst, state["tokens"] + (now - state["updated"]) * rate)
+        state["updated"] = now
+        if self._new_rate:
+            rate, self._new_rate = self._new_rate, None
+        if self._new_burst:
+            burst, self._new_burst = self._new_burst, None
+            state["tokens"] = min(burst, state["tokens"])
+        state["rate"], state["burst"] = rate, burst
+        self.rate, self.burst = rate, burst
+        members = state["members"]
+        for name, member in list(members.items()):
+            if now - member["seen"] > STALE_AFTER_SEC or not _alive(member["pid"]):
+                del members[name]
+
+    def _next_member(self, members):
+        """The waiting process of the job served least recently."""
+        waiting = [m for m in members.values() if m.get("waitingSince")]
+        if not waiting:
+            return None
+        last_grant = {}
+        for member in members.values():
+            last_grant[member["job"]] = max(last_grant.get(member["job"], 0), member.get("lastGrant", 0))
+        return min(waiting, key=lambda m: (last_grant[m["job"]], m["waitingSince"]))
+
+    def try_acquire(self):
+        """One non-blocking attempt; returns 0 when a query slot was granted, else seconds to wait."""
+        if fcntl is None:
+            return 0
+        with self._state() as state:
+            now = time.time()
+            self._refill(state, now)
+            me = state["members"].setdefault(self.member, {"job": self.job, "pid": self.pid, "granted": 0})
+            me["seen"] = now
+            me.setdefault("waitingSince", now)
+            turn = self._next_member(state["members"])
+            if state["tokens"] >= 1 and turn is me:
+                state["tokens"] -= 1
+                me["lastGrant"] = now
+                me["granted"] += 1
+                del me["waitingSince"]
+                return 0
+            # Only the process whose turn it is sleeps until the next token; others poll
+            delay = (1 - state["tokens"]) / self.rate if turn is me else POLL_SEC
+        return max(0.01, min(delay, 5.0))
+
+    def acquire(self, stop=None):
+        """Blocks until this process may issue a query; returns the seconds waited.
+
+        Returns None if `stop` (a StopSignal) is requested while waiting.
+        """
+        started = time.time()
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return time.time() - started
+            if stop is not None:
+                if stop.wait(delay):
+                    self.release()
+                    return None
+            else:
+                time.sleep(delay)
+
+    def set_rate(self, queries_per_minute):
+        """Changes the host-wide query rate for every process sharing this governor."""
+        self.rate = float(queries_per_minute) / 60.0
+        self._new_rate = self.rate
+        if fcntl is None:
+            return
+        with self._state() as state:
+            self._refill(state, time.time())
+
+    def release(self):
+        """Leaves the governor so idle capacity goes straight to the other jobs."""
+        if fcntl is None:
+            return
+        with self._state() as state:
+            state["members"].pop(self.member, None)
@@ -4,6 +4,8 @@ import fs from "node:fs";
 import { fileURLToPath } from "node:url";
 import BusinessScraper from "./maps.js";
 import { extractPhones, buildPhoneQueryTerm } from "./phone_utils.js";
+import { IPC_FD, encodeFrame, createFrameReader } from "./ipc.js";
+import { JobBudget } from "./job_budget.js";
 
 const nicheExpansionDictionary = {
   fitness: ["Fitness Coach", "Gym Instructor", "Personal Trainer", "Yoga Instructor", "Pilates Teacher"],
@@ -12,6 +14,9 @@ const nicheExpansionDictionary = {
   pilates: ["Pilates Coach", "Pilates Instructor"]
 };
 
+// How long a stopped scraper process gets to checkpoint and quit Chrome
+const STOP_GRACE_MS = 30000;
+
 const defaultSites = [
   "linkedin.com/in", "facebook.com", "instagram.com", "reddit.com", "x.com",
   "twitter.com", "tiktok.com", "youtube.com", "pinterest.com", "threads.net",
@@ -23,6 +28,12 @@ const defaultSites = [
   "kompass.com", "clutch.co", "tripadvisor.com"
 ];
 
+// The project's virtualenv interpreter when there is one, else python3 from PATH
+export function pythonCommand() {
+  const venvPython = path.join(__dirname, "..", "venv", "bin", "python3");
+  return fs.existsSync(venvPython) ? venvPython : "python3";
+}
+
 export function expandNiches(baseNiches) {
   const expanded = new Set();
 
@@ -54,14 +65,42 @@ export class LeadScraper {
     this.onProgress = onProgress;
     this.sites = Array.from(new Set((sites || []).filter(Boolean)));
     this.child = null;
+    // Framed control/event socket of the running Python scraper (null in text mode)
+    this.channel = null;
+    // maxDurationSec / maxQueries of the running job, shared by all of its phases
+    this.budget = new JobBudget();
     this.mapsScraper = null;
     this.isStopped = false;
   }
 
+  sendControl(message) {
+    if (!this.channel || this.channel.destroyed || !this.channel.writable) return false;
+    this.channel.write(encodeFrame(message));
+    return true;
+  }
+
+  // Pause/resume take effect before the scraper's next query; the running one finishes
+  pause() {
+    return this.sendControl({ type: "pause" });
+  }
+
+  resume() {
+    return this.sendControl({ type: "resume" });
+  }
+
+  setRate(queriesPerMinute) {
+    return this.sendControl({ type: "rate", queriesPerMinute });
+  }
+
   stop() {
     this.isStopped = true;
     if (this.child) {
-      this.child.kill("SIGTERM");
+      // Python scrapers flush and checkpoint on cancel (or SIGTERM in text mode); force-kill only if they overrun the grace period
+      const child = this.child;
+      if (!this.sendControl({ type: "cancel" })) child.kill("SIGTERM");
+      setTimeout(() => {
+        if (child.exitCode === null && child.signalCode === null) child.kill("SIGKILL");
+      }, STOP_GRACE_MS).unref();
     }
     if (this.mapsScraper) {
       this.mapsScraper.close().catch(() => { });
@@ -99,8 +138,14 @@ export class LeadScraper {
         for (const niche of niches) {
           if (this.isStopped) break;
 
+          if (this.budget.exhausted()) {
+            this.onProgress({ type: "log", message: "[Maps] Job budget used up; skipping the remaining Maps queries." });
+            return;
+          }
+
           const query = `"${niche}" in "${city} ${country}"`;
           this.onProgress({ type: "log", message: `[Maps] Searching: ${query}` });
+          this.budget.recordQuery();
 
           await this.mapsScraper.scrapeGoogleMaps(query, 999);
           let leads = await this.mapsScraper.processResults(999);
@@ -228,7 +273,7 @@ export class LeadScraper {
     }
   }
 
-  async run({ jobId, country, cities, states = [], niches, includeGoogleMaps = true, scrapeMode = 'emails', sites, userPlan = 'basic' }) {
+  async run({ jobId, country, cities, states = [], niches, includeGoogleMaps = true, scrapeMode = 'emails', sites, userPlan = 'basic', compressOutput = null, maxDurationSec = null, maxQueries = null }) {
     if (sites && sites.length) {
       this.sites = sites;
     }
@@ -244,6 +289,8 @@ export class LeadScraper {
 
     const expandedNichesList = expandNiches(niches);
     const doEmails = scrapeMode === 'emails' || scrapeMode === 'both';
+    // The clock starts now, so Maps and Google time counts against maxDurationSec too
+    this.budget = new JobBudget({ maxDurationSec, maxQueries });
 
     // 1. Run Google Maps Scraper (useful for both phones and emails)
     if (includeGoogleMaps && !this.isStopped) {
@@ -256,8 +303,6 @@ export class LeadScraper {
       return { files: [], expandedNiches: expandedNichesList, sites: this.sites };
     }
 
-    this.onProgress({ type: "log", message: "Maps phase complete. Starting Google Search phase..." });
-
     const payload = {
       outputDir,
       country,
@@ -266,15 +311,21 @@ export class LeadScraper {
       niches,
       includeGoogleMaps: false,
       sites: this.sites,
-      scrapeMode
+      scrapeMode,
+      compressOutput,
+      ...this.budget.toPayload()
     };
 
-    const runScraperProcess = (cmd, args, name) => {
+    // Framed mode gives the child a socket on fd 3 for events and control; SCRAPER_IPC=text keeps JSON lines on stdout
+    const runScraperProcess = (cmd, args, name, { framed = false } = {}) => {
       return new Promise((resolve, reject) => {
-        this.child = spawn(cmd, args, {
-          stdio: ["ignore", "pipe", "pipe"],
-          env: { ...process.env, PYTHONUNBUFFERED: "1" }
-        });
+        const env = { ...process.env, PYTHONUNBUFFERED: "1" };
+        const stdio = ["ignore", "pipe", "pipe"];
+        if (framed) {
+          stdio[IPC_FD] = "pipe";
+          env.SCRAPER_IPC_FD = String(IPC_FD);
+        }
+        this.child = spawn(cmd, args, { stdio, env });
 
         let stderr = "";
         this.child.stderr.on("data", (chunk) => {
@@ -286,6 +337,25 @@ export class LeadScraper {
         let buffer = "";
         let finalResult = null;
 
+        const handleEvent = (event) => {
+          if (event.type === "search-query") this.budget.recordQuery();
+          if (event.type === "result" || event.type === "job-complete" || event.type === "job-completed") {
+            finalResult = event;
+            return;
+          }
+          this.onProgress(event);
+        };
+
+        if (framed) {
+          this.channel = this.child.stdio[IPC_FD];
+          this.channel.on("data", createFrameReader(handleEvent, (error) => {
+            this.onProgress({ type: "log", message: `[${name}] Bad frame: ${error.message}` });
+          }));
+          // The child exiting resets the socket; "close" below reports the outcome
+          this.channel.on("error", () => { });
+        }
+
+        // Events in text mode; in framed mode stdout only carries stray prints, shown as plain log lines
         this.child.stdout.on("data", (chunk) => {
           buffer += chunk.toString();
           const lines = buffer.split("\n");
@@ -295,20 +365,22 @@ export class LeadScraper {
             const trimmed = line.trim();
             if (!trimmed) continue;
 
-            try {
-              const event = JSON.parse(trimmed);
-              if (event.type === "result" || event.type === "job-complete" || event.type === "job-completed") {
-                finalResult = event;
-                continue;
-              }
-              this.onProgress(event);
-            } catch {
+            let event = null;
+            if (!framed) {
+              try {
+                event = JSON.parse(trimmed);
+              } catch { }
+            }
+            if (event) {
+              handleEvent(event);
+            } else {
               this.onProgress({ type: "log", message: `[${name}] ${trimmed}` });
             }
           }
         });
 
         this.child.on("close", (code) => {
+          this.channel = null;
           if (code !== 0 && code !== null) {
             reject(new Error(stderr || `${name} exited with code ${code}`));
             return;
@@ -319,24 +391,38 @@ export class LeadScraper {
     };
 
     try {
-      const googleScriptPath = path.join(__dirname, "google_scraper.js");
-      await runScraperProcess(process.execPath, [googleScriptPath, JSON.stringify(payload)], "Google");
+      if (this.budget.exhausted()) {
+        this.onProgress({ type: "log", message: "Job budget used up after the Maps phase; skipping search." });
+      } else {
+        this.onProgress({ type: "log", message: "Maps phase complete. Starting Google Search phase..." });
+        const googleScriptPath = path.join(__dirname, "google_scraper.js");
+        await runScraperProcess(process.execPath, [googleScriptPath, JSON.stringify(payload)], "Google");
+      }
     } catch (googleError) {
       this.onProgress({ type: "log", message: `Google scraper failed: ${googleError.message}. Falling back to DuckDuckGo (Python)...` });
 
       if (this.isStopped) {
         return { files: [], expandedNiches: expandedNichesList, sites: this.sites };
       }
-
-      const venvPython = path.join(__dirname, "..", "venv", "bin", "python3");
-      const pythonCmd = fs.existsSync(venvPython) ? venvPython : "python3";
-      await runScraperProcess(pythonCmd, [scriptPath, JSON.stringify(payload)], "Python");
+      if (this.budget.exhausted()) {
+        this.onProgress({ type: "log", message: "Job budget used up; skipping the DuckDuckGo fallback." });
+      } else {
+        // Pass the config through a file: huge city lists would overflow ARG_MAX on argv
+        const configPath = path.join(outputDir, "job_config.json");
+        // Units Google finished before failing are skipped; contacts it saved are deduped from the output dir
+        const completedUnitsFile = path.join(outputDir, "completed_units.jsonl");
+        // Whatever Maps and Google left of the budget
+        fs.writeFileSync(configPath, JSON.stringify({ ...payload, ...this.budget.toPayload(), completedUnitsFile }));
+        await runScraperProcess(pythonCommand(), [scriptPath, "--config", configPath], "Python", {
+          framed: process.env.SCRAPER_IPC !== "text"
+        });
+      }
     }
 
     try {
 
       // 3. Finalize and report total collected files
-      const files = fs.readdirSync(outputDir).filter(f => f.endsWith('.txt') || f.endsWith('.json') || f.endsWith('.csv'));
+      const files = fs.readdirSync(outputDir).filter(f => f.endsWith('.txt') || f.endsWith('.json') || f.endsWith('.csv') || f.endsWith('.gz') || f.endsWith('.zst'));
       const finalResult = {
         files,
         expandedNiches: expandedNichesList,
@@ -1,10 +1,12 @@
 import json
 import os
-import re
 import random
 import sys
+import threading
 import time
+from collections import Counter, OrderedDict
 from pathlib import Path
+from urllib.parse import urlencode
 
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
@@ -12,13 +14,44 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from browser_cache import BrowserCache, start_chrome
+from completed_units import COMPLETED_UNITS_FILE, load_completed_units, record_completed_unit
+from enrichment import ENRICHMENT_FILE, Enricher
+from extractors import EMAIL_TERMS, build_contact_clause, build_extractors
+from ipc import Channel
+from job_budget import JobBudget
+from job_config import Reiterable, build_arg_parser, parse_job_args
+from metrics import metrics_from_config
+from near_duplicates import DEFAULT_THRESHOLD, INDEX_FILE, NearDuplicateIndex
+from niche_taxonomy import get_matcher
+from output_segments import iter_lines, manifest_path, open_writer
+from phone_engine import to_e164
+from pipeline import Batch, ResultPipeline
+from query_checkpoint import QueryCheckpoints, link_hash
+from rate_governor import RateGovernor
+from serp_archive import SerpArchive, iter_archive
+from serp_feed import FeedCapture
+from serp_harvest import RESULT_SELECTOR, harvest_results, page_blocked, resolve_prefilter
+from sharding import parse_shard, shard_output_dir, unit_in_shard, unit_key
+from shutdown import PauseSignal, StopSignal, quit_driver
+from yield_policy import YieldStopPolicy
+from yield_stats import YieldStats, city_size, default_stats_path, prioritize_units
+
 # --- CONFIGURATION ---
+CHROME_VERSION_MAIN = 145
+# Tab mode: a tab gets this long to show results (20s page load + 15s results in the serial crawl)
+TAB_LOAD_TIMEOUT_SEC = 35
+TAB_SETTLE_SEC = 2
+TAB_SCROLL_WAIT_SEC = 3
+TAB_POLL_SEC = 0.5
+# Enrichment: seconds pending page fetches get to finish when the crawl ends
+ENRICH_DRAIN_SEC = 60
+# Ranked, budgeted and tabbed crawls hop between cities; at most this many keep their lead file open
+MAX_OPEN_CITIES = 32
 DEFAULT_SITES = [
     "linkedin.com/in", "facebook.com", "instagram.com"
 ]
 
-EMAIL_TERMS = ["@gmail.com", "@hotmail", "@outlook.com", "email me"]
-
 NICHE_EXPANSION_DICTIONARY = {
     "fitness": ["Fitness Coach", "Gym Instructor", "Personal Trainer", "Yoga Instructor", "Pilates Teacher"],
     "trainer": ["Coach", "Instructor", "Consultant", "Mentor"],
@@ -26,47 +59,475 @@ NICHE_EXPANSION_DICTIONARY = {
     "pilates": ["Pilates Coach", "Pilates Instructor"],
 }
 
+# Framed channel to Node when it opened one (stdout noise cannot corrupt events); else JSON lines on stdout
+CHANNEL = Channel.from_env()
+# Pipeline writer, extraction and main threads all emit; one line must never interleave with another
+_EMIT_LOCK = threading.Lock()
+
 def emit(event):
     """Sends logs to the Node.js server."""
-    print(json.dumps(event), flush=True)
+    if CHANNEL and CHANNEL.send(event):
+        return
+    line = json.dumps(event) + "\n"
+    with _EMIT_LOCK:
+        sys.stdout.write(line)
+        sys.stdout.flush()
 
-def extract_email(text):
-    """Finds the first email in a string using regex."""
-    if not text:
-        return None
-    email_regex = r'([a-zA-Z0-9._-]+@[a-zA-Z0-9._-]+\.[a-zA-Z0-9_-]+)'
-    match = re.search(email_regex, text)
-    return match.group(0) if match else None
+def iter_expand_niches(base_niches, taxonomy_path=None, depth=1, max_per_niche=None):
+    """Expands base niches into more specific search terms, yielding each as soon as it is found.
 
-def expand_niches(base_niches):
-    """Expands base niches into more specific search terms."""
+    Tokens are matched with a cached Aho-Corasick automaton built from
+    NICHE_EXPANSION_DICTIONARY plus the optional taxonomy file. `depth` > 1
+    re-expands the expansions; `max_per_niche` caps new terms per base niche.
+    """
+    matcher = get_matcher(NICHE_EXPANSION_DICTIONARY, taxonomy_path)
     expanded = set()
     for niche in base_niches:
         trimmed = niche.strip()
         if not trimmed: continue
 
-        expanded.add(trimmed)
-        lower = trimmed.lower()
+        if trimmed not in expanded:
+            expanded.add(trimmed)
+            yield trimmed
+        added = 0
+        frontier = [trimmed]
+        for _ in range(max(1, int(depth or 1))):
+            next_frontier = []
+            for term in frontier:
+                candidates = list(matcher.expand(term))
+                if "trainer" in term.lower():
+                    candidates.append(term.replace("Trainer", "Coach").replace("trainer", "coach"))
+                    candidates.append(term.replace("Trainer", "Instructor").replace("trainer", "instructor"))
+                for candidate in candidates:
+                    if not candidate or candidate in expanded: continue
+                    if max_per_niche and added >= max_per_niche: break
+                    expanded.add(candidate)
+                    yield candidate
+                    next_frontier.append(candidate)
+                    added += 1
+            frontier = next_frontier
+            if not frontier: break
 
-        for token, matches in NICHE_EXPANSION_DICTIONARY.items():
-            if token in lower:
-                expanded.update(matches)
+def sanitize_file_name(value):
+    return "".join(ch if ch.isalnum() or ch in "_-" else "_" for ch in value)
 
-        if "trainer" in lower:
-            expanded.add(trimmed.replace("Trainer", "Coach").replace("trainer", "coach"))
-            expanded.add(trimmed.replace("Trainer", "Instructor").replace("trainer", "instructor"))
+class QuerySession:
+    """Per-query crawl state: dedup of links, counters, yield policy and per-pass bookkeeping.
 
-    return [item for item in expanded if item]
+    The browser side (one tab or several) feeds it harvested batches; it saves
+    the results and decides when the query has stopped paying for itself.
+    """
+
+    def __init__(self, scraper, query, city, niche, site, lead_writer, email_file_path, saved_count, started=None):
+        self.scraper = scraper
+        self.query = query
+        self.city, self.niche, self.site = city, niche, site
+        self.lead_writer = lead_writer
+        self.email_file_path = email_file_path
+        self.saved_count = saved_count
+        self.started = started or time.time()
+        self.scraped_links = set()
+        self.total_saved = 0
+        self.total_skipped = 0
+        self.total_contacts = 0
+        self.consecutive_no_new = 0
+        self.yield_policy = YieldStopPolicy.from_config(scraper.config)
+        if scraper.budget:
+            # Scroll depth this query can afford out of what is left of the job budget
+            self.yield_policy.max_passes = scraper.budget.passes_for_query()
+        self.harvest_started = None
+        # Writer-stage state for pipelined runs; only the writer thread updates it
+        self.pipeline_state = {
+            "city": city, "niche": niche, "site": site, "lead_writer": lead_writer,
+            "email_file_path": email_file_path, "base": saved_count, "saved": 0, "yield_policy": self.yield_policy,
+        }
+        # Links saved before a crash or stop are skipped without being written or reported again
+        self.key = unit_key(city, niche, site)
+        self.link_hashes = set()
+        self.known_hashes = set()
+        self.fast_forward = 0
+        checkpoint = scraper.checkpoints.get(self.key, query)
+        if checkpoint:
+            self.known_hashes = set(checkpoint["links"])
+            self.link_hashes = set(self.known_hashes)
+            self.fast_forward = checkpoint["passes"]
+            self.total_saved = self.pipeline_state["saved"] = checkpoint["saved"]
+            # The city's lead count already includes them
+            self.saved_count = self.pipeline_state["base"] = max(0, saved_count - checkpoint["saved"])
+            self.total_skipped = checkpoint["skipped"]
+            self.total_contacts = checkpoint["contacts"]
+            self.consecutive_no_new = checkpoint["noNew"]
+            self.yield_policy.passes = checkpoint["passes"]
+            self.yield_policy.history.extend(checkpoint["history"])
+            emit({
+                "type": "log",
+                "message": f"Resuming query at scroll pass {self.fast_forward}; skipping {len(self.known_hashes)} results already saved.",
+            })
+
+    def _is_known(self, href):
+        """Registers a new link; True if it was saved before the checkpoint."""
+        digest = link_hash(href)
+        self.link_hashes.add(digest)
+        return digest in self.known_hashes
+
+    def _record_batch(self, results, skipped):
+        scraper = self.scraper
+        if self.harvest_started is None:
+            self.harvest_started = time.time()
+        self.total_skipped += skipped
+        scraper.metrics.inc("scraper_results_harvested_total", len(results))
+        scraper.metrics.inc("scraper_results_skipped_total", skipped)
+        if scraper.archive:
+            scraper.archive.record(self.query, self.city, self.niche, self.site, self.yield_policy.passes, results, skipped)
+
+    def absorb(self, results, skipped=0):
+        """Saves one harvested batch inline; returns (new items, new contacts)."""
+        self._record_batch(results, skipped)
+        new_items = skipped > 0
+        new_contacts = 0
+        for result in results:
+            if self.scraper.stop.requested: break
+            if self.yield_policy.reached_result_cap(self.total_saved): break
+            try:
+                href = result["href"]
+                if not href or href in self.scraped_links: continue
+                self.scraped_links.add(href)
+                if self._is_known(href): continue
+
+                new_contacts += self.scraper.save_result(
+                    result, self.city, self.niche, self.site, self.lead_writer, self.email_file_path,
+                    self.saved_count + self.total_saved + 1
+                )
+                self.total_saved += 1
+                new_items = True
+            except Exception:
+                continue
+        return new_items, new_contacts
+
+    def submit(self, results, skipped=0):
+        """Queues one harvested batch on the scraper's pipeline; pair with `collect`."""
+        self._record_batch(results, skipped)
+        batch = Batch()
+        for result in results:
+            href = result.get("href")
+            if not href or href in self.scraped_links: continue
+            self.scraped_links.add(href)
+            if self._is_known(href): continue
+            self.scraper.pipeline.submit(batch, (result, self.city), self.pipeline_state)
+        batch.close()
+        return batch
+
+    def collect(self, batch, skipped=0):
+        """Waits for a submitted batch; returns (new items, new contacts)."""
+        new_contacts = batch.wait()
+        new_items = skipped > 0 or self.pipeline_state["saved"] > self.total_saved
+        self.total_saved = self.pipeline_state["saved"]
+        return new_items, new_contacts
+
+    def end_pass(self, new_items, new_contacts):
+        """Closes one scroll pass; returns a reason to stop the query, or None."""
+        self.total_contacts += new_contacts
+        self.lead_writer.flush()
+        if self.scraper.archive:
+            self.scraper.archive.flush()
+        if self.fast_forward:
+            # Scrolling back to the checkpointed depth: the pass was counted before the restart
+            self.fast_forward -= 1
+            return "Stop requested." if self.scraper.stop.requested else None
+        self.consecutive_no_new = 0 if new_items else self.consecutive_no_new + 1
+        if self.scraper.stop.requested:
+            self.checkpoint(force=True)
+            return "Stop requested."
+        if self.scraper.budget and self.scraper.budget.time_left() <= 0:
+            return "Job time budget reached."
+        self.scraper.metrics.inc("scraper_scroll_passes_total")
+        stop_reason = self.yield_policy.record_pass(new_contacts, self.total_saved)
+        if stop_reason:
+            return stop_reason
+        if self.consecutive_no_new >= 5:
+            return "Scrolled 5 times with no new results."
+        self.checkpoint()
+        return None
+
+    def checkpoint(self, force=False):
+        self.scraper.checkpoints.update(self.key, {
+            "query": self.query,
+            "links": sorted(self.link_hashes),
+            "passes": self.yield_policy.passes,
+            "saved": self.total_saved,
+            "skipped": self.total_skipped,
+            "contacts": self.total_contacts,
+            "noNew": self.consecutive_no_new,
+            "history": list(self.yield_policy.history),
+        }, force)
+
+    def progress_message(self):
+        message = f"Total found: {self.total_saved}."
+        if self.scraper.prefilter_pattern:
+            message += f" Skipped {self.total_skipped} without contacts."
+        return message
+
+    def finish(self):
+        """Records the query's yield unless it was cut short; returns results saved."""
+        if not self.scraper.stop.requested:
+            self.scraper.record_yield(
+                self.city, self.niche, self.site, self.total_contacts, self.total_saved, self.started
+            )
+            if self.scraper.budget and self.harvest_started:
+                now = time.time()
+                self.scraper.budget.record_query(now - self.started, self.yield_policy.passes, now - self.harvest_started)
+        return self.total_saved
+
+
+# True once the tab has navigated to the query and DuckDuckGo rendered its first results
+RESULTS_READY_SCRIPT = """
+return new URLSearchParams(location.search).get('q') === arguments[1]
+  && !!document.querySelector(arguments[0]);
+"""
+
+# One scroll step without waiting in the browser: scroll, click "More Results" if shown
+SCROLL_SCRIPT = """
+const height = document.body.scrollHeight;
+window.scrollTo(0, height);
+const more = document.getElementById('more-results');
+if (more && more.offsetParent !== null) more.click();
+return height;
+"""
+
+
+class BrowserTab:
+    """One tab's place in its query: idle, queued, loading, harvest, scrolling or done."""
+
+    def __init__(self, index):
+        self.index = index
+        self.handle = None
+        self.state = "idle"
+        self.ready_at = 0.0
+        self.unit = None
+        self.session = None
+        self.queued_at = None
+        self.deadline = None
+        self.height = None
+        self.retried = False
+
+
+class TabScheduler:
+    """Multiplexes queries over several tabs of one Chrome.
+
+    WebDriver talks to one tab at a time, so nothing here blocks in the
+    browser: navigation and scrolling are fired from JavaScript and each tab
+    records when it is next worth looking at (results loaded, settled, more
+    results in). The loop always steps the tab that is due first, so while
+    one tab waits on DuckDuckGo another is being harvested.
+    `open_session(unit)` returns the QuerySession for a unit and
+    `close_session(session)` marks it done; `drop_session(session)` is told
+    about sessions abandoned by a browser restart (their units are rerun).
+    """
+
+    def __init__(self, scraper, tabs, open_session, close_session, drop_session=None):
+        self.scraper = scraper
+        self.tabs = [BrowserTab(i) for i in range(tabs)]
+        self.open_session = open_session
+        self.close_session = close_session
+        self.drop_session = drop_session
+        self.units = iter(())
+        self.requeued = []
+
+    def open_tabs(self):
+        driver = self.scraper.driver
+        handles = [driver.current_window_handle]
+        while len(handles) < len(self.tabs):
+            driver.switch_to.new_window("tab")
+            handles.append(driver.current_window_handle)
+        for tab, handle in zip(self.tabs, handles):
+            tab.handle = handle
+
+    def run(self, units):
+        self.units = iter(units)
+        self.open_tabs()
+        stop = self.scraper.stop
+        while not stop.requested:
+            live = [tab for tab in self.tabs if tab.state != "done"]
+            if not live:
+                break
+            tab = min(live, key=lambda t: t.ready_at)
+            delay = tab.ready_at - time.time()
+            if delay > 0:
+                stop.wait(min(delay, TAB_POLL_SEC))
+                continue
+            try:
+                self.step(tab)
+            except Exception as e:
+                self.fail(tab, e)
+
+    def next_unit(self):
+        if self.requeued:
+            return self.requeued.pop(0)
+        return next(self.units, None)
+
+    def step(self, tab):
+        scraper = self.scraper
+        now = time.time()
+        if tab.state == "idle":
+            if scraper.pause.requested:
+                tab.ready_at = now + TAB_POLL_SEC
+                return
+            tab.unit = self.next_unit()
+            if tab.unit is None:
+                tab.state, tab.ready_at = "done", float("inf")
+                return
+            tab.state, tab.queued_at = "queued", now
+        if tab.state == "queued":
+            if scraper.governor:
+                delay = scraper.governor.try_acquire()
+                if delay:
+                    tab.ready_at = now + delay
+                    return
+                if now - tab.queued_at >= 1:
+                    emit({"type": "log", "message": f"Waited {now - tab.queued_at:.0f}s for a host-wide query slot."})
+            if scraper.budget and scraper.budget.out_of_time():
+                # The wait used up the job's time: the unit is left for a resume, not marked done
+                scraper.budget.unit_dropped()
+                emit({"type": "log", "message": "Job time budget reached while waiting for a query slot.", "tab": tab.index})
+                tab.unit = None
+                tab.state, tab.ready_at = "done", float("inf")
+                return
+            tab.session = self.open_session(tab.unit)
+            scraper.driver.switch_to.window(tab.handle)
+            if scraper.feed:
+                scraper.feed.reset(tab.handle)
+            url = "https://duckduckgo.com/?" + urlencode({"q": tab.session.query})
+            scraper.driver.execute_script("window.location.href = arguments[0];", url)
+            tab.state, tab.deadline, tab.ready_at = "loading", now + TAB_LOAD_TIMEOUT_SEC, now + TAB_POLL_SEC
+            return
+
+        driver = scraper.driver
+        driver.switch_to.window(tab.handle)
+        session = tab.session
+        if tab.state == "loading":
+            if driver.execute_script(RESULTS_READY_SCRIPT, RESULT_SELECTOR, session.query):
+                tab.state, tab.ready_at = "harvest", now + TAB_SETTLE_SEC
+            elif now >= tab.deadline:
+                if page_blocked(driver):
+                    scraper.metrics.inc("scraper_block_events_total")
+                    emit({"type": "log", "message": f"Search looks blocked (bot challenge) for: {session.query}"})
+                    self.release(tab, record_yield=False)
+                else:
+                    self.release(tab)
+            else:
+                tab.ready_at = now + TAB_POLL_SEC
+        elif tab.state == "harvest":
+            results, skipped = scraper.harvest(tab.handle)
+            new_items, new_contacts = session.absorb(results, skipped)
+            stop_reason = session.end_pass(new_items, new_contacts)
+            if scraper.stop.requested:
+                return
+            if stop_reason:
+                emit({"type": "log", "message": f"{stop_reason} Moving next.", "tab": tab.index})
+                self.release(tab)
+                return
+            emit({"type": "log", "message": f"{session.progress_message()} Loading more...", "tab": tab.index})
+            tab.height = driver.execute_script(SCROLL_SCRIPT)
+            tab.retried = False
+            tab.state, tab.ready_at = "scrolling", time.time() + TAB_SCROLL_WAIT_SEC
+        elif tab.state == "scrolling":
+            if driver.execute_script("return document.body.scrollHeight") != tab.height:
+                tab.state, tab.ready_at = "harvest", now
+            elif not tab.retried:
+                # Same second chance as the serial crawl: scroll again and give it 2s more
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                tab.retried, tab.ready_at = True, now + 2
+            else:
+                self.release(tab)
+
+    def release(self, tab, record_yield=True):
+        """Finishes the tab's query and parks the tab for a human-like pause."""
+        if record_yield:
+            tab.session.finish()
+        self.close_session(tab.session)
+        tab.unit = tab.session = None
+        tab.state, tab.ready_at = "idle", time.time() + random.uniform(3, 7)
+
+    def fail(self, tab, error):
+        scraper = self.scraper
+        query = tab.session.query if tab.session else tab.unit
+        emit({"type": "log", "message": f"Error searching {query}: {str(error)}"})
+        if tab.session:
+            self.release(tab, record_yield=False)
+        else:
+            tab.unit = None
+            tab.state = "idle"
+        if "HTTPConnectionPool" in str(error) or "Connection refused" in str(error):
+            # The browser is gone: restart it and rerun the queries other tabs had open
+            for other in self.tabs:
+                if other.unit is not None:
+                    self.requeued.append(other.unit)
+                if other.session is not None and self.drop_session:
+                    self.drop_session(other.session)
+                if other.state != "done":
+                    other.unit = other.session = None
+                    other.state = "idle"
+            try:
+                emit({"type": "log", "message": "Browser lost connection. Restarting..."})
+                scraper.metrics.inc("scraper_driver_restarts_total")
+                scraper.setup_driver()
+                self.open_tabs()
+            except Exception:
+                pass
+
+
+class CityFiles:
+    """Lead writers of the cities a crawl is visiting, at most `max_open` at a time.
+
+    When the cap is reached the least recently used city without a query in
+    flight is closed; its next unit reopens the files in append mode.
+    """
+
+    def __init__(self, scraper, files, max_open=MAX_OPEN_CITIES):
+        self.scraper = scraper
+        self.files = files
+        self.max_open = max(1, int(max_open))
+        self._open = OrderedDict()
+        self._busy = Counter()
+
+    def acquire(self, city):
+        """Returns (lead_writer, email_file_path, saved_count) for a city; pair with `release`."""
+        state = self._open.pop(city, None)
+        if state is None:
+            self._evict()
+            state = self.scraper.open_city_files(city, self.files)
+        self._open[city] = state
+        self._busy[city] += 1
+        return state
+
+    def release(self, city):
+        self._busy[city] -= 1
+        if self._busy[city] <= 0:
+            del self._busy[city]
+
+    def _evict(self):
+        while len(self._open) >= self.max_open:
+            idle = next((city for city in self._open if not self._busy[city]), None)
+            if idle is None:
+                return
+            self._open.pop(idle)[0].close()
+
+    def close(self):
+        for lead_writer, _, _ in self._open.values():
+            lead_writer.close()
+        self._open.clear()
 
-def sanitize_file_name(value):
-    return "".join(ch if ch.isalnum() or ch in "_-" else "_" for ch in value)
 
 class DDGMultiNicheScraper:
     def __init__(self, config):
         self.config = config
         self.driver = None
-        self.output_dir = Path(config["outputDir"])
+        # With a shard spec ("i/n") this process only crawls its slice of the grid
+        self.shard = parse_shard(config.get("shard"))
+        self.output_dir = shard_output_dir(config["outputDir"], self.shard)
         self.country = config["country"]
+        # Extra countries whose phone numbers are tagged in the same scan (regional jobs)
+        self.countries = list(dict.fromkeys([self.country] + list(config.get("countries") or [])))
         self.cities = config["cities"]
         self.niches = config["niches"]
         
@@ -76,17 +537,267 @@ class DDGMultiNicheScraper:
         # Progress tracking file
         self.progress_file = self.output_dir / "scrape_progress.json"
         
-        # Email tracking to prevent duplicates in this job run
-        self.seen_emails = set()
+        # One crawl runs every extractor the scrape mode needs ("emails", "phones" or "both")
+        self.scrape_mode = config.get("scrapeMode") or "emails"
+        self.extractors = build_extractors(
+            self.scrape_mode, self.country, config.get("extractSocial"), countries=self.countries
+        )
+        self.contact_clause = build_contact_clause(self.extractors)
+
+        # Contact files; each extractor keeps its own dedup state for this job
         self.all_emails_file = self.output_dir / "all_emails.txt"
+        self.all_phones_file = self.output_dir / "all_phones.txt"
+        self.social_file = self.output_dir / "social_handles.txt"
 
-    def setup_driver(self):
-        """Launches a stealthy Chrome browser matching lead.py setup."""
+        # Optional compressed rolling segments for the (large) lead text files
+        self.compress_output = config.get("compressOutput")
+        self.segment_max_bytes = config.get("segmentMaxBytes")
+
+        # In-page contact prefilter ("email", "contacts", a regex, or empty to keep every result)
+        phone_extractor = self.extractor("phone")
+        self.prefilter_pattern = resolve_prefilter(
+            config.get("prefilter"), phone_extractor.engine.prefilter_source if phone_extractor else None
+        )
+
+        # Optional record of every harvested batch, for offline re-extraction (--replay)
+        archive_codec = config.get("archiveSerp")
+        self.archive = None
+        if archive_codec:
+            self.archive = SerpArchive(
+                self.output_dir, "gzip" if archive_codec is True else archive_codec, self.segment_max_bytes
+            )
+
+        # Units a previous phase (the Google scraper) already finished; the fallback only crawls the rest
+        self.completed_units = load_completed_units(config.get("completedUnitsFile"), self.scrape_mode)
+        self.units_file = self.output_dir / COMPLETED_UNITS_FILE
+
+        # Contacts-per-query history shared by every job under the output root
+        self.yield_stats = YieldStats(config.get("yieldStatsFile") or default_stats_path(config["outputDir"]))
+        self.city_populations = config.get("cityPopulations") or {}
+
+        # Optional staged pipeline: browser -> extraction threads -> one writer thread
+        self.pipeline_workers = int(config.get("pipelineWorkers") or 0)
+        self.pipeline = None
+
+        # Read results from DuckDuckGo's JSON feed via CDP, with the DOM as fallback
+        self.serp_feed = config.get("serpFeed")
+        self.feed = None
+
+        # Queries multiplexed over this many tabs of the one browser (1 = classic serial crawl)
+        self.tabs = max(1, int(config.get("tabs") or 1))
+
+        # Host-wide query pacing shared with every other scraper process
+        self.governor = None
+        if config.get("rateGovernor", True):
+            self.governor = RateGovernor.from_config(config, Path(config["outputDir"]).name)
+
+        # Optional MinHash/LSH clustering of leads that repeat under other URLs (nearDuplicates: true or a threshold)
+        near_duplicates = config.get("nearDuplicates")
+        self.near_duplicates = None
+        if near_duplicates:
+            self.near_duplicates = NearDuplicateIndex.load(
+                self.output_dir / INDEX_FILE, DEFAULT_THRESHOLD if near_duplicates is True else near_duplicates
+            )
+
+        # Optional background fetch of result pages whose snippet lacked a contact kind
+        self.enrich = config.get("enrich")
+        self.enricher = None
+
+        # In-query progress (links harvested, scroll depth) so a restarted query fast-forwards
+        self.checkpoints = QueryCheckpoints(self.output_dir, config.get("checkpointIntervalSec"))
+
+        # Optional maxDurationSec / maxQueries budget: limits scroll depth and, if needed, samples cities
+        self.budget = JobBudget.from_config(config, self.output_dir, self.tabs, self.governor)
+
+        # Counters/histograms, optionally exported on metricsPort or to outputDir/metrics.prom
+        worker = Path(config["outputDir"]).name + (f"/shard_{self.shard[0]}_of_{self.shard[1]}" if self.shard else "")
+        self.metrics = metrics_from_config(config, self.output_dir, {"worker": worker, "scraper": "ddg"})
+
+        # (Re)starts reuse a pre-patched chromedriver and a clone of a warm profile
+        self.browser_cache = None
+        if config.get("browserCache", True):
+            self.browser_cache = BrowserCache(CHROME_VERSION_MAIN, config.get("browserCacheDir"))
+
+        # Set by SIGTERM/SIGINT; checked between results so a stop is never mid-write
+        self.stop = StopSignal()
+        # Set by a `pause` control message; checked before each query
+        self.pause = PauseSignal()
+
+    def on_control(self, message):
+        """Applies a control message from Node: pause, resume, cancel or rate."""
+        kind = message.get("type")
+        if kind == "pause":
+            self.pause.set()
+            emit({"type": "paused", "message": "Paused; the queries already running finish first."})
+        elif kind == "resume":
+            self.pause.clear()
+            emit({"type": "resumed", "message": "Resumed."})
+        elif kind == "cancel":
+            self.stop.signal_name = "cancel"
+            self.stop.set()
+        elif kind == "rate":
+            try:
+                queries_per_minute = float(message["queriesPerMinute"])
+            except (KeyError, TypeError, ValueError):
+                queries_per_minute = 0
+            if queries_per_minute <= 0:
+                emit({"type": "log", "message": f"Ignored rate change without a positive queriesPerMinute: {message}"})
+                return
+            if not self.governor:
+                self.governor = RateGovernor.from_config(self.config, Path(self.config["outputDir"]).name)
+            # Written to the shared bucket under its lock, so it applies to every job on this host
+            self.governor.set_rate(queries_per_minute)
+            if self.budget:
+                self.budget.min_query_sec = 60.0 / queries_per_minute
+            emit({
+                "type": "rate-changed",
+                "queriesPerMinute": queries_per_minute,
+                "message": f"Query rate set to {queries_per_minute:g} per minute.",
+            })
+        else:
+            emit({"type": "log", "message": f"Unknown control message: {kind}"})
+
+    def extractor(self, kind):
+        for extractor in self.extractors:
+            if extractor.kind == kind:
+                return extractor
+        return None
+
+    def phone_file_for(self, country):
+        return self.output_dir / f"{sanitize_file_name(country)}_phones.txt"
+
+    def contact_files(self, email_file_path):
+        """File names each contact kind is written to, for job file listings."""
+        files = []
+        for extractor in self.extractors:
+            if extractor.kind == "email":
+                files += [email_file_path.name, self.all_emails_file.name]
+            elif extractor.kind == "phone":
+                files += [self.phone_file_for(c).name for c in self.countries] + [self.all_phones_file.name]
+            elif extractor.kind == "social":
+                files.append(self.social_file.name)
+        return files
+
+    def load_seen_contacts(self):
+        """Seeds extractor dedup state from existing files so resumes never re-save contacts."""
+        sources = {
+            "email": [(self.all_emails_file, None)],
+            "phone": [(self.phone_file_for(c), c) for c in self.countries] + [(self.all_phones_file, self.country)],
+            "social": [(self.social_file, None)],
+        }
+        for extractor in self.extractors:
+            for path, country in sources[extractor.kind]:
+                if not path.exists():
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        value = line.strip()
+                        if not value:
+                            continue
+                        if extractor.kind == "phone":
+                            value = to_e164(value, country)
+                            if not value: continue
+                        extractor.remember(value)
+
+    def save_contact(self, kind, value, city, niche, site, title, email_file_path, country=None):
+        """Appends a new contact to its files and reports it to the server."""
+        self.metrics.inc("scraper_contacts_new_total", kind=kind)
+        if kind == "email":
+            # Update city-specific email file and global all_emails.txt
+            for path in (email_file_path, self.all_emails_file):
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(value + "\n")
+            emit({"type": "log", "message": f"Found New Email: {value}"})
+        elif kind == "phone":
+            country = country or self.country
+            phone_file = self.phone_file_for(country)
+            for path in (phone_file, self.all_phones_file):
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(value + "\n")
+            emit({
+                "type": "phone-saved",
+                "phone": value,
+                "country": country,
+                "city": city,
+                "niche": niche,
+                "site": site,
+                "title": title,
+                "phoneFileName": phone_file.name,
+                "allPhonesFileName": self.all_phones_file.name,
+                "message": f"[Phone] Saved: {value}"
+            })
+        elif kind == "social":
+            with open(self.social_file, "a", encoding="utf-8") as f:
+                f.write(value + "\n")
+            emit({"type": "log", "message": f"Found New Social Handle: {value}"})
+
+    def find_contacts(self, text, city=None):
+        """Runs every extractor over one result; returns ({kind: values}, {phone: country}).
+
+        Touches no dedup state, so extraction threads may call it concurrently.
+        """
+        found = {}
+        countries = {}
+        for extractor in self.extractors:
+            if extractor.kind == "phone":
+                tagged = extractor.extract_tagged(text, city)
+                countries = dict(tagged)
+                values = [phone for phone, _ in tagged]
+            else:
+                values = extractor.extract(text)
+            if values:
+                found[extractor.kind] = values
+        return found, countries
+
+    def save_contacts(self, found, countries, city, niche, site, title, email_file_path):
+        """Dedups and saves found contacts; returns the new contact count."""
+        new_contacts = 0
+        for extractor in self.extractors:
+            for value in found.get(extractor.kind, ()):
+                if extractor.remember(value):
+                    self.save_contact(
+                        extractor.kind, value, city, niche, site, title, email_file_path, countries.get(value)
+                    )
+                    new_contacts += 1
+        return new_contacts
+
+    def extract_contacts(self, text, city, niche, site, title, email_file_path):
+        """Runs every extractor over one result; returns ({kind: values}, new contact count)."""
+        found, countries = self.find_contacts(text, city)
+        return found, self.save_contacts(found, countries, city, niche, site, title, email_file_path)
+
+    def chrome_options(self):
         options = uc.ChromeOptions()
         options.add_argument("--headless=new")
         options.add_argument("--window-size=1920,1080")
         options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
-        self.driver = uc.Chrome(options=options, version_main=145)
+        if self.tabs > 1:
+            # Background tabs must keep loading and running scripts at full speed
+            options.add_argument("--disable-background-timer-throttling")
+            options.add_argument("--disable-renderer-backgrounding")
+            options.add_argument("--disable-backgrounding-occluded-windows")
+        if self.serp_feed:
+            FeedCapture.enable(options)
+        return options
+
+    def setup_driver(self):
+        """Launches a stealthy Chrome browser matching lead.py setup."""
+        self.driver, seconds, how = start_chrome(self.chrome_options, CHROME_VERSION_MAIN, self.browser_cache)
+        self.metrics.set("scraper_driver_start_seconds", round(seconds, 3))
+        emit({"type": "log", "message": f"Browser started in {seconds:.1f}s ({how} start)."})
+        if self.serp_feed:
+            self.feed = FeedCapture(self.driver)
+
+    def harvest(self, handle=None):
+        """Returns (results, skipped) from the captured results feed when there is one, else from the DOM."""
+        if self.feed:
+            try:
+                batch = self.feed.harvest(self.prefilter_pattern, handle)
+            except Exception:
+                batch = None
+            if batch is not None:
+                return batch
+        return harvest_results(self.driver, self.prefilter_pattern)
 
     def load_progress(self):
         """Resumes from where it left off."""
@@ -106,8 +817,10 @@ class DDGMultiNicheScraper:
             "site_idx": site_idx,
             "timestamp": time.strftime('%Y-%m-%d %H:%M:%S')
         }
-        with open(self.progress_file, "w") as f:
+        tmp_file = self.progress_file.with_name(self.progress_file.name + ".tmp")
+        with open(tmp_file, "w") as f:
             json.dump(data, f)
+        os.replace(tmp_file, self.progress_file)
 
     def load_more_results(self):
         """Tries to scroll down or click the 'More Results' button."""
@@ -116,23 +829,23 @@ class DDGMultiNicheScraper:
             
             # 1. Scroll to bottom
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3) 
+            if self.stop.wait(3): return False
             
             # 2. Try to click "More Results" button if it exists
             try:
                 more_btn = self.driver.find_element(By.ID, "more-results")
                 if more_btn.is_displayed():
                     self.driver.execute_script("arguments[0].click();", more_btn)
-                    time.sleep(3) 
+                    if self.stop.wait(3): return False
             except:
                 pass 
             
             # 3. Check if new content loaded
             new_height = self.driver.execute_script("return document.body.scrollHeight")
             if new_height == last_height:
-                time.sleep(2)
+                if self.stop.wait(2): return False
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+                if self.stop.wait(2): return False
                 final_height = self.driver.execute_script("return document.body.scrollHeight")
                 if final_height == last_height:
                     return False 
@@ -141,18 +854,180 @@ class DDGMultiNicheScraper:
         except:
             return False
 
-    def scrape_single_query(self, query, city, niche, site, file_path, email_file_path, saved_count):
-        """Performs the search on DuckDuckGo and extracts results and emails."""
+    def prepare_result(self, result, city=None):
+        """Extraction stage: cleans one harvested result and runs the extractors over it."""
+        title = result["title"]
+        details = result["text"].replace(title, "").replace("\n", " ").strip()
+        # --- Contact Extraction (every extractor, one pass) ---
+        found, countries = self.find_contacts(f"{title} {details}", city)
+        prepared = {"href": result["href"], "title": title, "details": details, "found": found, "countries": countries}
+        if self.near_duplicates:
+            prepared["signature"] = self.near_duplicates.signature(f"{title} {details}")
+        return prepared
+
+    def save_result(self, result, city, niche, site, lead_writer, email_file_path, total_saved):
+        """Extracts contacts from one harvested result, writes its lead entry and reports it.
+
+        `total_saved` is the lead count of the city file including this result.
+        Returns the number of new contacts found.
+        """
+        return self.write_result(self.prepare_result(result, city), city, niche, site, lead_writer, email_file_path, total_saved)
+
+    def _pipeline_write(self, prepared, query_state):
+        if query_state["yield_policy"].reached_result_cap(query_state["saved"]):
+            return 0
+        new_contacts = self.write_result(
+            prepared, query_state["city"], query_state["niche"], query_state["site"],
+            query_state["lead_writer"], query_state["email_file_path"],
+            query_state["base"] + query_state["saved"] + 1
+        )
+        query_state["saved"] += 1
+        return new_contacts
+
+    def write_result(self, prepared, city, niche, site, lead_writer, email_file_path, total_saved):
+        """Writer stage: dedups and saves the contacts of a prepared result, then its lead entry."""
+        started = time.perf_counter()
+        href, title, details = prepared["href"], prepared["title"], prepared["details"]
+        found = prepared["found"]
+        new_contacts = self.save_contacts(
+            found, prepared["countries"], city, niche, site, title, email_file_path
+        )
+        emails = found.get("email")
+        phones = found.get("phone")
+        email = emails[0] if emails else None
+
+        # Save full result
+        entry = (
+            f"[RESULT] [{niche.upper()}] - {city} [{site}]\n"
+            f"Title:      {title}\n"
+            f"Details:    {details}\n"
+            f"Link:       {href}\n"
+        )
+        if phones:
+            entry += f"Phones:     {', '.join(phones)}\n"
+        if found.get("social"):
+            entry += f"Social:     {', '.join(found['social'])}\n"
+        cluster, duplicate = None, False
+        if self.near_duplicates:
+            cluster, duplicate = self.near_duplicates.add(prepared.get("signature"))
+            if cluster is not None:
+                entry += f"Cluster:    {cluster}{' (near-duplicate)' if duplicate else ''}\n"
+            if duplicate:
+                self.metrics.inc("scraper_near_duplicates_total")
+
+        lead_writer.write(entry + f"{'-' * 50}\n")
+
+        # Log success to server
+        payload = {
+            "type": "lead-saved",
+            "title": title,
+            "city": city,
+            "niche": niche,
+            "site": site,
+            "fileName": lead_writer.name,
+            "totalSavedForFile": total_saved,
+            "message": f"Saved: {title[:30]}..."
+        }
+        if email:
+            payload["emailFileName"] = email_file_path.name
+            payload["allEmailsFileName"] = "all_emails.txt"
+            payload["email"] = email
+        if phones:
+            payload["phoneFileName"] = self.phone_file_for(prepared["countries"].get(phones[0], self.country)).name
+            payload["allPhonesFileName"] = self.all_phones_file.name
+        if cluster is not None:
+            payload["clusterId"] = cluster
+            payload["nearDuplicate"] = duplicate
+
+        emit(payload)
+        if self.enricher and any(not found.get(e.kind) for e in self.extractors if e.kind != "social"):
+            self.enricher.submit(href, {
+                "href": href, "title": title, "city": city, "niche": niche, "site": site,
+                "email_file_path": email_file_path,
+            })
+        self.apply_enrichment()
+        self.metrics.observe("scraper_write_latency_seconds", time.perf_counter() - started)
+        self.metrics.set("scraper_last_progress_timestamp_seconds", round(time.time()))
+        return new_contacts
+
+    def apply_enrichment(self):
+        """Writer stage: saves contacts found on result pages and records them against their leads."""
+        if not self.enricher:
+            return
+        for context, url, found, countries in self.enricher.drain():
+            title = context["title"]
+            new_contacts = self.save_contacts(
+                found, countries, context["city"], context["niche"], context["site"], title, context["email_file_path"]
+            )
+            record = {
+                "link": context["href"], "url": url, "title": title,
+                "city": context["city"], "niche": context["niche"], "site": context["site"],
+                "found": found, "newContacts": new_contacts,
+            }
+            try:
+                with open(self.output_dir / ENRICHMENT_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                emit({"type": "log", "message": f"Could not record enrichment: {e}"})
+            self.metrics.inc("scraper_leads_enriched_total")
+            emit({
+                "type": "lead-enriched",
+                "title": title,
+                "city": context["city"],
+                "niche": context["niche"],
+                "site": context["site"],
+                "link": context["href"],
+                "found": found,
+                "newContacts": new_contacts,
+                "message": f"Enriched: {title[:30]}... (+{new_contacts} contacts)",
+            })
+
+    def save_near_duplicates(self):
+        if not self.near_duplicates:
+            return
+        try:
+            self.near_duplicates.save(self.output_dir / INDEX_FILE)
+        except OSError as e:
+            emit({"type": "log", "message": f"Could not save the near-duplicate index: {e}"})
+
+    def record_yield(self, city, niche, site, contacts, results, started):
+        try:
+            self.yield_stats.record(
+                site, niche, city_size(city, self.city_populations), contacts, results, time.time() - started
+            )
+        except OSError as e:
+            emit({"type": "log", "message": f"Could not update yield stats: {e}"})
+
+    def scrape_single_query(self, query, city, niche, site, lead_writer, email_file_path, saved_count):
+        """Performs the search on DuckDuckGo and extracts results and emails.
+
+        Returns None when the job budget ran out while waiting, so the query never ran.
+        """
+        if self.pause.hold(self.stop): return 0
+        if self.governor:
+            waited = self.governor.acquire(self.stop)
+            if waited is None: return 0
+            if waited >= 1:
+                emit({"type": "log", "message": f"Waited {waited:.0f}s for a host-wide query slot."})
+        if self.budget and self.budget.out_of_time():
+            self.budget.unit_dropped()
+            emit({"type": "log", "message": f"Job time budget reached while waiting; skipping: {query}"})
+            return None
         emit({"type": "search-query", "query": query, "message": f"Searching: {query}"})
-        
+        self.metrics.inc("scraper_queries_total")
+        started = time.time()
+
         try:
             # Check if driver is still responsive
             try:
                 self.driver.title
             except Exception:
                 emit({"type": "log", "message": "Browser lost connection. Restarting..."})
+                self.metrics.inc("scraper_driver_restarts_total")
                 self.setup_driver()
 
+            if self.feed:
+                self.feed.reset()
             self.driver.get("https://duckduckgo.com/")
             
             # 1. Search Box
@@ -170,216 +1045,415 @@ class DDGMultiNicheScraper:
                 )
                 time.sleep(2)
             except:
+                if page_blocked(self.driver):
+                    self.metrics.inc("scraper_block_events_total")
+                    emit({"type": "log", "message": f"Search looks blocked (bot challenge) for: {query}"})
+                else:
+                    self.record_yield(city, niche, site, 0, 0, started)
                 return 0
 
-            scraped_links = set() 
-            total_saved_for_query = 0
             page_exhausted = False
-            consecutive_no_new_results = 0 
-            
+            session = QuerySession(self, query, city, niche, site, lead_writer, email_file_path, saved_count, started)
+
             while not page_exhausted:
-                # 1. Grab all currently visible results
-                results = self.driver.find_elements(By.CSS_SELECTOR, "li[data-layout='organic'], article")
-                if not results:
-                     break
-
-                new_items_this_pass = False
-                
-                # 2. Iterate through visible results
-                for result in results:
-                    try:
-                        link_el = result.find_element(By.CSS_SELECTOR, "a[data-testid='result-title-a']")
-                        href = link_el.get_attribute("href")
-                        title = link_el.text
-
-                        if not href or href in scraped_links: continue
-                        
-                        scraped_links.add(href)
-                        
-                        full_text = result.text
-                        details = full_text.replace(title, "").replace("\n", " ").strip()
-                        
-                        # --- Email Extraction ---
-                        email = extract_email(title) or extract_email(details)
-                        if email:
-                            email_lower = email.lower()
-                            if email_lower not in self.seen_emails:
-                                self.seen_emails.add(email_lower)
-                                # Update city-specific email file
-                                with open(email_file_path, "a", encoding="utf-8") as ef:
-                                    ef.write(email + "\n")
-                                # Update global all_emails.txt
-                                with open(self.all_emails_file, "a", encoding="utf-8") as af:
-                                    af.write(email + "\n")
-                                
-                                emit({
-                                    "type": "log",
-                                    "message": f"Found New Email: {email}"
-                                })
-
-                        # Save full result
-                        entry = (
-                            f"[RESULT] [{niche.upper()}] - {city} [{site}]\n"
-                            f"Title:      {title}\n"
-                            f"Details:    {details}\n"
-                            f"Link:       {href}\n"
-                            f"{'-' * 50}\n"
-                        )
-                        
-                        with file_path.open("a", encoding="utf-8") as f:
-                            f.write(entry)
-
-                        total_saved_for_query += 1
-                        new_items_this_pass = True
-                        
-                        # Log success to server
-                        payload = {
-                            "type": "lead-saved",
-                            "title": title,
-                            "city": city,
-                            "niche": niche,
-                            "site": site,
-                            "fileName": file_path.name,
-                            "totalSavedForFile": saved_count + total_saved_for_query,
-                            "message": f"Saved: {title[:30]}..."
-                        }
-                        if email:
-                            payload["emailFileName"] = email_file_path.name
-                            payload["allEmailsFileName"] = "all_emails.txt"
-                            payload["email"] = email
-
-                        emit(payload)
-                        
-                    except Exception:
-                        continue
-                
-                # 3. Handle Pagination / Scrolling
-                if not new_items_this_pass:
-                    consecutive_no_new_results += 1
+                # 1. Harvest results not seen yet on this page (one round trip)
+                results, skipped = self.harvest()
+                more_content_loaded = None
+
+                if self.pipeline:
+                    # 2. Queue the results; extraction and writing run while the browser scrolls
+                    batch = session.submit(results, skipped)
+                    if not self.stop.requested:
+                        more_content_loaded = self.load_more_results()
+                    new_items_this_pass, new_contacts_this_pass = session.collect(batch, skipped)
                 else:
-                    consecutive_no_new_results = 0
+                    # 2. Iterate through the harvested results
+                    new_items_this_pass, new_contacts_this_pass = session.absorb(results, skipped)
+
+                # 3. Handle Pagination / Scrolling
+                stop_reason = session.end_pass(new_items_this_pass, new_contacts_this_pass)
+                if self.stop.requested: break
+                if stop_reason:
+                    emit({"type": "log", "message": f"{stop_reason} Moving next."})
+                    break
 
-                emit({"type": "log", "message": f"Total found: {total_saved_for_query}. Loading more..."})
-                more_content_loaded = self.load_more_results()
+                if self.pipeline:
+                    depths = self.pipeline.take_peaks()
+                    emit({
+                        "type": "log",
+                        "message": f"{session.progress_message()} Peak queue depths: extract {depths['extract']}, write {depths['write']}.",
+                        "queueDepths": depths,
+                    })
+                else:
+                    emit({"type": "log", "message": f"{session.progress_message()} Loading more..."})
+                if more_content_loaded is None:
+                    more_content_loaded = self.load_more_results()
 
                 if not more_content_loaded:
                     page_exhausted = True
-                
-                if consecutive_no_new_results >= 5:
-                    emit({"type": "log", "message": "Scrolled 5 times with no new results. Moving next."})
-                    break
 
-            return total_saved_for_query
+            return session.finish()
 
         except Exception as e:
             emit({"type": "log", "message": f"Error searching {query}: {str(e)}"})
             # Try to restart driver for the next query if it seems dead
             if "HTTPConnectionPool" in str(e) or "Connection refused" in str(e):
                 try:
+                    self.metrics.inc("scraper_driver_restarts_total")
                     self.setup_driver()
                 except:
                     pass
             return 0
 
-    def run(self):
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.setup_driver()
+    def open_city_files(self, city, files):
+        """Opens a city's lead writer and contact files; returns (lead_writer, email_file_path, saved_count)."""
+        sanitized_city = sanitize_file_name(city)
+        file_name = f"{sanitize_file_name(self.country)}_{sanitized_city}_leads.txt"
+        email_file_name = f"{sanitize_file_name(self.country)}_{sanitized_city}_emails.txt"
 
-        # Initialize all_emails.txt if not exists
-        if not self.all_emails_file.exists():
-            self.all_emails_file.write_text("", encoding="utf-8")
-        else:
-            # Load existing emails to seen_emails to prevent duplicates across resumes
-            with open(self.all_emails_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    email = line.strip().lower()
-                    if email:
-                        self.seen_emails.add(email)
-
-        expanded_niches = expand_niches(self.niches)
-        
-        # Load previous state
-        state = self.load_progress()
-        start_city_idx = state['city_idx']
-        start_niche_idx = state['niche_idx']
-        start_site_idx = state['site_idx']
+        file_path = self.output_dir / file_name
+        email_file_path = self.output_dir / email_file_name
 
-        emit({
-            "type": "job-start",
-            "message": f"Resuming from City #{start_city_idx}, Niche #{start_niche_idx}"
-        })
+        lead_writer = open_writer(file_path, self.compress_output, self.segment_max_bytes)
+        if not lead_writer.exists():
+            lead_writer.write(f"--- LEADS FOR {city}, {self.country} ---\n\n")
+        if self.extractor("email") and not email_file_path.exists():
+            email_file_path.write_text("", encoding="utf-8")
+
+        if self.compress_output:
+            file_name = manifest_path(file_path).name
+        for name in [file_name] + self.contact_files(email_file_path):
+            if name not in files: files.append(name)
+
+        # Simple line count for 'saved_count' (approximate)
+        saved_count = sum(1 for line in iter_lines(file_path) if "[RESULT]" in line)
+        return lead_writer, email_file_path, saved_count
+
+    def replay(self, archive_path):
+        """Re-runs extraction and writing over a SERP archive, without a browser.
+
+        Emits the same search-query / lead-saved / *-saved events as a crawl, so
+        an improved extractor can be applied to past jobs at disk speed.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.extractor("email") and not self.all_emails_file.exists():
+            self.all_emails_file.write_text("", encoding="utf-8")
+        self.load_seen_contacts()
+        emit({"type": "job-start", "message": f"Replaying SERP archive {archive_path}"})
 
         files = []
+        cities = {}
+        current_query = None
+        scraped_links = set()
+        corrupt = 0
+        for record, ok in iter_archive(archive_path):
+            if not ok:
+                corrupt += 1
+                continue
+            city, niche, site = record["city"], record["niche"], record["site"]
+            if city not in cities:
+                lead_writer, email_file_path, saved_count = self.open_city_files(city, files)
+                cities[city] = [lead_writer, email_file_path, saved_count]
+            state = cities[city]
+
+            query_key = (record["query"], city, niche, site)
+            if query_key != current_query:
+                current_query = query_key
+                scraped_links = set()
+                emit({"type": "search-query", "query": record["query"], "message": f"Searching: {record['query']}"})
+
+            for result in record["results"]:
+                href = result.get("href")
+                if not href or href in scraped_links: continue
+                scraped_links.add(href)
+                try:
+                    self.save_result(result, city, niche, site, state[0], state[1], state[2] + 1)
+                    state[2] += 1
+                except Exception:
+                    continue
 
-        # --- MAIN LOOP ---
+        for lead_writer, _, _ in cities.values():
+            lead_writer.close()
+        self.save_near_duplicates()
+        if corrupt:
+            emit({"type": "log", "message": f"Skipped {corrupt} archived batches whose content hash did not match."})
+        emit({"type": "job-complete", "files": files, "message": "Replay completed."})
+
+    def crawl_grid(self, expanded_niches, files, start_city_idx, start_niche_idx, start_site_idx):
+        """Crawls units in config order, checkpointing city/niche/site indexes."""
         for c_idx, city in enumerate(self.cities):
             if c_idx < start_city_idx: continue
 
-            sanitized_city = sanitize_file_name(city)
-            file_name = f"{sanitize_file_name(self.country)}_{sanitized_city}_leads.txt"
-            email_file_name = f"{sanitize_file_name(self.country)}_{sanitized_city}_emails.txt"
-            
-            file_path = self.output_dir / file_name
-            email_file_path = self.output_dir / email_file_name
-
-            if not file_path.exists():
-                file_path.write_text(f"--- LEADS FOR {city}, {self.country} ---\n\n", encoding="utf-8")
-            if not email_file_path.exists():
-                email_file_path.write_text("", encoding="utf-8")
-            
-            if file_name not in files: files.append(file_name)
-            if email_file_name not in files: files.append(email_file_name)
-            if "all_emails.txt" not in files: files.append("all_emails.txt")
-            
-            # Simple line count for 'saved_count' (approximate)
-            saved_count = 0
-            if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    saved_count = sum(1 for line in f if "[RESULT]" in line)
+            lead_writer, email_file_path, saved_count = self.open_city_files(city, files)
 
             for n_idx, niche in enumerate(expanded_niches):
                 if c_idx == start_city_idx and n_idx < start_niche_idx: continue
 
                 for s_idx, site in enumerate(self.sites):
                     if c_idx == start_city_idx and n_idx == start_niche_idx and s_idx < start_site_idx: continue
+                    if not unit_in_shard(self.shard, city, niche, site): continue
+                    if unit_key(city, niche, site) in self.completed_units: continue
 
                     # Construct precise query
-                    query = build_site_targeted_query(niche, city, "", site)
+                    query = build_site_targeted_query(niche, city, "", site, self.contact_clause)
                     
-                    self.scrape_single_query(query, city, niche, site, file_path, email_file_path, saved_count)
+                    self.scrape_single_query(query, city, niche, site, lead_writer, email_file_path, saved_count)
+
+                    if self.stop.requested:
+                        # The query may be cut short: checkpoint it so a resume repeats it
+                        self.save_progress(c_idx, n_idx, s_idx)
+                        break
                     
                     # Save progress after every site search
                     self.save_progress(c_idx, n_idx, s_idx + 1)
+                    record_completed_unit(self.units_file, city, niche, site, self.scrape_mode)
+                    self.checkpoints.clear(unit_key(city, niche, site))
                     
                     # Random human delay (Stealth Mode)
                     sleep_time = random.uniform(3, 7)
-                    time.sleep(sleep_time)
+                    if self.stop.wait(sleep_time): break
 
+                if self.stop.requested: break
                 # Reset site index for next niche
                 self.save_progress(c_idx, n_idx + 1, 0)
 
+            lead_writer.close()
+            if self.archive:
+                self.archive.flush()
+            if self.stop.requested: break
             # Reset niche index for next city
             self.save_progress(c_idx + 1, 0, 0)
 
-        if self.driver:
-            self.driver.quit()
+    def pending_units(self, expanded_niches):
+        """Yields this shard's (city, niche, site, size) units in config order, minus completed ones."""
+        done = self.completed_units | load_completed_units(self.units_file, self.scrape_mode)
+        for city in self.cities:
+            for niche in expanded_niches:
+                for site in self.sites:
+                    if unit_in_shard(self.shard, city, niche, site) and unit_key(city, niche, site) not in done:
+                        yield city, niche, site, city_size(city, self.city_populations)
+
+    def prioritized_units(self, expanded_niches):
+        """Ranks the pending units by expected contacts per second; materializes the list to rank it."""
+        ordered, skipped = prioritize_units(
+            list(self.pending_units(expanded_niches)),
+            self.yield_stats,
+            min_expected=self.config.get("minExpectedYield"),
+        )
+        emit({
+            "type": "log",
+            "message": f"Prioritized {len(ordered)} units by expected yield; skipped {skipped} low-yield units.",
+            "scheduledUnits": len(ordered),
+            "skippedUnits": skipped,
+        })
+        return ordered
+
+    def budget_units(self, units, sample=True):
+        """Fits the units into the job budget, announces the projected coverage and yields them while it lasts."""
+        units, projection = self.budget.plan(list(units), sample)
+        message = (
+            f"Budget covers {projection['plannedUnits']}/{projection['totalUnits']} units "
+            f"in {projection['plannedCities']}/{projection['totalCities']} cities"
+        )
+        if projection["passesPerQuery"]:
+            message += f" at up to {projection['passesPerQuery']} scroll passes per query"
+        message += f", about {format_duration(projection['projectedSec'])}."
+        emit({"type": "coverage-projection", **projection, "message": message})
+        return self.budget.iter_units(units)
+
+    def unit_finished(self):
+        """Reports the live ETA of a budgeted job after each unit."""
+        if not self.budget:
+            return
+        eta = self.budget.unit_done()
+        self.metrics.set("scraper_job_eta_seconds", eta["etaSec"])
+        emit({
+            "type": "job-eta",
+            **eta,
+            "message": f"ETA {format_duration(eta['etaSec'])}: {eta['completedUnits']}/{eta['plannedUnits']} units done.",
+        })
+
+    def crawl_units(self, units, files):
+        """Crawls units in the given order (ranked or budgeted).
+
+        Progress is the completed-units log, so a resume skips finished units
+        whatever order they ran in.
+        """
+        cities = CityFiles(self, files, self.config.get("maxOpenCities", MAX_OPEN_CITIES))
+        for city, niche, site, _ in units:
+            lead_writer, email_file_path, saved_count = cities.acquire(city)
+
+            query = build_site_targeted_query(niche, city, "", site, self.contact_clause)
+            saved = self.scrape_single_query(query, city, niche, site, lead_writer, email_file_path, saved_count)
+            cities.release(city)
+            if self.stop.requested or saved is None: break
+
+            record_completed_unit(self.units_file, city, niche, site, self.scrape_mode)
+            self.checkpoints.clear(unit_key(city, niche, site))
+            if self.archive:
+                self.archive.flush()
+            self.unit_finished()
+            # Random human delay (Stealth Mode)
+            if self.stop.wait(random.uniform(3, 7)): break
+
+        cities.close()
+
+    def crawl_tabs(self, units, files):
+        """Crawls units over several tabs of one browser (see TabScheduler).
+
+        Queries finish out of order, so progress is the completed-units log.
+        """
+        cities = CityFiles(self, files, self.config.get("maxOpenCities", MAX_OPEN_CITIES))
+
+        def open_session(unit):
+            city, niche, site = unit[:3]
+            lead_writer, email_file_path, saved_count = cities.acquire(city)
+            query = build_site_targeted_query(niche, city, "", site, self.contact_clause)
+            emit({"type": "search-query", "query": query, "message": f"Searching: {query}"})
+            self.metrics.inc("scraper_queries_total")
+            return QuerySession(self, query, city, niche, site, lead_writer, email_file_path, saved_count)
+
+        def close_session(session):
+            cities.release(session.city)
+            record_completed_unit(self.units_file, session.city, session.niche, session.site, self.scrape_mode)
+            self.checkpoints.clear(session.key)
+            if self.archive:
+                self.archive.flush()
+            self.unit_finished()
+
+        TabScheduler(
+            self, self.tabs, open_session, close_session, lambda session: cities.release(session.city)
+        ).run(units)
+        cities.close()
+
+    def run(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.stop.install()
+        if CHANNEL:
+            CHANNEL.listen(self.on_control)
+        self.setup_driver()
+        if self.enrich:
+            self.enricher = Enricher.from_config(self.config, self.find_contacts).start()
+        if self.pipeline_workers and self.tabs == 1:
+            self.pipeline = ResultPipeline(
+                lambda item: self.prepare_result(*item), self._pipeline_write, self.pipeline_workers, self.config.get("pipelineQueueSize")
+            ).start()
+
+        # Initialize all_emails.txt if not exists
+        if self.extractor("email") and not self.all_emails_file.exists():
+            self.all_emails_file.write_text("", encoding="utf-8")
+        # Load existing contacts to prevent duplicates across resumes
+        self.load_seen_contacts()
+
+        # Re-expanded lazily for every city so huge niche lists are never held in full
+        expanded_niches = Reiterable(lambda: iter_expand_niches(
+            self.niches,
+            taxonomy_path=self.config.get("nicheTaxonomy"),
+            depth=self.config.get("nicheExpansionDepth", 1),
+            max_per_niche=self.config.get("maxExpansionsPerNiche"),
+        ))
+        
+        # Load previous state
+        state = self.load_progress()
+        start_city_idx = state['city_idx']
+        start_niche_idx = state['niche_idx']
+        start_site_idx = state['site_idx']
+
+        job_start = {
+            "type": "job-start",
+            "message": f"Resuming from City #{start_city_idx}, Niche #{start_niche_idx}"
+        }
+        if self.shard:
+            job_start["shard"] = f"{self.shard[0]}/{self.shard[1]}"
+            job_start["message"] += f" (shard {job_start['shard']})"
+        if self.completed_units:
+            job_start["completedUnits"] = len(self.completed_units)
+            job_start["message"] += f", skipping {len(self.completed_units)} units already completed"
+        emit(job_start)
+
+        files = []
+
+        prioritize = self.config.get("prioritize")
+        if prioritize or self.budget or self.tabs > 1:
+            if prioritize:
+                units = self.prioritized_units(expanded_niches)
+            else:
+                units = self.pending_units(expanded_niches)
+            if self.budget:
+                # Ranked units lose their tail; config-ordered ones are thinned by city
+                units = self.budget_units(units, sample=not prioritize)
+            if self.tabs > 1:
+                self.crawl_tabs(units, files)
+            else:
+                self.crawl_units(units, files)
+        else:
+            self.crawl_grid(expanded_niches, files, start_city_idx, start_niche_idx, start_site_idx)
+
+        quit_driver(self.driver)
+        self.driver = None
+        if self.browser_cache:
+            self.browser_cache.cleanup()
+        if self.governor:
+            self.governor.release()
+        if self.pipeline:
+            self.pipeline.close()
+            self.pipeline = None
+        if self.enricher:
+            # Pages still loading get a bounded grace period; a stop cancels them
+            self.enricher.close(wait=not self.stop.requested, timeout=ENRICH_DRAIN_SEC)
+            self.apply_enrichment()
+            emit({"type": "log", "message": "Enrichment: {fetched} pages fetched, {enriched} with contacts, "
+                  "{skipped} skipped, {failed} failed.".format(**self.enricher.stats)})
+            self.enricher = None
+        if self.archive:
+            self.archive.close()
+        self.checkpoints.flush()
+        self.save_near_duplicates()
+        if self.budget:
+            self.budget.save()
+            if not self.stop.requested and self.budget.done < self.budget.planned:
+                emit({
+                    "type": "log",
+                    "message": f"Job budget used up after {self.budget.done}/{self.budget.planned} planned units.",
+                })
+        self.metrics.close()
+
+        if self.stop.requested:
+            emit({
+                "type": "log",
+                "message": f"Stopped by {self.stop.signal_name or 'request'}. Progress checkpointed; the job will resume from there."
+            })
+            return
 
         emit({"type": "job-complete", "files": files, "message": "Scraping completed."})
 
-def build_site_targeted_query(niche, city, area, site):
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes // 60}h {minutes % 60}m" if minutes >= 60 else f"{minutes}m {seconds}s"
+
+def build_site_targeted_query(niche, city, area, site, contact_clause=None):
     location_text = f"{area} {city}".strip() if area else city
-    email_clause = "(" + " OR ".join(f'"{term}"' for term in EMAIL_TERMS) + ")"
-    return f'site:{site} "{niche}" "{location_text}" {email_clause}'
+    if contact_clause is None:
+        contact_clause = "(" + " OR ".join(f'"{term}"' for term in EMAIL_TERMS) + ")"
+    return f'site:{site} "{niche}" "{location_text}" {contact_clause}'.rstrip()
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python scraper.py '<json-config>'", file=sys.stderr)
-        sys.exit(1)
-
+    scraper = None
     try:
-        config = json.loads(sys.argv[1])
+        parser = build_arg_parser("DuckDuckGo multi-niche email scraper")
+        parser.add_argument("--replay", help="Re-run extraction over a SERP archive (file or job dir) instead of crawling")
+        parser.add_argument("--out", help="Output directory override, e.g. a fresh directory for --replay")
+        config, args = parse_job_args(sys.argv[1:], parser=parser)
+        if args.out:
+            config["outputDir"] = args.out
+        if args.replay:
+            # Replays write through the same code path, but never archive or crawl again
+            config.pop("archiveSerp", None)
         scraper = DDGMultiNicheScraper(config)
-        scraper.run()
+        if args.replay:
+            scraper.replay(args.replay)
+        else:
+            scraper.run()
     except Exception as e:
         import traceback
         emit({
@@ -387,6 +1461,10 @@ def main():
             "message": str(e),
             "traceback": traceback.format_exc()
         })
+        if scraper:
+            quit_driver(scraper.driver)
+            if scraper.browser_cache:
+                scraper.browser_cache.cleanup()
         sys.exit(1)
 
 if __name__ == "__main__":
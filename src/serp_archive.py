@@ -0,0 +1,63 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from output_segments import SegmentWriter, iter_lines
+
+# --- CONFIGURATION ---
+ARCHIVE_FILE = "serp_archive.jsonl"
+
+
+def batch_hash(results):
+    """Content hash of one harvested batch, independent of key order."""
+    body = json.dumps(results, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SerpArchive:
+    """Records every harvested result batch so extraction can be re-run without a browser.
+
+    One JSON line per batch (query, unit, pass number, content hash, results)
+    goes into compressed rolling segments next to the lead files.
+    """
+
+    def __init__(self, output_dir, codec="gzip", max_bytes=None):
+        self.path = Path(output_dir) / ARCHIVE_FILE
+        self.writer = SegmentWriter(self.path, codec, max_bytes)
+
+    def record(self, query, city, niche, site, pass_index, results, skipped=0):
+        if not results:
+            return
+        self.writer.write(json.dumps({
+            "query": query,
+            "city": city,
+            "niche": niche,
+            "site": site,
+            "pass": pass_index,
+            "skipped": skipped,
+            "hash": batch_hash(results),
+            "recordedAt": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "results": results,
+        }, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+
+
+def iter_archive(path):
+    """Yields (record, ok) for every archived batch; ok is False when its hash does not match."""
+    path = Path(path)
+    if path.is_dir():
+        path = path / ARCHIVE_FILE
+    for line in iter_lines(path):
+        try:
+            record = json.loads(line)
+            results = record["results"]
+        except (ValueError, KeyError, TypeError):
+            # Torn last line of a segment cut short by a killed crawl
+            continue
+        yield record, batch_hash(results) == record.get("hash")
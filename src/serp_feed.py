@@ -0,0 +1,141 @@
+import html
+import json
+import re
+import sys
+from pathlib import Path
+
+# --- CONFIGURATION ---
+# DuckDuckGo loads (and, on scroll, appends) organic results through this call;
+# its argument is a JSON array of result objects
+FEED_MARKER = "DDG.pageLayout.load('d',"
+# Responses worth fetching: the results script and the search page itself (first page may be inline)
+FEED_URL_PATTERN = re.compile(r"^https://(?:links\.)?duckduckgo\.com/(?:d\.js|\?|$)")
+FIXTURE_FILE = Path(__file__).resolve().parent / "fixtures" / "ddg_results_feed.js"
+_TAG = re.compile(r"<[^>]+>")
+
+
+def _plain(value):
+    return html.unescape(_TAG.sub("", value or "")).strip()
+
+
+def parse_feed(body):
+    """Returns the organic results in a results-feed body as {href, title, text} dicts.
+
+    `text` joins title, display URL and snippet like the result's visible
+    text in the DOM, so the prefilter and extractors see the same thing.
+    """
+    results = []
+    decoder = json.JSONDecoder()
+    start = body.find(FEED_MARKER)
+    while start != -1:
+        try:
+            items, end = decoder.raw_decode(body, start + len(FEED_MARKER))
+        except ValueError:
+            end = start + len(FEED_MARKER)
+            items = []
+        for item in items if isinstance(items, list) else []:
+            href = isinstance(item, dict) and (item.get("u") or item.get("c"))
+            if not href:
+                continue  # the trailing {"n": next page} entry
+            title = _plain(item.get("t"))
+            text = "\n".join(part for part in (title, _plain(item.get("d")), _plain(item.get("a"))) if part)
+            results.append({"href": href, "title": title, "text": text})
+        start = body.find(FEED_MARKER, end)
+    return results
+
+
+class FeedCapture:
+    """Reads result batches straight from the network responses Chrome already received.
+
+    Needs Chrome's performance log (`goog:loggingPrefs`), which carries the
+    DevTools Network events. Finished feed responses are remembered per tab;
+    `harvest` fetches their bodies over CDP and parses them in Python, so no
+    result element is touched in the DOM.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._requests = {}  # request id -> tab, response seen but still loading
+        self._ready = {}  # tab -> finished request ids
+        self._seen = {}  # tab -> hrefs returned on the current page
+        self._live = set()  # tabs whose current page produced a feed
+
+    @staticmethod
+    def enable(options):
+        """Turns on the Network part of the performance log in a ChromeOptions."""
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    def _tab(self, handle=None):
+        handle = handle or self.driver.current_window_handle
+        return handle.replace("CDwindow-", "")
+
+    def _drain(self):
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])
+                event = message["message"]
+                method, params = event["method"], event["params"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if method == "Network.responseReceived":
+                if FEED_URL_PATTERN.match(params["response"]["url"]):
+                    self._requests[params["requestId"]] = message.get("webview", "")
+            elif method == "Network.loadingFinished":
+                tab = self._requests.pop(params["requestId"], None)
+                if tab is not None:
+                    self._ready.setdefault(tab, []).append(params["requestId"])
+
+    def reset(self, handle=None):
+        """Forgets the tab's previous page; call right before navigating it."""
+        self._drain()
+        tab = self._tab(handle)
+        self._ready.pop(tab, None)
+        self._seen.pop(tab, None)
+        self._live.discard(tab)
+
+    def harvest(self, pattern=None, handle=None):
+        """Returns (results, skipped) for feed results not returned before on this tab's page.
+
+        Returns None until a feed response has been captured on the page, so
+        the caller can fall back to the DOM. The tab must be the current one.
+        """
+        self._drain()
+        tab = self._tab(handle)
+        seen = self._seen.setdefault(tab, set())
+        pattern = re.compile(pattern, re.I) if pattern else None
+        results = []
+        skipped = 0
+        for request_id in self._ready.pop(tab, []):
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})["body"]
+            except Exception:
+                continue  # evicted or not a text body
+            batch = parse_feed(body)
+            if not batch:
+                continue
+            self._live.add(tab)
+            for result in batch:
+                if result["href"] in seen:
+                    continue
+                seen.add(result["href"])
+                if pattern and not pattern.search(result["text"]):
+                    skipped += 1
+                    continue
+                results.append(result)
+        if tab not in self._live:
+            return None
+        return results, skipped
+
+
+def main():
+    """Parses a saved results-feed body (default: the bundled fixture) and prints the results."""
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else FIXTURE_FILE
+    results = parse_feed(path.read_text(encoding="utf-8"))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if not results:
+        sys.exit(f"No results found in {path}; the feed format may have changed.")
+
+
+if __name__ == "__main__":
+    main()
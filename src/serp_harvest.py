@@ -0,0 +1,64 @@
+# --- CONFIGURATION ---
+RESULT_SELECTOR = "li[data-layout='organic'], article"
+TITLE_SELECTOR = "a[data-testid='result-title-a']"
+# DuckDuckGo's bot challenge ("anomaly") modal and generic captcha forms
+BLOCK_SELECTOR = ".anomaly-modal__modal, .anomaly-modal__title, #challenge-form, iframe[src*='captcha']"
+
+# Loose in-page patterns: they only need to be a superset of what Python extracts
+EMAIL_PREFILTER = r"[A-Za-z0-9._-]+@[A-Za-z0-9._-]+\.[A-Za-z0-9_-]+"
+PHONE_PREFILTER = r"\+?\d[\d\s().-]{6,}\d"
+PREFILTER_PATTERNS = {
+    "email": EMAIL_PREFILTER,
+    "phone": PHONE_PREFILTER,
+    "contacts": f"{EMAIL_PREFILTER}|{PHONE_PREFILTER}",
+}
+
+# Harvests every result not returned before on this page in one round trip.
+# Results are marked as seen in the page, so each call only ships new ones,
+# and with a filter pattern only contact-bearing results cross the wire.
+HARVEST_SCRIPT = """
+const resultSelector = arguments[0];
+const titleSelector = arguments[1];
+const filter = arguments[2] ? new RegExp(arguments[2], 'i') : null;
+const seen = window.__leadHarvestSeen || (window.__leadHarvestSeen = new Set());
+const results = [];
+let skipped = 0;
+const nodes = document.querySelectorAll(resultSelector);
+for (const node of nodes) {
+  const link = node.querySelector(titleSelector);
+  if (!link || !link.href || seen.has(link.href)) continue;
+  seen.add(link.href);
+  const text = node.innerText || '';
+  if (filter && !filter.test(text)) { skipped++; continue; }
+  results.push({href: link.href, title: link.innerText || '', text: text});
+}
+return {results: results, skipped: skipped, visible: nodes.length};
+"""
+
+
+def resolve_prefilter(value, phone_pattern=None):
+    """Maps the `prefilter` config value to a regex source, or None to keep every result."""
+    if not value or value in ("none", "all", "keepAll"):
+        return None
+    if value == "phone" and phone_pattern:
+        return phone_pattern
+    if value == "contacts" and phone_pattern:
+        return f"{EMAIL_PREFILTER}|{phone_pattern}"
+    return PREFILTER_PATTERNS.get(value, value)
+
+
+def harvest_results(driver, pattern=None):
+    """Returns (results, skipped) for results not yet harvested on the current page.
+
+    Each result is a dict with `href`, `title` and `text` (the result's visible text).
+    """
+    batch = driver.execute_script(HARVEST_SCRIPT, RESULT_SELECTOR, TITLE_SELECTOR, pattern) or {}
+    return batch.get("results") or [], int(batch.get("skipped") or 0)
+
+
+def page_blocked(driver):
+    """True when the current page shows a bot challenge instead of results."""
+    try:
+        return bool(driver.execute_script("return !!document.querySelector(arguments[0]);", BLOCK_SELECTOR))
+    except Exception:
+        return False
@@ -3,6 +3,7 @@ import express from "express";
 import path from "node:path";
 import crypto from "node:crypto";
 import fs from "node:fs";
+import { spawn } from "node:child_process";
 import { fileURLToPath } from "node:url";
 import session from "express-session";
 import sessionFileStore from "session-file-store";
@@ -11,7 +12,7 @@ import juice from "juice";
 import rateLimit from "express-rate-limit"; // Security
 import { authenticate, requireAuth, registerUser, changePassword } from "./auth.js";
 import { JobQueue } from "./queue.js";
-import { expandNiches } from "./scraper.js";
+import { expandNiches, pythonCommand } from "./scraper.js";
 
 // Sender & Tracking Routes
 import trackingRoutes from "./sender/routes/trackingRoutes.js";
@@ -320,7 +321,7 @@ app.post("/api/logout", (req, res) => {
 app.get("/api/me", (req, res) => {
   if (req.session.user) {
     const activeJob = Array.from(queue.jobs.values()).find(
-      j => j.userId === req.session.user.username && (j.status === "running" || j.status === "queued")
+      j => j.userId === req.session.user.username && (j.status === "running" || j.status === "paused" || j.status === "queued")
     );
     const usage = queue.getUserUsage(req.session.user.username);
 
@@ -602,9 +603,31 @@ app.get("/api/jobs/:jobId/files/:fileName", requireAuth, (req, res) => {
     return res.status(404).json({ error: "File not found on disk" });
   }
 
+  if (fileName.endsWith(".manifest.json")) {
+    return sendSegmentedFile(res, filePath);
+  }
   return res.download(filePath);
 });
 
+// Compressed outputs are listed by their manifest; serve the plain text of all their segments
+function sendSegmentedFile(res, manifestPath) {
+  const child = spawn(pythonCommand(), [path.join(__dirname, "output_segments.py"), manifestPath], {
+    stdio: ["ignore", "pipe", "pipe"]
+  });
+  res.attachment(path.basename(manifestPath, ".manifest.json"));
+  res.type("text/plain; charset=utf-8");
+  child.stdout.pipe(res);
+  child.on("error", (error) => {
+    if (!res.headersSent) {
+      return res.status(500).json({ error: `Could not read ${path.basename(manifestPath)}: ${error.message}` });
+    }
+    return res.destroy(error);
+  });
+  res.on("close", () => {
+    if (child.exitCode === null) child.kill();
+  });
+}
+
 app.post("/api/jobs/:jobId/stop", requireAuth, (req, res) => {
   const success = queue.stopJob(req.params.jobId);
   if (success) {
@@ -613,6 +636,45 @@ app.post("/api/jobs/:jobId/stop", requireAuth, (req, res) => {
   return res.status(404).json({ error: "Job not found or not in a stoppable state" });
 });
 
+// Control routes only reach jobs the caller started
+function findOwnJob(req, res) {
+  const job = queue.getJob(req.params.jobId);
+  if (!job || job.userId !== req.session.user.username) {
+    res.status(404).json({ error: "Job not found" });
+    return null;
+  }
+  return job;
+}
+
+app.post("/api/jobs/:jobId/pause", requireAuth, (req, res) => {
+  if (!findOwnJob(req, res)) return undefined;
+  if (queue.pauseJob(req.params.jobId)) {
+    return res.json({ message: "Job pause requested" });
+  }
+  return res.status(409).json({ error: "Job is not running or cannot be paused" });
+});
+
+app.post("/api/jobs/:jobId/resume", requireAuth, (req, res) => {
+  if (!findOwnJob(req, res)) return undefined;
+  if (queue.resumeJob(req.params.jobId)) {
+    return res.json({ message: "Job resume requested" });
+  }
+  return res.status(409).json({ error: "Job is not paused" });
+});
+
+// The query rate is shared by every job on the host, so only admins may change it
+app.post("/api/jobs/:jobId/rate", requireAdmin, (req, res) => {
+  if (!findOwnJob(req, res)) return undefined;
+  const queriesPerMinute = Number(req.body?.queriesPerMinute);
+  if (!Number.isFinite(queriesPerMinute) || queriesPerMinute <= 0) {
+    return res.status(400).json({ error: "queriesPerMinute must be a positive number" });
+  }
+  if (queue.setJobRate(req.params.jobId, queriesPerMinute)) {
+    return res.json({ message: "Query rate change requested" });
+  }
+  return res.status(409).json({ error: "Job is not running or cannot change its rate" });
+});
+
 app.get("/api/history", requireAuth, (req, res) => {
   const history = queue.getUserHistory(req.session.user.username);
   res.json(history);
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from output_segments import iter_lines, manifest_path
+
+SHARD_DIR_PREFIX = "shard_"
+
+
+def parse_shard(value):
+    """Parses an `i/n` shard spec into a (index, count) tuple, or None."""
+    if not value:
+        return None
+    if isinstance(value, (list, tuple)):
+        index, count = value
+    else:
+        index, _, count = str(value).partition("/")
+    index, count = int(index), int(count)
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {value!r}: expected i/n with 0 <= i < n")
+    return index, count
+
+
+def unit_key(city, niche, site):
+    """Case- and whitespace-insensitive identity of one (city, niche, site) unit."""
+    return "\x1f".join((city.strip().lower(), niche.strip().lower(), site.strip().lower()))
+
+
+def unit_shard(city, niche, site, count):
+    """Maps a (city, niche, site) unit to a shard with a process-independent hash."""
+    digest = hashlib.blake2b(unit_key(city, niche, site).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def unit_in_shard(shard, city, niche, site):
+    if not shard:
+        return True
+    index, count = shard
+    return unit_shard(city, niche, site, count) == index
+
+
+def shard_dir_name(shard):
+    index, count = shard
+    return f"{SHARD_DIR_PREFIX}{index}_of_{count}"
+
+
+def shard_output_dir(output_dir, shard):
+    """Each shard writes into its own subdirectory so hosts never share a file."""
+    output_dir = Path(output_dir)
+    return output_dir / shard_dir_name(shard) if shard else output_dir
+
+
+def _iter_entries(lines):
+    """Groups lead file lines into blocks: an optional header, then one per [RESULT]."""
+    block = []
+    for line in lines:
+        if line.startswith("[RESULT]") and block:
+            yield "".join(block)
+            block = []
+        block.append(line)
+    if block:
+        yield "".join(block)
+
+
+def _entry_link(entry):
+    for line in entry.splitlines():
+        if line.startswith("Link:"):
+            return line[5:].strip()
+    return None
+
+
+def _lead_file_names(shard_dir):
+    names = set()
+    for path in shard_dir.iterdir():
+        if path.name.endswith("_leads.txt"):
+            names.add(path.name)
+        elif path.name.endswith("_leads.txt.manifest.json"):
+            names.add(path.name[:-len(".manifest.json")])
+    return names
+
+
+def merge_shards(output_dir):
+    """Combines every shard_* subdirectory of `output_dir` into `output_dir` itself.
+
+    Email lists are deduped case-insensitively, phone lists exactly, and lead
+    files are rebuilt per city with one header and one entry per link.
+    Returns a summary dict with the merged files and their counts.
+    """
+    output_dir = Path(output_dir)
+    shard_dirs = sorted(p for p in output_dir.iterdir() if p.is_dir() and p.name.startswith(SHARD_DIR_PREFIX))
+    summary = {"shards": [p.name for p in shard_dirs], "files": {}}
+    if not shard_dirs:
+        return summary
+
+    list_names = set()
+    lead_names = set()
+    for shard_dir in shard_dirs:
+        for path in shard_dir.iterdir():
+            if path.name.endswith("_emails.txt") or path.name.endswith("_phones.txt") or path.name in ("all_emails.txt", "all_phones.txt"):
+                list_names.add(path.name)
+        lead_names |= _lead_file_names(shard_dir)
+
+    for name in sorted(list_names):
+        fold = name.endswith("emails.txt")
+        seen = set()
+        target = output_dir / name
+        if target.exists():
+            for line in iter_lines(target):
+                value = line.strip()
+                if value:
+                    seen.add(value.lower() if fold else value)
+        written = 0
+        with open(target, "a", encoding="utf-8") as out:
+            for shard_dir in shard_dirs:
+                source = shard_dir / name
+                if not source.exists():
+                    continue
+                for line in iter_lines(source):
+                    value = line.strip()
+                    key = value.lower() if fold else value
+                    if not value or key in seen:
+                        continue
+                    seen.add(key)
+                    out.write(value + "\n")
+                    written += 1
+        summary["files"][name] = {"added": written, "total": len(seen)}
+
+    for name in sorted(lead_names):
+        target = output_dir / name
+        seen_links = set()
+        has_header = False
+        if target.exists():
+            for entry in _iter_entries(iter_lines(target)):
+                if entry.startswith("[RESULT]"):
+                    seen_links.add(_entry_link(entry))
+                else:
+                    has_header = True
+        written = 0
+        with open(target, "a", encoding="utf-8") as out:
+            for shard_dir in shard_dirs:
+                source = shard_dir / name
+                if not source.exists() and not manifest_path(source).exists():
+                    continue
+                for entry in _iter_entries(iter_lines(source)):
+                    if not entry.startswith("[RESULT]"):
+                        if not has_header:
+                            out.write(entry)
+                            has_header = True
+                        continue
+                    link = _entry_link(entry)
+                    if link in seen_links:
+                        continue
+                    seen_links.add(link)
+                    out.write(entry)
+                    written += 1
+        summary["files"][name] = {"added": written, "total": len(seen_links)}
+
+    return summary
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != "merge":
+        print("Usage: python sharding.py merge <outputDir>", file=sys.stderr)
+        sys.exit(1)
+
+    summary = merge_shards(sys.argv[2])
+    print(json.dumps({
+        "type": "shards-merged",
+        "shards": summary["shards"],
+        "files": summary["files"],
+        "message": f"Merged {len(summary['shards'])} shards into {sys.argv[2]}"
+    }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+import signal
+import threading
+
+# --- CONFIGURATION ---
+DRIVER_QUIT_TIMEOUT = 10
+
+
+class StopSignal:
+    """Cooperative cancellation flag set by SIGTERM/SIGINT.
+
+    The handlers only set an event; scrapers check `requested` between results
+    and use `wait()` instead of `time.sleep()` so pauses end as soon as a stop
+    arrives.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.signal_name = None
+
+    def install(self, signals=(signal.SIGTERM, signal.SIGINT)):
+        for sig in signals:
+            signal.signal(sig, self._handle)
+        return self
+
+    def _handle(self, signum, frame):
+        if self._event.is_set():
+            # Second signal: the user really wants out
+            raise KeyboardInterrupt
+        self.signal_name = signal.Signals(signum).name
+        self._event.set()
+
+    def set(self):
+        self._event.set()
+
+    @property
+    def requested(self):
+        return self._event.is_set()
+
+    def wait(self, seconds):
+        """Sleeps up to `seconds`; returns True if a stop was requested meanwhile."""
+        return self._event.wait(seconds)
+
+
+class PauseSignal:
+    """Pause flag set by a `pause` control message and cleared by `resume`.
+
+    Scrapers `hold` before starting a query, so the running query finishes
+    and the browser then idles until resumed or stopped.
+    """
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+
+    def set(self):
+        self._running.clear()
+
+    def clear(self):
+        self._running.set()
+
+    @property
+    def requested(self):
+        return not self._running.is_set()
+
+    def hold(self, stop, poll=0.5):
+        """Blocks while paused; returns True if a stop was requested meanwhile."""
+        while self.requested:
+            if stop.wait(poll):
+                return True
+        return stop.requested
+
+
+def quit_driver(driver, timeout=DRIVER_QUIT_TIMEOUT):
+    """Quits a Selenium driver within `timeout` seconds, killing Chrome if it hangs."""
+    if driver is None:
+        return True
+
+    browser_pid = getattr(driver, "browser_pid", None)
+    service = getattr(driver, "service", None)
+    driver_pid = getattr(getattr(service, "process", None), "pid", None)
+
+    worker = threading.Thread(target=lambda: _safe_quit(driver), daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if not worker.is_alive():
+        return True
+
+    for pid in (browser_pid, driver_pid):
+        if pid:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+    return False
+
+
+def _safe_quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
@@ -0,0 +1,53 @@
+from collections import deque
+
+# --- CONFIGURATION ---
+DEFAULT_YIELD_WINDOW = 3
+DEFAULT_MIN_PASSES = 2
+
+
+class YieldStopPolicy:
+    """Decides when a scroll session has stopped paying for itself.
+
+    Tracks new contacts (emails/phones) per scroll pass and stops once their
+    moving average over the last `window` passes drops below `min_contacts`.
+    `max_results` is a hard cap on results saved for one query and
+    `max_passes` one on scroll passes (set by a job budget). Each check is
+    off when its setting is empty.
+    """
+
+    def __init__(self, min_contacts=None, window=DEFAULT_YIELD_WINDOW, min_passes=DEFAULT_MIN_PASSES, max_results=None,
+                 max_passes=None):
+        self.min_contacts = float(min_contacts) if min_contacts else None
+        self.window = max(1, int(window or DEFAULT_YIELD_WINDOW))
+        self.min_passes = max(self.window, int(min_passes or DEFAULT_MIN_PASSES))
+        self.max_results = int(max_results) if max_results else None
+        self.max_passes = int(max_passes) if max_passes else None
+        self.history = deque(maxlen=self.window)
+        self.passes = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            min_contacts=config.get("minContactsPerPass"),
+            window=config.get("yieldWindow"),
+            min_passes=config.get("yieldMinPasses"),
+            max_results=config.get("maxResultsPerQuery"),
+        )
+
+    def reached_result_cap(self, total_results):
+        return bool(self.max_results) and total_results >= self.max_results
+
+    def record_pass(self, new_contacts, total_results):
+        """Records one scroll pass; returns a stop reason string, or None to keep going."""
+        self.passes += 1
+        self.history.append(new_contacts)
+        if self.reached_result_cap(total_results):
+            return f"Reached {self.max_results} results for this query."
+        if self.max_passes and self.passes >= self.max_passes:
+            return f"Reached the {self.max_passes}-pass depth budget for this query."
+        if self.min_contacts is None or self.passes < self.min_passes:
+            return None
+        average = sum(self.history) / len(self.history)
+        if average < self.min_contacts:
+            return f"Yield fell to {average:.2f} new contacts/pass over the last {len(self.history)} passes."
+        return None
@@ -0,0 +1,112 @@
+import json
+import os
+import time
+from pathlib import Path
+
+# --- CONFIGURATION ---
+STATS_FILE = "yield_stats.jsonl"
+# Pseudo-queries of the parent estimate blended into each level (smoothing)
+PRIOR_WEIGHT = 3
+# Observations a (site, niche) pair needs before the scheduler may skip it
+MIN_SAMPLES_TO_SKIP = 3
+DEFAULT_QUERY_SECONDS = 60.0
+CITY_SIZE_BUCKETS = [(1_000_000, "large"), (100_000, "medium"), (0, "small")]
+
+
+def city_size(city, populations=None):
+    """Buckets a city by population ('large', 'medium', 'small'), or 'unknown'."""
+    population = (populations or {}).get(city)
+    if population is None:
+        return "unknown"
+    for floor, name in CITY_SIZE_BUCKETS:
+        if float(population) >= floor:
+            return name
+    return "small"
+
+
+def default_stats_path(output_dir):
+    """Stats live in the output root, next to every job directory, so history carries across jobs."""
+    return Path(output_dir).parent / STATS_FILE
+
+
+class YieldStats:
+    """Contacts-per-query history keyed by site, niche and city size.
+
+    Every finished query appends one JSON line, so concurrent jobs and shards
+    can share the file; loading folds the lines into running totals. Estimates
+    back off from (site, niche, size) to (site, niche) to (site) to the global
+    mean, each level smoothed towards the one above it.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.totals = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        self._add(row["site"], row["niche"], row["size"], row["contacts"], row.get("seconds") or 0)
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+    @staticmethod
+    def _keys(site, niche, size):
+        site, niche = site.strip().lower(), niche.strip().lower()
+        return [("*",), (site,), (site, niche), (site, niche, size)]
+
+    def _add(self, site, niche, size, contacts, seconds):
+        for key in self._keys(site, niche, size):
+            total = self.totals.setdefault(key, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += contacts
+            total[2] += seconds
+
+    def record(self, site, niche, size, contacts, results, seconds):
+        """Adds one finished query to the in-memory totals and the shared log."""
+        self._add(site, niche, size, contacts, seconds)
+        row = {
+            "site": site, "niche": niche, "size": size, "contacts": contacts,
+            "results": results, "seconds": round(seconds, 2), "at": time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        # One short O_APPEND write per line keeps concurrent writers from interleaving
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(row) + "\n").encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def estimate(self, site, niche, size):
+        """Returns (contacts per query, seconds per query, samples for this site and niche)."""
+        contacts, seconds = None, DEFAULT_QUERY_SECONDS
+        for key in self._keys(site, niche, size):
+            queries, total_contacts, total_seconds = self.totals.get(key, (0, 0.0, 0.0))
+            if contacts is None:
+                contacts = total_contacts / queries if queries else 0.0
+                seconds = total_seconds / queries if queries and total_seconds else seconds
+                continue
+            contacts = (total_contacts + PRIOR_WEIGHT * contacts) / (queries + PRIOR_WEIGHT)
+            if total_seconds:
+                seconds = (total_seconds + PRIOR_WEIGHT * seconds) / (queries + PRIOR_WEIGHT)
+        samples = self.totals.get(self._keys(site, niche, size)[2], (0,))[0]
+        return contacts, seconds, samples
+
+
+def prioritize_units(units, stats, min_expected=None):
+    """Orders (city, niche, site, size) units by expected contacts per second.
+
+    Units with enough history and an expected yield below `min_expected` are
+    dropped. Returns (ordered units, skipped count). Ties keep config order.
+    A job budget (`maxDurationSec` / `maxQueries`) then cuts the tail.
+    """
+    scored = []
+    skipped = 0
+    for order, unit in enumerate(units):
+        city, niche, site, size = unit
+        contacts, seconds, samples = stats.estimate(site, niche, size)
+        if min_expected is not None and samples >= MIN_SAMPLES_TO_SKIP and contacts < min_expected:
+            skipped += 1
+            continue
+        scored.append((-contacts / max(seconds, 1.0), order, unit))
+    scored.sort()
+    return [unit for _, _, unit in scored], skipped
@@ -0,0 +1,72 @@
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from enrichment import Enricher  # noqa: E402
+
+RESPONSE_SEC = 0.3
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+
+
+class SlowPage(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(RESPONSE_SEC)
+        body = f"<html><body><a href='mailto:lead{self.path.strip('/')}@example.com'>Mail</a></body></html>"
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SlowPage)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def extract(text):
+    emails = EMAIL.findall(text)
+    return ({"email": emails} if emails else {}), {}
+
+
+def test_pages_queued_behind_their_host_do_not_time_out(server):
+    # 12 pages, 2 at a time: the last ones wait ~1.5s for their host, longer than the 1s timeout
+    enricher = Enricher(extract, concurrency=16, per_host=2, timeout=1, respect_robots=False).start()
+    urls = [f"{server}/{i}" for i in range(12)]
+    for url in urls:
+        enricher.submit(url, {"href": url})
+    enricher.close(timeout=30)
+
+    assert enricher.stats["fetched"] == 12
+    assert enricher.stats["failed"] == 0
+    found = {url: found["email"] for _, url, found, _ in enricher.drain()}
+    assert found[urls[11]] == ["lead11@example.com"]
+    assert len(found) == 12
+
+
+def test_slow_page_still_times_out(server):
+    enricher = Enricher(extract, per_host=1, timeout=RESPONSE_SEC / 3, respect_robots=False).start()
+    enricher.submit(f"{server}/1")
+    enricher.close(timeout=10)
+
+    assert enricher.stats["failed"] == 1
+    assert enricher.drain() == []
@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from extractors import PhoneExtractor  # noqa: E402
+from phone_engine import MultiCountryPhoneEngine, PhoneKeySet, phone_key  # noqa: E402
+
+
+def test_bare_digit_keys_keep_leading_zeros():
+    assert phone_key("0123456789") != phone_key("123456789")
+    seen = PhoneKeySet()
+    assert seen.add(phone_key("0123456789"))
+    assert seen.add(phone_key("123456789"))
+    assert not seen.add(phone_key("0123456789"))
+
+
+def test_bare_digit_keys_never_collide_with_e164_keys():
+    assert phone_key("447700900123") != phone_key("+447700900123")
+    assert phone_key("+447700900123") == 447700900123
+    assert phone_key("999999999999999") < 0
+
+
+def test_specific_pattern_beats_a_catch_all_landline_pattern():
+    engine = MultiCountryPhoneEngine(["United Kingdom", "Ireland"])
+    assert engine.extract("Call 087 123 4567") == [("Ireland", "+353871234567")]
+    # Real UK numbers are unaffected
+    assert engine.extract("Call 0161 496 0000") == [("United Kingdom", "+441614960000")]
+    assert engine.extract("Call 07700900123") == [("United Kingdom", "+447700900123")]
+
+
+def test_city_places_a_number_two_countries_share():
+    extractor = PhoneExtractor(["UAE", "Saudi Arabia"])
+    assert extractor.extract("Call 0551234567", city="Riyadh") == ["+966551234567"]
+    assert extractor.country_of("+966551234567") == "Saudi Arabia"
+    assert extractor.extract("Call 0551234567", city="Dubai") == ["+971551234567"]
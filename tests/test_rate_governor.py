@@ -0,0 +1,44 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from rate_governor import RateGovernor  # noqa: E402
+
+
+def shared_state(state_dir):
+    return json.loads((Path(state_dir) / "state.json").read_text(encoding="utf-8"))
+
+
+def test_governors_with_different_rates_share_one_rate(tmp_path):
+    slow = RateGovernor("slow", queries_per_minute=6, burst=1, state_dir=tmp_path)
+    fast = RateGovernor("fast", queries_per_minute=60, burst=1, state_dir=tmp_path)
+
+    assert slow.try_acquire() == 0
+    assert shared_state(tmp_path)["rate"] == 6 / 60
+    # The second job's explicit setting replaces the host rate once
+    fast.try_acquire()
+    assert shared_state(tmp_path)["rate"] == 1.0
+    # The first job now refills at the shared rate instead of writing its own back
+    slow.try_acquire()
+    assert shared_state(tmp_path)["rate"] == 1.0
+    assert slow.rate == 1.0
+
+
+def test_default_governor_adopts_the_host_rate(tmp_path):
+    RateGovernor("configured", queries_per_minute=30, state_dir=tmp_path).try_acquire()
+    joined = RateGovernor("default", state_dir=tmp_path)
+    joined.try_acquire()
+    assert joined.rate == 0.5
+    assert shared_state(tmp_path)["rate"] == 0.5
+
+
+def test_set_rate_applies_host_wide(tmp_path):
+    first = RateGovernor("first", queries_per_minute=6, state_dir=tmp_path)
+    second = RateGovernor("second", state_dir=tmp_path)
+    first.try_acquire()
+    second.set_rate(120)
+    assert shared_state(tmp_path)["rate"] == 2.0
+    first.try_acquire()
+    assert first.rate == 2.0
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from serp_feed import FIXTURE_FILE, parse_feed  # noqa: E402
+
+
+def test_fixture_feed_parses_to_ordered_results():
+    results = parse_feed(FIXTURE_FILE.read_text(encoding="utf-8"))
+
+    assert [result["href"] for result in results] == [
+        "https://www.facebook.com/janefitlondon",
+        "https://www.facebook.com/strongcoachldn",
+        "https://www.facebook.com/gymphotos",
+        "https://www.facebook.com/yogaspaceldn",
+    ]
+    assert all(set(result) == {"href", "title", "text"} for result in results)
+    # Entities decoded and tags stripped from the title
+    assert results[0]["title"] == "Jane Fit & Co - Personal Trainer | Facebook"
+    # text is title, display URL and snippet, like the result's visible text
+    assert results[0]["text"] == (
+        "Jane Fit & Co - Personal Trainer | Facebook\n"
+        "www.facebook.com/janefitlondon\n"
+        "Certified personal trainer in London. Book a session: jane.fit@gmail.com or call 07700 900123."
+    )
+    assert results[3]["text"].endswith("WhatsApp +44 7700 900456 — studio@yogaspace.co.uk")
+
+
+def test_feed_without_marker_has_no_results():
+    assert parse_feed("<html><body>No results.</body></html>") == []